@@ -1 +1,9 @@
-from django.contrib import admin
\ No newline at end of file
+from django.contrib import admin
+
+from .models import SyncCheckpoint
+
+
+@admin.register(SyncCheckpoint)
+class SyncCheckpointAdmin(admin.ModelAdmin):
+    list_display = ['resource', 'records_seen', 'records_changed', 'total_pages', 'started_at', 'completed_at']
+    readonly_fields = ['record_hashes', 'pages_done', 'started_at', 'completed_at', 'updated_at']
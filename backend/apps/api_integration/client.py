@@ -0,0 +1,516 @@
+# apps/api_integration/client.py - Cliente HTTP compartilhado da Open5e API
+
+import logging
+import random
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlencode, urljoin, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.core.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+OPEN5E_BASE_URL = 'https://api.open5e.com/'
+
+# Status que valem uma nova tentativa (rate limit e falhas temporárias)
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class Open5eError(Exception):
+    """
+    Falha ao consultar a Open5e API.
+
+    `status_code` é None quando a falha foi de rede (timeout, conexão).
+    """
+
+    def __init__(self, message, status_code=None, url=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.url = url
+
+    @property
+    def is_not_found(self):
+        return self.status_code == 404
+
+    @property
+    def is_upstream_failure(self):
+        """Falha do serviço (rede, rate limit, 5xx) - conta para o circuit breaker"""
+        return self.status_code is None or self.status_code in RETRY_STATUSES
+
+
+class CircuitOpenError(Open5eError):
+    """Circuit breaker aberto: a chamada nem chegou a ser feita"""
+
+
+# Resultado de uma consulta com cache: `stale` indica dado antigo servido
+# enquanto a Open5e está indisponível (ou sendo revalidado em background)
+CachedPayload = namedtuple('CachedPayload', ['data', 'stale'])
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker simples (closed -> open -> half-open).
+
+    Depois de `failure_threshold` falhas seguidas o circuito abre e as
+    chamadas falham na hora, sem ocupar o worker até o timeout. Passado
+    `reset_timeout`, uma única chamada de teste é liberada: sucesso fecha
+    o circuito, falha reabre.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self):
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                return True  # chamada de teste
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+
+class SingleFlight:
+    """
+    Coalescência de chamadas: enquanto `fn` de uma chave está em
+    andamento, chamadas concorrentes com a mesma chave esperam por ela e
+    recebem o mesmo resultado (ou a mesma exceção) em vez de repetir o
+    trabalho.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """Retorna (resultado, shared) - `shared` indica carona em outra chamada"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self):
+        with self._lock:
+            return set(self._calls)
+
+
+class HostMetrics:
+    """Contadores de chamadas de um host (protegidos pelo lock do cliente)"""
+    __slots__ = ('requests', 'retries', 'errors', 'short_circuited', 'coalesced', 'total_time', 'max_time')
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.short_circuited = 0
+        self.coalesced = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'errors': self.errors,
+            'short_circuited': self.short_circuited,
+            'coalesced': self.coalesced,
+            'total_time': round(self.total_time, 4),
+            'avg_time': round(self.total_time / self.requests, 4) if self.requests else 0.0,
+            'max_time': round(self.max_time, 4),
+        }
+
+
+class Open5eClient:
+    """
+    Cliente com pool de conexões keep-alive, retries limitados com jitter,
+    limite de requisições simultâneas por host, circuit breaker por host e
+    métricas de tempo.
+
+    Uma única `requests.Session` é reutilizada por todas as chamadas do
+    processo, então conexões TCP/TLS abertas são aproveitadas entre
+    requisições em vez de um handshake novo a cada `requests.get`.
+
+    Chamadas idênticas simultâneas são coalescidas: no processo, por
+    `SingleFlight`; entre workers, um lock no cache (`cache.add`, atômico
+    no Redis) deixa um único worker buscar um path ausente enquanto os
+    outros esperam a entrada aparecer no cache.
+    """
+    cache_prefix = 'open5e'
+
+    def __init__(self, base_url=OPEN5E_BASE_URL, timeout=10, max_retries=3,
+                 backoff=0.5, max_backoff=8.0, pool_size=10, max_concurrency=4,
+                 failure_threshold=5, reset_timeout=30.0, cache_ttl=60 * 60,
+                 stale_ttl=60 * 60 * 24 * 7, refresh_workers=2, lock_timeout=30,
+                 lock_wait=15.0, lock_poll=0.05):
+        self.base_url = base_url if base_url.endswith('/') else f'{base_url}/'
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_concurrency = max_concurrency
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.cache_ttl = cache_ttl
+        self.stale_ttl = stale_ttl
+        self.lock_timeout = lock_timeout
+        self.lock_wait = lock_wait
+        self.lock_poll = lock_poll
+
+        # Retries ficam a cargo do cliente (com jitter), não do urllib3
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'Accept': 'application/json'})
+
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._breakers = {}
+        self._metrics = {}
+        self._inflight = SingleFlight()
+
+        # Revalidação em background de entradas antigas do cache
+        self._refresh_executor = ThreadPoolExecutor(
+            max_workers=refresh_workers, thread_name_prefix='open5e-refresh'
+        )
+        self._refreshing = {}
+
+    # ========================================
+    # API PÚBLICA
+    # ========================================
+
+    def get(self, path, params=None, timeout=None):
+        """
+        GET em `path` (relativo à base ou URL absoluta) e retorna o JSON.
+        Levanta Open5eError se todas as tentativas falharem.
+        """
+        url = urljoin(self.base_url, path)
+        host = urlsplit(url).netloc
+
+        flight_key = (url, urlencode(sorted((params or {}).items()), doseq=True))
+        data, shared = self._inflight.do(flight_key, lambda: self._get(host, url, params, timeout))
+        if shared:
+            with self._lock:
+                self._host_metrics(host).coalesced += 1
+        return data
+
+    def _get(self, host, url, params, timeout):
+        breaker = self.breaker(host)
+        if not breaker.allow_request():
+            with self._lock:
+                self._host_metrics(host).short_circuited += 1
+            raise CircuitOpenError(f'Circuit breaker aberto para {host}', url=url)
+
+        try:
+            data = self._get_with_retries(host, url, params, timeout)
+        except Open5eError as e:
+            if e.is_upstream_failure:
+                breaker.record_failure()
+            else:
+                breaker.record_success()  # o serviço respondeu (404, JSON inválido...)
+            raise
+        breaker.record_success()
+        return data
+
+    def get_cached(self, path):
+        """
+        GET com cache e stale-while-revalidate. Retorna CachedPayload.
+
+        - entrada recente no cache: servida sem chamar a API;
+        - entrada antiga: servida marcada como stale e revalidada em background;
+        - API falhando ou circuito aberto: última entrada servida como stale.
+
+        Só levanta Open5eError quando não há nada em cache (ou em 404).
+        """
+        key = self._cache_key(path)
+        entry = cache.get(key)
+
+        if entry is not None:
+            if time.time() - entry['fetched_at'] < self.cache_ttl:
+                return CachedPayload(entry['data'], False)
+            self.refresh_in_background(path)
+            return CachedPayload(entry['data'], True)
+
+        try:
+            data, _ = self._inflight.do(key, lambda: self._fetch_with_lock(path))
+            return CachedPayload(data, False)
+        except Open5eError as e:
+            # Outra thread pode ter preenchido o cache nesse meio tempo
+            entry = cache.get(key)
+            if entry is None or e.is_not_found:
+                raise
+            return CachedPayload(entry['data'], True)
+
+    def refresh_in_background(self, path):
+        """Agenda a revalidação de `path` (no máximo uma por path em andamento)"""
+        with self._lock:
+            future = self._refreshing.get(path)
+            if future is not None:
+                return future
+            future = self._refresh_executor.submit(self._background_refresh, path)
+            self._refreshing[path] = future
+        return future
+
+    def breaker(self, host):
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(
+                    self.failure_threshold, self.reset_timeout
+                )
+        return breaker
+
+    def iter_pages(self, path, params=None):
+        """
+        Percorre um endpoint paginado seguindo o campo `next`,
+        retornando cada página (dict com `results`)
+        """
+        url = path
+        while url:
+            data = self.get(url, params=params)
+            yield data
+            # A URL "next" já contém os parâmetros de paginação
+            url = data.get('next')
+            params = None
+
+    def metrics(self):
+        """Cópia das métricas por host"""
+        with self._lock:
+            return {host: metric.as_dict() for host, metric in self._metrics.items()}
+
+    def reset_metrics(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def close(self):
+        self._refresh_executor.shutdown(wait=False)
+        self.session.close()
+
+    # ========================================
+    # INTERNOS
+    # ========================================
+
+    def _get_with_retries(self, host, url, params, timeout):
+        attempts = self.max_retries + 1
+
+        for attempt in range(attempts):
+            retry_after = None
+            try:
+                with self._host_slot(host):
+                    response = self._timed_request(host, url, params, timeout or self.timeout)
+            except requests.RequestException as e:
+                error = Open5eError(f'Erro de rede em {url}: {e}', url=url)
+            else:
+                if response.status_code == 200:
+                    try:
+                        return response.json()
+                    except ValueError as e:
+                        self._record_error(host)
+                        raise Open5eError(f'Resposta inválida de {url}: {e}', 200, url)
+
+                error = Open5eError(
+                    f'Open5e respondeu {response.status_code} para {url}',
+                    response.status_code, url
+                )
+                if response.status_code not in RETRY_STATUSES:
+                    self._record_error(host)
+                    raise error
+                retry_after = self._retry_after(response)
+
+            if attempt + 1 < attempts:
+                self._record_retry(host)
+                delay = self._backoff_delay(attempt, retry_after)
+                logger.info('Open5e: nova tentativa em %.2fs (%s)', delay, error)
+                time.sleep(delay)
+
+        self._record_error(host)
+        raise error
+
+    def _fetch_and_store(self, path):
+        data = self.get(path)
+        cache.set(self._cache_key(path), {'data': data, 'fetched_at': time.time()}, self.stale_ttl)
+        return data
+
+    def _fetch_with_lock(self, path):
+        """
+        Busca um path ausente do cache com lock entre workers. Quem não
+        pega o lock espera o dono gravar a entrada; se o dono desistir
+        (lock liberado sem entrada) ou demorar mais que `lock_wait`, busca
+        por conta própria.
+        """
+        key = self._cache_key(path)
+        token = self._acquire_lock(key)
+        if token is not None:
+            try:
+                return self._fetch_and_store(path)
+            finally:
+                self._release_lock(key, token)
+
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(self.lock_poll)
+            entry = cache.get(key)
+            if entry is not None:
+                with self._lock:
+                    self._host_metrics(urlsplit(urljoin(self.base_url, path)).netloc).coalesced += 1
+                return entry['data']
+            if cache.get(f'{key}:lock') is None:
+                break
+        return self._fetch_and_store(path)
+
+    def _acquire_lock(self, key):
+        token = uuid.uuid4().hex
+        return token if cache.add(f'{key}:lock', token, self.lock_timeout) else None
+
+    def _release_lock(self, key, token):
+        # Só apaga o próprio lock (pode ter expirado e sido pego por outro worker)
+        if cache.get(f'{key}:lock') == token:
+            cache.delete(f'{key}:lock')
+
+    def _background_refresh(self, path):
+        key = self._cache_key(path)
+        token = self._acquire_lock(key)
+        try:
+            # Sem o lock, outro worker já está revalidando este path
+            if token is not None:
+                self._fetch_and_store(path)
+        except Open5eError as e:
+            logger.info('Open5e: revalidação de %s falhou (%s)', path, e)
+        finally:
+            if token is not None:
+                self._release_lock(key, token)
+            with self._lock:
+                self._refreshing.pop(path, None)
+
+    def _cache_key(self, path):
+        return f'{self.cache_prefix}:{urljoin(self.base_url, path)}'
+
+    def _host_slot(self, host):
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = self._semaphores[host] = threading.BoundedSemaphore(self.max_concurrency)
+        return semaphore
+
+    def _host_metrics(self, host):
+        metric = self._metrics.get(host)
+        if metric is None:
+            metric = self._metrics[host] = HostMetrics()
+        return metric
+
+    def _timed_request(self, host, url, params, timeout):
+        start = time.perf_counter()
+        try:
+            return self.session.get(url, params=params, timeout=timeout)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                metric = self._host_metrics(host)
+                metric.requests += 1
+                metric.total_time += elapsed
+                metric.max_time = max(metric.max_time, elapsed)
+
+    def _record_retry(self, host):
+        with self._lock:
+            self._host_metrics(host).retries += 1
+
+    def _record_error(self, host):
+        with self._lock:
+            self._host_metrics(host).errors += 1
+
+    def _backoff_delay(self, attempt, retry_after=None):
+        """Backoff exponencial com "full jitter"; respeita Retry-After"""
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        ceiling = min(self.max_backoff, self.backoff * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    @staticmethod
+    def _retry_after(response):
+        try:
+            return max(0.0, float(response.headers.get('Retry-After')))
+        except (TypeError, ValueError):
+            return None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Cliente compartilhado do processo, configurado pelos settings OPEN5E_*"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = Open5eClient(
+                    base_url=getattr(settings, 'OPEN5E_BASE_URL', OPEN5E_BASE_URL),
+                    timeout=getattr(settings, 'OPEN5E_TIMEOUT', 10),
+                    max_retries=getattr(settings, 'OPEN5E_MAX_RETRIES', 3),
+                    pool_size=getattr(settings, 'OPEN5E_POOL_SIZE', 10),
+                    max_concurrency=getattr(settings, 'OPEN5E_MAX_CONCURRENCY', 4),
+                    failure_threshold=getattr(settings, 'OPEN5E_FAILURE_THRESHOLD', 5),
+                    reset_timeout=getattr(settings, 'OPEN5E_RESET_TIMEOUT', 30),
+                    cache_ttl=getattr(settings, 'OPEN5E_CACHE_TTL', 60 * 60),
+                )
+    return _client
+
+
+def reset_client():
+    """Descarta o cliente compartilhado (settings alterados, testes)"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
@@ -0,0 +1,297 @@
+# apps/api_integration/fake_server.py - Servidor Open5e falso para testes e benchmarks
+
+"""
+App WSGI que imita as rotas da Open5e usadas pelo projeto:
+
+    GET /v2/spells/?limit=50&page=2   listagem paginada (count/next/previous/results)
+    GET /v2/spells/fireball/          detalhe (slug, key ou key sem prefixo do documento)
+
+Os dados vêm de fixtures gravadas - um snapshot do catálogo
+(export_open5e_snapshot) ou `SAMPLE_FIXTURES`. Latência e falhas são
+configuráveis, para medir o backend com um upstream lento ou instável:
+
+    with FakeOpen5eServer(FakeOpen5eApp(latency=0.2, error_rate=0.1)) as server:
+        client = Open5eClient(base_url=server.url)
+
+Em linha de comando: `python manage.py run_fake_open5e`.
+"""
+
+from collections import deque
+import json
+import random
+import threading
+import time
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlencode
+from wsgiref.simple_server import make_server, WSGIRequestHandler, WSGIServer
+from wsgiref.util import application_uri
+
+from .sync import RESOURCES, record_slugs
+
+
+# Registros de exemplo no formato da API (SRD)
+SAMPLE_FIXTURES = {
+    'v2/spells/': [
+        {
+            'key': 'srd_fireball', 'name': 'Fireball', 'level': 3,
+            'document': {'key': 'srd', 'name': 'Systems Reference Document'},
+            'school': {'name': 'Evocation', 'key': 'evocation'},
+            'classes': [{'name': 'Sorcerer', 'key': 'srd_sorcerer'}, {'name': 'Wizard', 'key': 'srd_wizard'}],
+            'desc': 'A bright streak flashes from your pointing finger to a point you choose '
+                    'within range and then blossoms with a low roar into an explosion of flame.',
+            'higher_level': 'The damage increases by 1d6 for each slot level above 3rd.',
+            'casting_time': 'action', 'range_text': '150 feet', 'duration': 'instantaneous',
+            'verbal': True, 'somatic': True, 'material': True,
+            'concentration': False, 'ritual': False,
+        },
+        {
+            'key': 'srd_magic-missile', 'name': 'Magic Missile', 'level': 1,
+            'document': {'key': 'srd', 'name': 'Systems Reference Document'},
+            'school': {'name': 'Evocation', 'key': 'evocation'},
+            'classes': [{'name': 'Sorcerer', 'key': 'srd_sorcerer'}, {'name': 'Wizard', 'key': 'srd_wizard'}],
+            'desc': 'You create three glowing darts of magical force.',
+            'higher_level': 'The spell creates one more dart for each slot level above 1st.',
+            'casting_time': 'action', 'range_text': '120 feet', 'duration': 'instantaneous',
+            'verbal': True, 'somatic': True, 'material': False,
+            'concentration': False, 'ritual': False,
+        },
+        {
+            'key': 'srd_shield', 'name': 'Shield', 'level': 1,
+            'document': {'key': 'srd', 'name': 'Systems Reference Document'},
+            'school': {'name': 'Abjuration', 'key': 'abjuration'},
+            'classes': [{'name': 'Sorcerer', 'key': 'srd_sorcerer'}, {'name': 'Wizard', 'key': 'srd_wizard'}],
+            'desc': 'An invisible barrier of magical force appears and protects you.',
+            'higher_level': '',
+            'casting_time': 'reaction', 'range_text': 'Self', 'duration': '1 round',
+            'verbal': True, 'somatic': True, 'material': False,
+            'concentration': False, 'ritual': False,
+        },
+        {
+            'key': 'srd_detect-magic', 'name': 'Detect Magic', 'level': 1,
+            'document': {'key': 'srd', 'name': 'Systems Reference Document'},
+            'school': {'name': 'Divination', 'key': 'divination'},
+            'classes': [{'name': 'Cleric', 'key': 'srd_cleric'}, {'name': 'Wizard', 'key': 'srd_wizard'}],
+            'desc': 'For the duration, you sense the presence of magic within 30 feet of you.',
+            'higher_level': '',
+            'casting_time': 'action', 'range_text': 'Self', 'duration': 'Up to 10 minutes',
+            'verbal': True, 'somatic': True, 'material': False,
+            'concentration': True, 'ritual': True,
+        },
+    ],
+    'v2/races/': [
+        {
+            'key': 'srd_elf', 'name': 'Elf',
+            'document': {'key': 'srd', 'name': 'Systems Reference Document'},
+            'desc': 'Elves are a magical people of otherworldly grace.',
+        },
+        {
+            'key': 'srd_human', 'name': 'Human',
+            'document': {'key': 'srd', 'name': 'Systems Reference Document'},
+            'desc': 'Humans are the most adaptable and ambitious people.',
+        },
+    ],
+    'v1/classes/': [
+        {
+            'slug': 'wizard', 'name': 'Wizard', 'hit_dice': '1d6',
+            'prof_saving_throws': 'Intelligence, Wisdom', 'spellcasting_ability': 'Intelligence',
+            'document__slug': 'wotc-srd',
+        },
+    ],
+    'v2/backgrounds/': [
+        {
+            'key': 'srd_acolyte', 'name': 'Acolyte',
+            'document': {'key': 'srd', 'name': 'Systems Reference Document'},
+            'desc': 'You have spent your life in the service of a temple.',
+        },
+    ],
+}
+
+
+class FakeOpen5eApp:
+    """
+    App WSGI com as fixtures em memória ({caminho da listagem: [registros]}).
+
+    - `latency` (+ até `jitter`) segundos de espera em toda resposta
+    - `error_rate`: fração das requisições que respondem `error_status`
+    - `fail_next()`: falhas determinísticas para as próximas requisições
+    - `requests`: só os últimos `request_log_size` caminhos (a contagem
+      total fica em `stats()`), para não crescer sem limite
+
+    Os atributos podem ser alterados com o servidor rodando.
+    """
+
+    def __init__(self, fixtures=None, latency=0.0, jitter=0.0, error_rate=0.0,
+                 error_status=503, retry_after=None, page_size=50, seed=None, sleep=time.sleep,
+                 request_log_size=1000):
+        self.fixtures = {path.strip('/') + '/': list(records) for path, records in (fixtures or SAMPLE_FIXTURES).items()}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.page_size = page_size
+        self._random = random.Random(seed)
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._faults = []
+        self._index = {
+            path: {slug: record for record in records for slug in record_slugs(record)}
+            for path, records in self.fixtures.items()
+        }
+        self.requests = deque(maxlen=request_log_size)
+        self.request_count = 0
+        self.errors = 0
+
+    @classmethod
+    def from_snapshot(cls, path, **options):
+        """Usa um snapshot (export_open5e_snapshot) como fixtures"""
+        from .snapshot import read_snapshot
+
+        _, records = read_snapshot(path)
+        fixtures = {
+            RESOURCES[name].path: [data for _, data in rows]
+            for name, rows in records.items() if name in RESOURCES
+        }
+        return cls(fixtures, **options)
+
+    def fail_next(self, count=1, status=503, retry_after=None):
+        """As próximas `count` requisições respondem `status`"""
+        with self._lock:
+            self._faults.extend([(status, retry_after)] * count)
+
+    def reset(self):
+        with self._lock:
+            self._faults.clear()
+            self.requests.clear()
+            self.request_count = 0
+            self.errors = 0
+
+    def stats(self):
+        with self._lock:
+            return {'requests': self.request_count, 'errors': self.errors}
+
+    # ========================================
+    # WSGI
+    # ========================================
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '/').strip('/')
+        query = {key: values[-1] for key, values in parse_qs(environ.get('QUERY_STRING', '')).items()}
+
+        with self._lock:
+            self.requests.append(path)
+            self.request_count += 1
+            fault = self._faults.pop(0) if self._faults else None
+            if fault is None and self.error_rate and self._random.random() < self.error_rate:
+                fault = (self.error_status, self.retry_after)
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+            if fault is not None:
+                self.errors += 1
+
+        if delay > 0:
+            self._sleep(delay)
+
+        if fault is not None:
+            status, retry_after = fault
+            headers = [('Retry-After', str(retry_after))] if retry_after is not None else []
+            return self._respond(start_response, status, {'detail': 'Falha injetada'}, headers)
+
+        listing = f'{path}/'
+        if listing in self.fixtures:
+            return self._respond(start_response, 200, self._page(environ, listing, query))
+
+        parent, _, slug = path.rpartition('/')
+        record = self._index.get(f'{parent}/', {}).get(slug)
+        if record is None:
+            return self._respond(start_response, 404, {'detail': 'Not found.'})
+        return self._respond(start_response, 200, record)
+
+    def _page(self, environ, listing, query):
+        records = self.fixtures[listing]
+        try:
+            limit = max(1, int(query.get('limit', self.page_size)))
+            page = max(1, int(query.get('page', 1)))
+        except ValueError:
+            limit, page = self.page_size, 1
+
+        def page_url(number):
+            return f'{application_uri(environ)}{listing}?{urlencode(dict(query, limit=limit, page=number))}'
+
+        return {
+            'count': len(records),
+            'next': page_url(page + 1) if page * limit < len(records) else None,
+            'previous': page_url(page - 1) if page > 1 else None,
+            'results': records[(page - 1) * limit:page * limit],
+        }
+
+    @staticmethod
+    def _respond(start_response, status, data, headers=()):
+        body = json.dumps(data).encode('utf-8')
+        reason = {200: 'OK', 404: 'Not Found', 429: 'Too Many Requests'}.get(status, 'Error')
+        start_response(f'{status} {reason}', [
+            ('Content-Type', 'application/json'),
+            ('Content-Length', str(len(body))),
+            *headers,
+        ])
+        return [body]
+
+
+# ========================================
+# SERVIDOR
+# ========================================
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeOpen5eServer:
+    """
+    Servidor HTTP local (wsgiref, uma thread por requisição) para o app
+    falso. `port=0` escolhe uma porta livre; a base para o cliente fica em
+    `url`.
+    """
+
+    def __init__(self, app=None, host='127.0.0.1', port=0, quiet=True):
+        self.app = app or FakeOpen5eApp()
+        self.host = host
+        self.port = port
+        self.quiet = quiet
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}/'
+
+    def start(self):
+        self._server = make_server(
+            self.host, self.port, self.app,
+            server_class=_ThreadingWSGIServer,
+            handler_class=_QuietHandler if self.quiet else WSGIRequestHandler,
+        )
+        self.port = self._server.server_port
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-open5e', daemon=True)
+        self._thread.start()
+        return self
+
+    def join(self):
+        """Bloqueia até o servidor parar (linha de comando)"""
+        self._thread.join()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
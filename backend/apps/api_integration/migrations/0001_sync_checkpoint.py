@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(max_length=50, unique=True)),
+                ('record_hashes', models.JSONField(default=dict, help_text='slug -> hash do payload sincronizado')),
+                ('pages_done', models.JSONField(default=list, help_text='Páginas já gravadas na execução atual')),
+                ('total_pages', models.IntegerField(default=0)),
+                ('records_seen', models.IntegerField(default=0)),
+                ('records_changed', models.IntegerField(default=0)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Sync Checkpoint',
+                'verbose_name_plural': 'Sync Checkpoints',
+                'ordering': ['resource'],
+            },
+        ),
+    ]
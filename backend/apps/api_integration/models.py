@@ -1 +1,41 @@
-from django.db import models
\ No newline at end of file
+# apps/api_integration/models.py - Estado da sincronização com a Open5e API
+
+from django.db import models
+
+
+class SyncCheckpoint(models.Model):
+    """
+    Checkpoint de sincronização por recurso (races, classes, backgrounds, spells).
+
+    `pages_done` permite retomar uma execução interrompida sem baixar de
+    novo as páginas já gravadas; `record_hashes` guarda o hash do último
+    payload de cada registro para só gravar o que mudou.
+    """
+    resource = models.CharField(max_length=50, unique=True)
+
+    record_hashes = models.JSONField(default=dict, help_text="slug -> hash do payload sincronizado")
+    pages_done = models.JSONField(default=list, help_text="Páginas já gravadas na execução atual")
+    total_pages = models.IntegerField(default=0)
+
+    # Estatísticas da última execução
+    records_seen = models.IntegerField(default=0)
+    records_changed = models.IntegerField(default=0)
+
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['resource']
+        verbose_name = 'Sync Checkpoint'
+        verbose_name_plural = 'Sync Checkpoints'
+
+    def __str__(self):
+        return self.resource
+
+    @property
+    def in_progress(self):
+        """Execução iniciada e não concluída (será retomada)"""
+        return self.started_at is not None and (
+            self.completed_at is None or self.completed_at < self.started_at
+        )
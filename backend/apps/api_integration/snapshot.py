@@ -0,0 +1,166 @@
+# apps/api_integration/snapshot.py - Snapshot offline do catálogo Open5e
+
+"""
+Formato (versão 1): NDJSON comprimido com gzip.
+
+A primeira linha é o cabeçalho:
+
+    {"format": "open5e-snapshot", "version": 1, "created_at": "...",
+     "source": "https://api.open5e.com", "resources": {"spells": 319, ...}}
+
+Cada linha seguinte é um registro, com o payload bruto da API:
+
+    {"resource": "spells", "slug": "fireball", "data": {...}}
+
+O carregamento usa o mesmo upsert em lote da sincronização
+(`upsert_pairs`), então o resultado é idêntico ao de um sync_open5e -
+só que sem rede.
+"""
+
+from datetime import datetime, timezone as dt_timezone
+import gzip
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import SyncCheckpoint
+from .sync import RESOURCES, existing_slugs, invalidate_caches, upsert_pairs
+
+
+SNAPSHOT_FORMAT = 'open5e-snapshot'
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotError(Exception):
+    """Arquivo que não é um snapshot válido (formato, versão ou truncado)"""
+
+
+# ========================================
+# EXPORTAÇÃO
+# ========================================
+
+def _resource_records(resource):
+    """(slug, api_data) dos registros que já têm dados da API"""
+    rows = resource.model.objects.order_by('slug').values_list('slug', 'api_data')
+    return [(slug, data) for slug, data in rows if data]
+
+
+def export_snapshot(path, resource_names=None):
+    """
+    Grava o catálogo local (api_data de cada recurso) em `path`.
+
+    Retorna {recurso: quantidade de registros}.
+    """
+    names = list(resource_names or RESOURCES)
+    records = {name: _resource_records(RESOURCES[name]) for name in names}
+    counts = {name: len(rows) for name, rows in records.items()}
+
+    header = {
+        'format': SNAPSHOT_FORMAT,
+        'version': SNAPSHOT_VERSION,
+        'created_at': datetime.now(dt_timezone.utc).isoformat(),
+        'source': getattr(settings, 'OPEN5E_BASE_URL', ''),
+        'resources': counts,
+    }
+    with gzip.open(path, 'wt', encoding='utf-8') as stream:
+        stream.write(json.dumps(header) + '\n')
+        for name, rows in records.items():
+            for slug, data in rows:
+                line = {'resource': name, 'slug': slug, 'data': data}
+                stream.write(json.dumps(line, ensure_ascii=False, separators=(',', ':')) + '\n')
+    return counts
+
+
+# ========================================
+# CARREGAMENTO
+# ========================================
+
+def read_header(path):
+    """Lê e valida o cabeçalho de um snapshot"""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as stream:
+            header = json.loads(stream.readline() or 'null')
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f'{path}: não é um snapshot válido ({e})')
+    return _check_header(path, header)
+
+
+def _check_header(path, header):
+    if not isinstance(header, dict) or header.get('format') != SNAPSHOT_FORMAT:
+        raise SnapshotError(f'{path}: não é um snapshot Open5e')
+    if not isinstance(header.get('version'), int) or header['version'] > SNAPSHOT_VERSION:
+        raise SnapshotError(
+            f'{path}: versão {header.get("version")} não suportada (máximo {SNAPSHOT_VERSION})'
+        )
+    return header
+
+
+def read_snapshot(path):
+    """Cabeçalho + {recurso: [(slug, data)]}, conferindo as contagens"""
+    records = {}
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as stream:
+            header = _check_header(path, json.loads(stream.readline() or 'null'))
+            for line in stream:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                records.setdefault(record['resource'], []).append((record.get('slug'), record['data']))
+    except (OSError, EOFError, ValueError, KeyError) as e:
+        raise SnapshotError(f'{path}: snapshot corrompido ({e})')
+
+    for name, count in header.get('resources', {}).items():
+        if len(records.get(name, ())) != count:
+            raise SnapshotError(
+                f'{path}: {name} tem {len(records.get(name, ()))} registros, cabeçalho diz {count}'
+            )
+    return header, records
+
+
+def load_snapshot(path, resource_names=None, force=False, batch_size=500):
+    """
+    Importa um snapshot para as tabelas do catálogo, sem acessar a rede.
+
+    Cada recurso é gravado em uma transação, em lotes de `batch_size`, e
+    o checkpoint da sincronização recebe os hashes - um sync_open5e
+    posterior só grava o que mudou desde o snapshot. `force` ignora os
+    hashes do checkpoint e regrava todos os registros.
+
+    Retorna {recurso: registros gravados}.
+    """
+    header, records = read_snapshot(path)
+    names = [name for name in resource_names or RESOURCES if name in records]
+
+    loaded = {}
+    changed = {}
+    try:
+        for name in names:
+            resource = RESOURCES[name]
+            existing = existing_slugs(resource)
+            rows = [
+                (slug, data) for slug, data in records[name]
+                if existing is None or slug in existing
+            ]
+            with transaction.atomic():
+                checkpoint, _ = SyncCheckpoint.objects.get_or_create(resource=name)
+                if force:
+                    checkpoint.record_hashes = {}
+                hashes = {}
+                for start in range(0, len(rows), batch_size):
+                    hashes.update(upsert_pairs(
+                        resource, rows[start:start + batch_size], checkpoint.record_hashes
+                    ))
+                checkpoint.record_hashes.update(hashes)
+                checkpoint.pages_done = []
+                checkpoint.records_seen = len(rows)
+                checkpoint.records_changed = len(hashes)
+                checkpoint.completed_at = timezone.now()
+                checkpoint.save()
+            loaded[name] = len(hashes)
+            if hashes:
+                changed[name] = set(hashes)
+    finally:
+        invalidate_caches(changed)
+    return loaded
@@ -0,0 +1,319 @@
+# apps/api_integration/sync.py - Sincronização em lote com a Open5e API
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+import math
+import threading
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from .client import get_client
+from .models import SyncCheckpoint
+
+
+# Resultado de um recurso sincronizado
+SyncResult = namedtuple('SyncResult', ['resource', 'seen', 'changed', 'pages', 'resumed'])
+
+
+class RateLimiter:
+    """
+    Token bucket thread-safe: no máximo `rate` requisições por segundo,
+    com rajadas de até `burst`
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.burst = float(burst or max(1, rate))
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+# ========================================
+# RECURSOS
+# ========================================
+
+def _document_key(data):
+    """Chave do documento de origem (v2: objeto ou URL; v1: document__slug)"""
+    document = data.get('document') or data.get('document__slug') or ''
+    if isinstance(document, dict):
+        return document.get('key', '')
+    return urlsplit(str(document)).path.rstrip('/').rsplit('/', 1)[-1]
+
+
+def record_slugs(data):
+    """
+    Slugs candidatos de um registro. Na v2 as chaves vêm prefixadas pelo
+    documento ('srd_elf'); o slug local usa a forma curta ('elf').
+    """
+    slugs = [data.get('slug'), data.get('key')]
+    document = _document_key(data)
+    key = data.get('key') or ''
+    if document and key.startswith(f'{document}_'):
+        slugs.append(key[len(document) + 1:])
+    return [slug for slug in dict.fromkeys(slugs) if slug]
+
+
+class SyncResource:
+    """
+    Um endpoint de listagem da Open5e e o model que ele alimenta.
+
+    `create_missing=False` só atualiza registros que já existem localmente
+    (raças, classes e backgrounds são curados por populate_basic_data); o
+    catálogo de feitiços aceita registros novos.
+
+    `update_fields` são gravados em todo registro alterado; `optional_fields`
+    só quando `fields(data)` os devolve (ex: bônus de raça fora de `asi`
+    mantêm o valor local, como em `Race.fetch_api_data`).
+    """
+
+    def __init__(self, name, path, model_path, update_fields=('api_data',), create_missing=False,
+                 fields=None, optional_fields=()):
+        self.name = name
+        self.path = path
+        self.model_path = model_path
+        self.update_fields = list(update_fields)
+        self.optional_fields = tuple(optional_fields)
+        self.create_missing = create_missing
+        self._fields = fields or (lambda data: {'name': data.get('name', ''), 'api_data': data})
+
+    @property
+    def model(self):
+        from django.apps import apps
+        return apps.get_model(self.model_path)
+
+    def fields(self, data):
+        return self._fields(data)
+
+
+    def columns(self, fields):
+        """Colunas gravadas no conflito para um registro com estes `fields`"""
+        return tuple(self.update_fields) + tuple(name for name in self.optional_fields if name in fields)
+
+
+def _spell_fields(data):
+    from apps.characters.models import Spell
+    return Spell.parse_api_data(data)
+
+
+def _race_fields(data):
+    from apps.characters.models import Race
+    return {'name': data.get('name', ''), **Race.parse_api_data(data)}
+
+
+def _class_fields(data):
+    from apps.characters.models import CharacterClass
+    return {'name': data.get('name', ''), **CharacterClass.parse_api_data(data)}
+
+
+RESOURCES = {
+    'races': SyncResource(
+        'races', 'v2/races/', 'characters.Race', ['api_data', 'updated_at'],
+        fields=_race_fields,
+        optional_fields=('strength_bonus', 'dexterity_bonus', 'constitution_bonus',
+                         'intelligence_bonus', 'wisdom_bonus', 'charisma_bonus')
+    ),
+    'classes': SyncResource(
+        'classes', 'v1/classes/', 'characters.CharacterClass', ['api_data', 'updated_at'],
+        fields=_class_fields, optional_fields=('hit_die', 'is_spellcaster', 'spellcasting_ability')
+    ),
+    'backgrounds': SyncResource('backgrounds', 'v2/backgrounds/', 'characters.Background'),
+    'spells': SyncResource(
+        'spells', 'v2/spells/', 'characters.Spell',
+        ['name', 'level', 'school', 'classes', 'class_keys', 'description', 'higher_level',
+         'casting_time', 'range', 'components', 'duration', 'concentration', 'ritual',
+         'api_data', 'updated_at'],
+        create_missing=True, fields=_spell_fields
+    ),
+}
+
+
+def existing_slugs(resource):
+    """Slugs locais aceitos pelo recurso (None = aceita registros novos)"""
+    if resource.create_missing:
+        return None
+    return set(resource.model.objects.values_list('slug', flat=True))
+
+
+def upsert_records(resource, records, known_hashes, existing=None):
+    """
+    Grava com um único `bulk_create(update_conflicts=True)` os registros
+    cujo payload mudou em relação a `known_hashes` (slug -> hash).
+
+    Retorna {slug: hash} dos registros gravados.
+    """
+    pairs = []
+    for record in records:
+        slug = next((s for s in record_slugs(record) if existing is None or s in existing), None)
+        if slug is not None:
+            pairs.append((slug, record))
+    return upsert_pairs(resource, pairs, known_hashes)
+
+
+def upsert_pairs(resource, pairs, known_hashes):
+    """Como `upsert_records`, com o slug local já resolvido: [(slug, record)]"""
+    from apps.characters.models import SpellPayload
+
+    model = resource.model
+    objects = {}
+    hashes = {}
+    for slug, record in pairs:
+        content_hash = SpellPayload.hash_data(record)
+        if known_hashes.get(slug) == content_hash:
+            continue
+        fields = resource.fields(record)
+        objects[slug] = (resource.columns(fields), model(slug=slug, **fields))
+        hashes[slug] = content_hash
+
+    # Um bulk_create por conjunto de colunas (normalmente um só)
+    batches = {}
+    for columns, obj in objects.values():
+        batches.setdefault(columns, []).append(obj)
+    for columns, batch in batches.items():
+        model.objects.bulk_create(
+            batch, update_conflicts=True, unique_fields=['slug'], update_fields=list(columns)
+        )
+    return hashes
+
+
+def invalidate_caches(changed):
+    """
+    bulk_create não dispara signals: faz o que eles fariam para os
+    registros alterados ({recurso: slugs}) - troca as versões de cache e
+    recalcula as estatísticas derivadas dos personagens das raças/classes
+    """
+    from apps.characters.cache import bump_version, REFERENCE_NAMESPACE, SPELL_NAMESPACE
+    from apps.characters.models import Character, refresh_derived_stats
+    from apps.characters.spell_index import invalidate_spell_index
+
+    if set(changed) & {'races', 'classes', 'backgrounds'}:
+        bump_version(REFERENCE_NAMESPACE)
+    if 'spells' in changed:
+        bump_version(SPELL_NAMESPACE)
+        invalidate_spell_index()
+
+    for name, lookup in (('races', 'race__slug__in'), ('classes', 'character_class__slug__in')):
+        if changed.get(name):
+            refresh_derived_stats(Character.objects.filter(**{lookup: changed[name]}))
+
+
+# ========================================
+# ENGINE
+# ========================================
+
+class Open5eSyncEngine:
+    """
+    Baixa as páginas de listagem em paralelo (limitadas por `rate`
+    requisições/s) e grava cada página com um único
+    `bulk_create(update_conflicts=True)`.
+
+    As requisições rodam em threads; toda escrita no banco acontece na
+    thread principal, página a página, junto com o checkpoint - uma
+    execução interrompida retoma das páginas que faltam.
+    """
+
+    def __init__(self, client=None, workers=4, rate=5.0, page_size=100, log=None):
+        self.client = client or get_client()
+        self.workers = max(1, workers)
+        self.limiter = RateLimiter(rate, burst=workers)
+        self.page_size = page_size
+        self.log = log or (lambda message: None)
+        self._changed = {}
+
+    def sync(self, resource_names=None, force=False):
+        """Sincroniza os recursos pedidos (todos por padrão) e invalida os caches"""
+        self._changed = {}
+        try:
+            return [
+                self.sync_resource(RESOURCES[name], force=force)
+                for name in resource_names or RESOURCES
+            ]
+        finally:
+            # Também após uma falha: as páginas já gravadas precisam aparecer
+            self._invalidate_caches(self._changed)
+
+    def sync_resource(self, resource, force=False):
+        checkpoint, _ = SyncCheckpoint.objects.get_or_create(resource=resource.name)
+        resumed = checkpoint.in_progress and not force
+        if not resumed:
+            checkpoint.pages_done = []
+            checkpoint.records_seen = 0
+            checkpoint.records_changed = 0
+            checkpoint.started_at = timezone.now()
+        if force:
+            checkpoint.record_hashes = {}
+
+        existing = existing_slugs(resource)
+
+        # A primeira página informa o total e define quantas páginas buscar
+        first = self._fetch_page(resource, 1)
+        checkpoint.total_pages = max(1, math.ceil((first.get('count') or 0) / self.page_size))
+        checkpoint.save()
+        self.log(f'{resource.name}: {first.get("count", 0)} registros em {checkpoint.total_pages} páginas'
+                 + (' (retomando)' if resumed else ''))
+
+        done = set(checkpoint.pages_done)
+        if 1 not in done:
+            self._store_page(resource, checkpoint, 1, first, existing)
+
+        pending = [page for page in range(2, checkpoint.total_pages + 1) if page not in done]
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='open5e-sync') as executor:
+            futures = {executor.submit(self._fetch_page, resource, page): page for page in pending}
+            try:
+                for future in as_completed(futures):
+                    self._store_page(resource, checkpoint, futures[future], future.result(), existing)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        checkpoint.pages_done = []
+        checkpoint.completed_at = timezone.now()
+        checkpoint.save()
+        return SyncResult(
+            resource.name, checkpoint.records_seen, checkpoint.records_changed,
+            checkpoint.total_pages, resumed
+        )
+
+    def _fetch_page(self, resource, page):
+        self.limiter.acquire()
+        return self.client.get(resource.path, params={'limit': self.page_size, 'page': page})
+
+    def _store_page(self, resource, checkpoint, page, data, existing):
+        """Grava os registros alterados de uma página e avança o checkpoint"""
+        records = data.get('results', [])
+
+        with transaction.atomic():
+            hashes = upsert_records(resource, records, checkpoint.record_hashes, existing)
+            checkpoint.record_hashes.update(hashes)
+            checkpoint.pages_done = sorted(set(checkpoint.pages_done) | {page})
+            checkpoint.records_seen += len(records)
+            checkpoint.records_changed += len(hashes)
+            checkpoint.save()
+
+        if hashes:
+            self._changed.setdefault(resource.name, set()).update(hashes)
+        self.log(f'  {resource.name} página {page}: {len(hashes)}/{len(records)} alterados')
+
+    @staticmethod
+    def _invalidate_caches(changed):
+        invalidate_caches(changed)
@@ -1,3 +1,492 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.characters.models import Character, CharacterClass, Race, Spell
+from apps.characters.search import get_search_backend
+from .client import (
+    CircuitBreaker, CircuitOpenError, Open5eClient, Open5eError, SingleFlight, reset_client
+)
+from .fake_server import FakeOpen5eApp, FakeOpen5eServer
+from .models import SyncCheckpoint
+from .snapshot import export_snapshot, load_snapshot, SnapshotError, SNAPSHOT_VERSION
+from .sync import Open5eSyncEngine, RateLimiter
+
+
+def fake_response(status_code, data=None, headers=None):
+    response = mock.Mock(status_code=status_code, headers=headers or {})
+    response.json.return_value = data
+    return response
+
+
+class Open5eClientTests(SimpleTestCase):
+
+    def setUp(self):
+        self.client = Open5eClient(base_url='https://open5e.test/', backoff=0, max_retries=2)
+        patcher = mock.patch.object(self.client.session, 'get')
+        self.session_get = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_retries_temporary_failures(self):
+        self.session_get.side_effect = [fake_response(503), fake_response(200, {'name': 'Fireball'})]
+
+        data = self.client.get('v2/spells/fireball/')
+
+        self.assertEqual(data, {'name': 'Fireball'})
+        self.assertEqual(self.session_get.call_args[0][0], 'https://open5e.test/v2/spells/fireball/')
+        metrics = self.client.metrics()['open5e.test']
+        self.assertEqual((metrics['requests'], metrics['retries'], metrics['errors']), (2, 1, 0))
+
+    def test_not_found_is_not_retried(self):
+        self.session_get.return_value = fake_response(404)
+
+        with self.assertRaises(Open5eError) as ctx:
+            self.client.get('v2/spells/missing/')
+
+        self.assertTrue(ctx.exception.is_not_found)
+        self.assertEqual(self.session_get.call_count, 1)
+
+    def test_gives_up_after_max_retries(self):
+        self.session_get.return_value = fake_response(502)
+
+        with self.assertRaises(Open5eError) as ctx:
+            self.client.get('v2/spells/')
+
+        self.assertEqual(ctx.exception.status_code, 502)
+        self.assertEqual(self.session_get.call_count, 3)
+
+    def test_iter_pages_follows_next(self):
+        self.session_get.side_effect = [
+            fake_response(200, {'results': [1], 'next': 'https://open5e.test/v2/spells/?page=2'}),
+            fake_response(200, {'results': [2], 'next': None}),
+        ]
+
+        pages = list(self.client.iter_pages('v2/spells/', params={'limit': 1}))
+
+        self.assertEqual([page['results'] for page in pages], [[1], [2]])
+        self.assertIsNone(self.session_get.call_args[1]['params'])
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = Open5eClient(
+            base_url='https://open5e.test/', backoff=0, max_retries=0,
+            failure_threshold=2, reset_timeout=60, cache_ttl=60
+        )
+        self.addCleanup(self.client.close)
+        patcher = mock.patch.object(self.client.session, 'get')
+        self.session_get = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_opens_after_consecutive_failures(self):
+        self.session_get.return_value = fake_response(503)
+
+        for _ in range(2):
+            with self.assertRaises(Open5eError):
+                self.client.get('v2/spells/')
+        with self.assertRaises(CircuitOpenError):
+            self.client.get('v2/spells/')
+
+        self.assertEqual(self.session_get.call_count, 2)
+        self.assertEqual(self.client.metrics()['open5e.test']['short_circuited'], 1)
+
+    def test_half_open_trial_closes_circuit(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+        breaker.record_failure()
+        self.assertFalse(breaker.allow_request())
+
+        now[0] = 10.0
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())  # só uma chamada de teste
+        breaker.record_success()
+
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_serves_stale_payload_when_circuit_is_open(self):
+        self.session_get.return_value = fake_response(200, {'name': 'Fireball'})
+        self.assertEqual(self.client.get_cached('v2/spells/fireball/'), ({'name': 'Fireball'}, False))
+
+        # Entrada vence e a Open5e cai
+        entry = cache.get('open5e:https://open5e.test/v2/spells/fireball/')
+        entry['fetched_at'] -= 120
+        cache.set('open5e:https://open5e.test/v2/spells/fireball/', entry)
+        self.session_get.return_value = fake_response(503)
+        for _ in range(2):
+            with self.assertRaises(Open5eError):
+                self.client.get('v2/spells/')
+
+        start = time.perf_counter()
+        payload = self.client.get_cached('v2/spells/fireball/')
+
+        self.assertEqual(payload, ({'name': 'Fireball'}, True))
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_stale_entry_is_revalidated_in_background(self):
+        cache.set('open5e:https://open5e.test/v2/spells/fireball/',
+                  {'data': {'name': 'Old'}, 'fetched_at': time.time() - 120})
+        self.session_get.return_value = fake_response(200, {'name': 'Fireball'})
+
+        self.assertEqual(self.client.get_cached('v2/spells/fireball/'), ({'name': 'Old'}, True))
+        self.client.refresh_in_background('v2/spells/fireball/').result(timeout=5)
+
+        self.assertEqual(self.client.get_cached('v2/spells/fireball/'), ({'name': 'Fireball'}, False))
+
+
+class SingleFlightTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = Open5eClient(base_url='https://open5e.test/', backoff=0, max_retries=0, lock_poll=0.01)
+        self.addCleanup(self.client.close)
+        patcher = mock.patch.object(self.client.session, 'get')
+        self.session_get = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_concurrently(self, fn, count=5):
+        results = [None] * count
+
+        def target(i):
+            try:
+                results[i] = fn()
+            except Exception as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads, results
+
+    def test_concurrent_identical_gets_share_one_request(self):
+        release = threading.Event()
+
+        def slow_get(*args, **kwargs):
+            release.wait(5)
+            return fake_response(200, {'name': 'Fireball'})
+
+        self.session_get.side_effect = slow_get
+        threads, results = self.run_concurrently(lambda: self.client.get('v2/spells/fireball/'))
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [{'name': 'Fireball'}] * 5)
+        self.assertEqual(self.session_get.call_count, 1)
+        self.assertEqual(self.client.metrics()['open5e.test']['coalesced'], 4)
+
+    def test_failure_is_shared_with_waiting_callers(self):
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def failing():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            raise Open5eError('Open5e respondeu 503', 503)
+
+        threads, results = self.run_concurrently(lambda: flight.do('key', failing)[0], count=3)
+        started.wait(5)
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(isinstance(result, Open5eError) for result in results))
+        self.assertEqual(flight.in_flight(), set())
+
+    def test_waits_for_entry_fetched_by_another_worker(self):
+        key = 'open5e:https://open5e.test/v2/spells/fireball/'
+        cache.add(f'{key}:lock', 'outro-worker')
+        threading.Timer(0.05, cache.set, [key, {'data': {'name': 'Fireball'}, 'fetched_at': time.time()}]).start()
+
+        payload = self.client.get_cached('v2/spells/fireball/')
+
+        self.assertEqual(payload, ({'name': 'Fireball'}, False))
+        self.session_get.assert_not_called()
+
+    def test_fetches_itself_when_lock_owner_gives_up(self):
+        key = 'open5e:https://open5e.test/v2/spells/fireball/'
+        cache.add(f'{key}:lock', 'outro-worker')
+        threading.Timer(0.05, cache.delete, [f'{key}:lock']).start()
+        self.session_get.return_value = fake_response(200, {'name': 'Fireball'})
+
+        payload = self.client.get_cached('v2/spells/fireball/')
+
+        self.assertEqual(payload, ({'name': 'Fireball'}, False))
+        self.assertEqual(self.session_get.call_count, 1)
+        self.assertIsNone(cache.get(f'{key}:lock'))
+
+
+class FakeListClient:
+    """Cliente Open5e em memória: {path: [registros]} paginados por limit/page"""
+
+    def __init__(self, data, fail_pages=()):
+        self.data = data
+        self.fail_pages = set(fail_pages)
+        self.calls = []
+
+    def get(self, path, params=None):
+        page, limit = params['page'], params['limit']
+        self.calls.append((path, page))
+        if (path, page) in self.fail_pages:
+            self.fail_pages.discard((path, page))
+            raise Open5eError('Open5e respondeu 503', 503)
+        records = self.data.get(path, [])
+        return {'count': len(records), 'results': records[(page - 1) * limit:page * limit]}
+
+
+def spell_record(number):
+    return {'key': f'spell-{number}', 'name': f'Spell {number}', 'level': number % 10,
+            'school': {'name': 'Evocation'}, 'classes': [{'name': 'Wizard'}]}
+
+
+class SyncEngineTests(TestCase):
+
+    def setUp(self):
+        self.spells = [spell_record(n) for n in range(5)]
+        self.client = FakeListClient({'v2/spells/': self.spells})
+
+    def engine(self, client=None):
+        return Open5eSyncEngine(client=client or self.client, workers=2, rate=0, page_size=2)
+
+    def test_pages_are_bulk_upserted_and_checkpointed(self):
+        [result] = self.engine().sync(['spells'])
+
+        self.assertEqual((result.seen, result.changed, result.pages), (5, 5, 3))
+        self.assertEqual(Spell.objects.count(), 5)
+        self.assertEqual(Spell.objects.get(slug='spell-3').class_keys, ',wizard,')
+        checkpoint = SyncCheckpoint.objects.get(resource='spells')
+        self.assertFalse(checkpoint.in_progress)
+        self.assertEqual(len(checkpoint.record_hashes), 5)
+
+    def test_rerun_only_touches_changed_records(self):
+        self.engine().sync(['spells'])
+        self.spells[4] = dict(self.spells[4], name='Renamed')
+
+        [result] = self.engine().sync(['spells'])
+
+        self.assertEqual(result.changed, 1)
+        self.assertEqual(Spell.objects.get(slug='spell-4').name, 'Renamed')
+        # Upsert também atualiza o índice de busca textual
+        hits, total = get_search_backend().search('renamed')
+        self.assertEqual(total, 1)
+
+    def test_interrupted_run_resumes_from_checkpoint(self):
+        failing = FakeListClient({'v2/spells/': self.spells}, fail_pages={('v2/spells/', 3)})
+        with self.assertRaises(Open5eError):
+            self.engine(failing).sync(['spells'])
+        self.assertTrue(SyncCheckpoint.objects.get(resource='spells').in_progress)
+
+        [result] = self.engine(failing).sync(['spells'])
+
+        self.assertTrue(result.resumed)
+        self.assertEqual(Spell.objects.count(), 5)
+        # Segunda execução: página 1 (contagem) e a página que faltava
+        self.assertEqual(failing.calls[-2:], [('v2/spells/', 1), ('v2/spells/', 3)])
+
+    def test_reference_data_only_updates_existing_records(self):
+        Race.objects.create(slug='elf', name='Elf', dexterity_bonus=2)
+        client = FakeListClient({'v2/races/': [
+            {'key': 'srd_elf', 'name': 'Elf', 'document': 'https://api.open5e.com/v2/documents/srd/'},
+            {'key': 'srd_orc', 'name': 'Orc', 'document': 'https://api.open5e.com/v2/documents/srd/'},
+        ]})
+
+        [result] = self.engine(client).sync(['races'])
+
+        self.assertEqual(result.changed, 1)
+        elf = Race.objects.get(slug='elf')
+        self.assertEqual(elf.api_data['key'], 'srd_elf')
+        self.assertEqual(elf.dexterity_bonus, 2)
+        self.assertFalse(Race.objects.filter(slug__contains='orc').exists())
+
+    def test_reference_columns_are_derived_from_payload(self):
+        Race.objects.create(slug='dwarf', name='Dwarf', constitution_bonus=1, wisdom_bonus=1)
+        CharacterClass.objects.create(slug='cleric', name='Cleric', hit_die=6)
+        client = FakeListClient({
+            'v2/races/': [{'key': 'dwarf', 'name': 'Dwarf', 'asi': [
+                {'attributes': ['Constitution'], 'value': 2},
+                {'attributes': ['Strength'], 'value': 2},
+            ]}],
+            'v1/classes/': [{'slug': 'cleric', 'name': 'Cleric', 'hit_die': 8, 'spellcasting': {
+                'spellcasting_ability': {'index': 'wis'},
+            }}],
+        })
+
+        self.engine(client).sync(['races', 'classes'])
+
+        dwarf = Race.objects.get(slug='dwarf')
+        self.assertEqual((dwarf.constitution_bonus, dwarf.strength_bonus), (2, 2))
+        # Fora de `asi`: mantém o valor local
+        self.assertEqual(dwarf.wisdom_bonus, 1)
+        cleric = CharacterClass.objects.get(slug='cleric')
+        self.assertEqual((cleric.hit_die, cleric.is_spellcaster, cleric.spellcasting_ability), (8, True, 'wis'))
+
+    def test_synced_reference_changes_refresh_character_stats(self):
+        race = Race.objects.create(slug='elf', name='Elf')
+        cleric = CharacterClass.objects.create(slug='cleric', name='Cleric')
+        character = Character.objects.create(
+            user=User.objects.create_user(username='sync'), name='Tharivol',
+            race=race, character_class=cleric, base_dexterity=14, base_wisdom=14, level=5
+        )
+        self.assertEqual((character.armor_class, character.spell_save_dc), (12, None))
+        client = FakeListClient({
+            'v2/races/': [{'key': 'elf', 'name': 'Elf', 'asi': [{'attributes': ['Dexterity'], 'value': 2}]}],
+            'v1/classes/': [{'slug': 'cleric', 'name': 'Cleric', 'spellcasting': {
+                'spellcasting_ability': {'index': 'wisdom'},
+            }}],
+        })
+
+        self.engine(client).sync(['races', 'classes'])
+
+        # DEX 16 -> +3; WIS 14 -> +2, proficiência +3 no nível 5
+        character.refresh_from_db()
+        self.assertEqual((character.armor_class, character.spell_save_dc), (13, 13))
+
+
+class SnapshotTests(TestCase):
+
+    def setUp(self):
+        Open5eSyncEngine(
+            client=FakeListClient({'v2/spells/': [spell_record(n) for n in range(3)]}),
+            workers=1, rate=0
+        ).sync(['spells'])
+        handle, self.path = tempfile.mkstemp(suffix='.ndjson.gz')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def test_export_then_load_restores_catalog_offline(self):
+        counts = export_snapshot(self.path, ['spells'])
+        self.assertEqual(counts, {'spells': 3})
+        Spell.objects.all().delete()
+        SyncCheckpoint.objects.all().delete()
+
+        with mock.patch('apps.api_integration.sync.get_client') as get_client:
+            loaded = load_snapshot(self.path)
+        get_client.assert_not_called()
+
+        self.assertEqual(loaded, {'spells': 3})
+        self.assertEqual(Spell.objects.get(slug='spell-2').class_keys, ',wizard,')
+        self.assertEqual(len(SyncCheckpoint.objects.get(resource='spells').record_hashes), 3)
+        hits, total = get_search_backend().search('spell')
+        self.assertEqual(total, 3)
+
+    def test_reload_skips_unchanged_records(self):
+        export_snapshot(self.path, ['spells'])
+
+        self.assertEqual(load_snapshot(self.path), {'spells': 0})
+        self.assertEqual(load_snapshot(self.path, force=True), {'spells': 3})
+
+    def write(self, lines):
+        with gzip.open(self.path, 'wt', encoding='utf-8') as stream:
+            stream.writelines(json.dumps(line) + '\n' for line in lines)
+
+    def test_rejects_newer_format_version(self):
+        self.write([{'format': 'open5e-snapshot', 'version': SNAPSHOT_VERSION + 1, 'resources': {}}])
+        with self.assertRaises(SnapshotError):
+            load_snapshot(self.path)
+
+    def test_rejects_truncated_snapshot(self):
+        self.write([
+            {'format': 'open5e-snapshot', 'version': SNAPSHOT_VERSION, 'resources': {'spells': 2}},
+            {'resource': 'spells', 'slug': 'spell-9', 'data': spell_record(9)},
+        ])
+        with self.assertRaises(SnapshotError):
+            load_snapshot(self.path)
+        self.assertFalse(Spell.objects.filter(slug='spell-9').exists())
+
+
+class FakeOpen5eServerTests(TestCase):
+    """Cliente, sync e models contra o servidor falso, via HTTP de verdade"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.app = FakeOpen5eApp(page_size=2)
+        cls.server = FakeOpen5eServer(cls.app).start()
+        cls.addClassCleanup(cls.server.stop)
+
+    def setUp(self):
+        self.app.reset()
+        self.app.latency = 0
+        cache.clear()
+        self.client = Open5eClient(base_url=self.server.url, backoff=0, max_retries=2)
+        self.addCleanup(self.client.close)
+
+    def test_detail_resolves_document_prefixed_keys(self):
+        self.assertEqual(self.client.get('v2/spells/fireball/')['name'], 'Fireball')
+        with self.assertRaises(Open5eError) as ctx:
+            self.client.get('v2/spells/wish/')
+        self.assertTrue(ctx.exception.is_not_found)
+
+    def test_pagination_follows_next_links(self):
+        names = [spell['name'] for page in self.client.iter_pages('v2/spells/') for spell in page['results']]
+
+        self.assertEqual(len(names), 4)
+        self.assertEqual(self.app.requests.count('v2/spells'), 2)
+
+    def test_request_log_is_bounded(self):
+        app = FakeOpen5eApp(request_log_size=2)
+        for path in ('v2/spells/', 'v2/races/', 'v2/spells/shield/'):
+            app({'PATH_INFO': f'/{path}'}, lambda status, headers: None)
+
+        self.assertEqual(list(app.requests), ['v2/races', 'v2/spells/shield'])
+        self.assertEqual(app.stats()['requests'], 3)
+
+    def test_injected_failures_are_retried(self):
+        self.app.fail_next(2, status=503, retry_after=0)
+
+        self.assertEqual(self.client.get('v2/spells/shield/')['name'], 'Shield')
+        self.assertEqual(self.client.metrics()[f'127.0.0.1:{self.server.port}']['retries'], 2)
+
+    def test_slow_upstream_times_out(self):
+        self.app.latency = 0.3
+
+        with self.assertRaises(Open5eError) as ctx:
+            self.client.get('v2/spells/shield/', timeout=0.05)
+        self.assertTrue(ctx.exception.is_upstream_failure)
+
+    def test_model_fetch_uses_configured_base_url(self):
+        race = Race.objects.create(slug='elf', name='Elf')
+        with override_settings(OPEN5E_BASE_URL=self.server.url):
+            reset_client()
+            self.addCleanup(reset_client)
+            self.assertTrue(race.fetch_api_data())
+
+        race.refresh_from_db()
+        self.assertEqual(race.api_data['key'], 'srd_elf')
+
+    def test_sync_engine_against_fake_server(self):
+        [result] = Open5eSyncEngine(client=self.client, workers=2, rate=0, page_size=2).sync(['spells'])
+
+        self.assertEqual((result.seen, result.pages), (4, 2))
+        self.assertEqual(Spell.objects.get(slug='srd_fireball').level, 3)
+
+
+class RateLimiterTests(SimpleTestCase):
+
+    def test_waits_when_bucket_is_empty(self):
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        limiter = RateLimiter(rate=2, burst=1, clock=lambda: now[0], sleep=sleep)
+        for _ in range(3):
+            limiter.acquire()
+
+        self.assertEqual(sleeps, [0.5, 0.5])
@@ -1,13 +1,13 @@
 # apps/characters/admin.py - Configuração do Django Admin
 
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from .models import (
     Race, CharacterClass, ClassLevelProgression, Background, 
     Character, CharacterSpell, Equipment, CharacterEquipment,
-    Campaign, CampaignCharacter
+    Campaign, CampaignCharacter, Spell, SpellPayload
 )
 
 
@@ -189,6 +189,8 @@ class CharacterAdmin(admin.ModelAdmin):
         'character_class', 'race', 'level', 'character_class__is_spellcaster'
     ]
     search_fields = ['name', 'user__username', 'character_class__name', 'race__name']
+    # Evita o COUNT(*) da tabela inteira ao filtrar/buscar
+    show_full_result_count = False
     readonly_fields = [
         'created_at', 'updated_at', 'get_calculated_stats', 'get_modifiers',
         'max_hp', 'proficiency_bonus', 'armor_class', 'spell_save_dc'
@@ -257,6 +259,7 @@ class CharacterAdmin(admin.ModelAdmin):
     def get_ac(self, obj):
         return obj.armor_class
     get_ac.short_description = "AC"
+    get_ac.admin_order_field = 'armor_class'
     
     def is_spellcaster(self, obj):
         return "✅" if obj.character_class.is_spellcaster else "❌"
@@ -317,7 +320,7 @@ class CharacterSpellAdmin(admin.ModelAdmin):
     list_display = ['character', 'spell_name', 'spell_level', 'is_prepared', 'is_known']
     list_filter = ['spell_level', 'is_prepared', 'is_known', 'character__character_class']
     search_fields = ['spell_name', 'spell_slug', 'character__name']
-    readonly_fields = ['created_at', 'api_data']
+    readonly_fields = ['created_at', 'payload']
     
     fieldsets = (
         ('Basic Info', {
@@ -327,7 +330,7 @@ class CharacterSpellAdmin(admin.ModelAdmin):
             'fields': ('is_prepared', 'is_known')
         }),
         ('API Data', {
-            'fields': ('api_data',),
+            'fields': ('payload',),
             'classes': ('collapse',)
         })
     )
@@ -336,13 +339,36 @@ class CharacterSpellAdmin(admin.ModelAdmin):
     
     def fetch_spell_data(self, request, queryset):
         updated = 0
+        stale = 0
         for spell in queryset:
             if spell.fetch_spell_data():
                 updated += 1
-        self.message_user(request, f"{updated} spells updated from API")
+                stale += spell.api_data_stale
+        message = f"{updated} spells updated from API"
+        if stale:
+            # Open5e fora: parte dos dados veio do cache antigo
+            message += f" ({stale} from stale cache, Open5e unavailable)"
+            self.message_user(request, message, messages.WARNING)
+        else:
+            self.message_user(request, message)
     fetch_spell_data.short_description = "Fetch spell data from Open5e API"
 
 
+@admin.register(Spell)
+class SpellAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug', 'level', 'school', 'concentration', 'ritual', 'updated_at']
+    list_filter = ['level', 'school', 'concentration', 'ritual']
+    search_fields = ['name', 'slug']
+    readonly_fields = ['created_at', 'updated_at', 'api_data']
+
+
+@admin.register(SpellPayload)
+class SpellPayloadAdmin(admin.ModelAdmin):
+    list_display = ['slug', 'content_hash', 'created_at']
+    search_fields = ['slug', 'content_hash']
+    readonly_fields = ['content_hash', 'slug', 'data', 'created_at']
+
+
 @admin.register(Equipment)
 class EquipmentAdmin(admin.ModelAdmin):
     list_display = ['name', 'equipment_type', 'cost', 'weight']
@@ -356,6 +382,7 @@ class CampaignAdmin(admin.ModelAdmin):
     list_filter = ['starting_level', 'max_level', 'allow_multiclass']
     search_fields = ['name', 'dm__username']
     filter_horizontal = ['players']
+    show_full_result_count = False
     
     def get_player_count(self, obj):
         return obj.players.count()
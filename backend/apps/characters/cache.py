@@ -0,0 +1,147 @@
+# apps/characters/cache.py - Cache versionado para dados de referência
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.response import Response
+
+
+# Namespace de raças, classes, progressões e backgrounds
+REFERENCE_NAMESPACE = 'reference'
+
+# Namespace do catálogo local de feitiços (autocomplete)
+SPELL_NAMESPACE = 'spells'
+
+
+def _version_key(namespace):
+    return f'version:{namespace}'
+
+
+def _modified_key(namespace):
+    return f'modified:{namespace}'
+
+
+def get_version(namespace):
+    """Versão atual de um namespace (começa em 1, nunca expira)"""
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), 1, timeout=None)
+        version = cache.get(_version_key(namespace), 1)
+    return version
+
+
+class ThrottledVersion:
+    """
+    Versão de um namespace para estruturas em memória do processo,
+    consultada no cache (uma ida ao Redis) no máximo uma vez a cada
+    `settings.<interval_setting>` segundos (0 = toda chamada).
+
+    Alterações vindas de outros workers aparecem em até um intervalo; as
+    do próprio processo devem chamar `reset()` (via signals).
+    """
+
+    def __init__(self, namespace, interval_setting, default_interval=5):
+        self.namespace = namespace
+        self.interval_setting = interval_setting
+        self.default_interval = default_interval
+        self._version = None
+        self._checked_at = 0.0
+
+    def interval(self):
+        return getattr(settings, self.interval_setting, self.default_interval)
+
+    def get(self):
+        version = self._version
+        now = time.monotonic()
+        if version is not None and now - self._checked_at < self.interval():
+            return version
+        version = get_version(self.namespace)
+        self._version, self._checked_at = version, now
+        return version
+
+    def reset(self):
+        """A próxima chamada de `get()` consulta o cache"""
+        self._version = None
+        self._checked_at = 0.0
+
+
+def get_last_modified(namespace):
+    """Momento da última troca de versão do namespace (None se desconhecido)"""
+    return cache.get(_modified_key(namespace))
+
+
+def bump_version(namespace):
+    """Invalida todas as entradas do namespace trocando a versão"""
+    cache.set(_modified_key(namespace), timezone.now(), timeout=None)
+    try:
+        return cache.incr(_version_key(namespace))
+    except ValueError:
+        # Chave ainda não existe (ou foi removida do cache)
+        cache.set(_version_key(namespace), 2, timeout=None)
+        return 2
+
+
+def invalidate_reference_cache(**kwargs):
+    """Receiver de signals: descarta o cache de dados de referência"""
+    bump_version(REFERENCE_NAMESPACE)
+
+
+def invalidate_spell_catalog(**kwargs):
+    """Receiver de signals: o índice de autocomplete é reconstruído"""
+    bump_version(SPELL_NAMESPACE)
+
+
+def versioned_key(namespace, key):
+    """Monta a chave final com a versão corrente do namespace"""
+    digest = hashlib.md5(key.encode('utf-8')).hexdigest()
+    return f'{namespace}:v{get_version(namespace)}:{digest}'
+
+
+def get_or_build(namespace, key, builder, timeout=None):
+    """
+    Retorna os dados em cache ou chama `builder()` e guarda o resultado.
+    `builder` deve retornar dados já serializados (dict/list).
+    """
+    cache_key = versioned_key(namespace, key)
+    data = cache.get(cache_key)
+    if data is None:
+        data = builder()
+        cache.set(cache_key, data, timeout)
+    return data
+
+
+class ReferenceCacheMixin:
+    """
+    Cacheia list/retrieve de ViewSets de dados de referência.
+
+    Um hit devolve o JSON já serializado: não toca no ORM nem nos
+    serializers do DRF. A chave inclui a URL completa (paginação,
+    filtros e busca) e a versão do namespace.
+    """
+    cache_namespace = REFERENCE_NAMESPACE
+
+    def _cached_response(self, request, build_response):
+        key = f'{type(self).__name__}:{request.build_absolute_uri()}'
+        cache_key = versioned_key(self.cache_namespace, key)
+
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response(data)
+
+        response = build_response()
+        if response.status_code == 200:
+            cache.set(cache_key, response.data)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(
+            request, lambda: super(ReferenceCacheMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(
+            request, lambda: super(ReferenceCacheMixin, self).retrieve(request, *args, **kwargs)
+        )
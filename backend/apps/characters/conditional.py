@@ -0,0 +1,140 @@
+# apps/characters/conditional.py - Conditional GET (ETag / Last-Modified)
+
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from .cache import REFERENCE_NAMESPACE, get_version, get_last_modified
+
+
+def _latest(*datetimes):
+    """Maior datetime entre os informados, ignorando None"""
+    values = [value for value in datetimes if value is not None]
+    return max(values) if values else None
+
+
+def _weak_etag(*parts):
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'W/"{digest}"'
+
+
+class ConditionalGetMixin:
+    """
+    Emite ETag e Last-Modified em list/retrieve e responde 304 quando o
+    cliente já tem a versão atual.
+
+    Os validadores vêm de `get_list_validators` / `get_detail_validators`,
+    que devem ser baratos (versões em cache, `updated_at`, agregados) -
+    nunca serializar o corpo da resposta.
+    """
+
+    def get_list_validators(self, request):
+        """Retorna (etag_parts, last_modified) ou (None, None)"""
+        return None, None
+
+    def get_detail_validators(self, request):
+        """Retorna (etag_parts, last_modified) ou (None, None)"""
+        return None, None
+
+    def _conditional_response(self, request, validators, build_response):
+        etag_parts, last_modified = validators(request)
+
+        etag = None
+        if etag_parts is not None:
+            # O formato negociado (json, api, ...) faz parte da representação
+            etag = quote_etag(_weak_etag(request.accepted_renderer.format, *etag_parts))
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = build_response()
+
+        if response.status_code in (200, 304):
+            if timestamp and not response.has_header('Last-Modified'):
+                response.headers['Last-Modified'] = http_date(timestamp)
+            if etag:
+                response.headers.setdefault('ETag', etag)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional_response(
+            request, self.get_list_validators,
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional_response(
+            request, self.get_detail_validators,
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        )
+
+
+class ReferenceConditionalGetMixin(ConditionalGetMixin):
+    """
+    Validadores de dados de referência a partir da versão do namespace no
+    cache. A listagem não faz nenhuma query; o detalhe só confere se o
+    objeto existe.
+    """
+
+    def get_detail_validators(self, request):
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        try:
+            exists = self.get_queryset().filter(**{self.lookup_field: lookup}).exists()
+        except (ValueError, TypeError, ValidationError):
+            exists = False
+
+        if not exists:
+            return None, None  # deixa o fluxo normal responder 404
+
+        return (
+            ('reference', lookup, get_version(REFERENCE_NAMESPACE)),
+            get_last_modified(REFERENCE_NAMESPACE)
+        )
+
+    def get_list_validators(self, request):
+        return (
+            ('reference', get_version(REFERENCE_NAMESPACE)),
+            get_last_modified(REFERENCE_NAMESPACE)
+        )
+
+
+class CharacterConditionalGetMixin(ConditionalGetMixin):
+    """
+    Validadores de personagens a partir de `version` e `updated_at`.
+
+    O detalhe também embute raça/classe/background, então a versão dos
+    dados de referência entra no ETag.
+    """
+
+    def get_detail_validators(self, request):
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        try:
+            row = self.get_queryset().model.objects.filter(
+                user=request.user, pk=lookup
+            ).order_by().values_list('version', 'updated_at')[:1]
+            row = row[0] if row else None
+        except (ValueError, TypeError, ValidationError):
+            row = None
+
+        if row is None:
+            return None, None  # deixa o fluxo normal responder 404
+
+        version, updated_at = row
+        return (
+            ('character', lookup, version, get_version(REFERENCE_NAMESPACE)),
+            _latest(updated_at, get_last_modified(REFERENCE_NAMESPACE))
+        )
+
+    def get_list_validators(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        summary = queryset.order_by().aggregate(
+            total=Count('id'), versions=Sum('version'), updated_at=Max('updated_at')
+        )
+        return (
+            ('characters', request.user.pk, summary['total'], summary['versions'],
+             summary['updated_at'], get_version(REFERENCE_NAMESPACE)),
+            _latest(summary['updated_at'], get_last_modified(REFERENCE_NAMESPACE))
+        )
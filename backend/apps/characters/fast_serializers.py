@@ -0,0 +1,318 @@
+# apps/characters/fast_serializers.py - Serialização rápida (somente leitura) de personagens
+
+"""
+Caminho rápido para as leituras mais frequentes (listagem e detalhe de
+personagens): funções simples alimentadas por `.values()`, sem a
+introspecção de campos do ModelSerializer nem o despacho de
+SerializerMethodField.
+
+A saída é idêntica, byte a byte, à de CharacterListSerializer e
+CharacterDetailSerializer - mesma ordem de chaves e mesmos valores -
+garantido pelos testes de paridade (`FastSerializerParityTests`).
+Alterou um desses serializers? Altere as funções daqui também.
+
+No detalhe, raça, classe, background e usuário vêm no mesmo JOIN do
+personagem (como o select_related da view). Na listagem eles são
+buscados uma vez por página (uma query `pk__in` por tabela) e o dict
+serializado é reaproveitado por todos os personagens.
+"""
+
+from rest_framework import serializers
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+from django.contrib.auth.models import User
+
+from .fieldsets import request_fieldset
+from .models import Race, CharacterClass, Background, Character, CharacterSpell
+from .progression import get_progression_table, EMPTY_SPELL_SLOTS, SPELL_LEVELS
+
+
+ABILITIES = Character.ABILITIES
+
+CHARACTER_LIST_FIELDS = (
+    'id', 'name', 'user_id', 'race_id', 'character_class_id', 'background_id',
+    'level', 'current_hp', 'max_hp', 'created_at', 'updated_at'
+)
+
+# DateTimeField do DRF: mesmo fuso e formato (ISO 8601, 'Z' em UTC)
+_datetime = serializers.DateTimeField()
+_SPELL_SLOTS_DISPLAY = dict(CharacterClass.SPELL_SLOTS_CHOICES)
+
+
+def _dt(value):
+    return _datetime.to_representation(value)
+
+
+# ========================================
+# DADOS DE REFERÊNCIA
+# ========================================
+
+def _user(row):
+    return {
+        'id': row['id'],
+        'username': row['username'],
+        'email': row['email'],
+        'first_name': row['first_name'],
+        'last_name': row['last_name'],
+    }
+
+
+def _race(row):
+    api_data = row['api_data']
+    return {
+        'id': row['id'],
+        'slug': row['slug'],
+        'name': row['name'],
+        'ability_bonuses': {name: row[f'{name}_bonus'] for name in ABILITIES},
+        'traits': api_data['traits'] if api_data and 'traits' in api_data else [],
+        **{f'{name}_bonus': row[f'{name}_bonus'] for name in ABILITIES},
+        'created_at': _dt(row['created_at']),
+        'updated_at': _dt(row['updated_at']),
+    }
+
+
+def _character_class(row):
+    spell_slots_type = row['spell_slots_type']
+    return {
+        'id': row['id'],
+        'slug': row['slug'],
+        'name': row['name'],
+        'hit_die': row['hit_die'],
+        'primary_ability': row['primary_ability'],
+        'saving_throw_proficiencies': row['saving_throw_proficiencies'],
+        'is_spellcaster': row['is_spellcaster'],
+        'spellcasting_ability': row['spellcasting_ability'],
+        'spell_slots_type': spell_slots_type,
+        'spell_slots_type_display': _SPELL_SLOTS_DISPLAY.get(spell_slots_type, spell_slots_type),
+        'created_at': _dt(row['created_at']),
+        'updated_at': _dt(row['updated_at']),
+    }
+
+
+def _background(row):
+    return {
+        'id': row['id'],
+        'slug': row['slug'],
+        'name': row['name'],
+        'skill_proficiencies': row['skill_proficiencies'],
+        'tool_proficiencies': row['tool_proficiencies'],
+        'languages': row['languages'],
+        'created_at': _dt(row['created_at']),
+        'updated_at': _dt(row['updated_at']),
+    }
+
+
+# model, colunas, função de serialização
+_RELATIONS = {
+    'user': (User, ('id', 'username', 'email', 'first_name', 'last_name'), _user),
+    'race': (
+        Race,
+        ('id', 'slug', 'name', 'api_data', 'created_at', 'updated_at')
+        + tuple(f'{name}_bonus' for name in ABILITIES),
+        _race
+    ),
+    'character_class': (
+        CharacterClass,
+        ('id', 'slug', 'name', 'hit_die', 'primary_ability', 'saving_throw_proficiencies',
+         'is_spellcaster', 'spellcasting_ability', 'spell_slots_type', 'created_at', 'updated_at'),
+        _character_class
+    ),
+    'background': (
+        Background,
+        ('id', 'slug', 'name', 'skill_proficiencies', 'tool_proficiencies', 'languages',
+         'created_at', 'updated_at'),
+        _background
+    ),
+}
+
+
+# Detalhe: colunas do personagem + `relação__campo` das referências
+CHARACTER_DETAIL_FIELDS = CHARACTER_LIST_FIELDS + (
+    'experience_points', 'version', 'temporary_hp',
+    'custom_skill_proficiencies', 'custom_saving_throw_proficiencies',
+) + tuple(f'base_{name}' for name in ABILITIES) + tuple(
+    f'current_spell_slots_{i}' for i in range(1, SPELL_LEVELS)
+) + Character.DERIVED_FIELDS + tuple(
+    f'{name}__{field}' for name, (_, fields, _) in _RELATIONS.items() for field in fields
+)
+
+
+def _joined(row):
+    """Como `_related`, a partir das colunas `relação__campo` de uma linha"""
+    related = {}
+    for name, (_, fields, build) in _RELATIONS.items():
+        pk = row[f'{name}_id']
+        related[name] = {
+            pk: build({field: row[f'{name}__{field}'] for field in fields})
+        } if pk is not None else {}
+    return related
+
+
+def _related(rows):
+    """{relação: {id: dict serializado}} com uma query por tabela"""
+    related = {}
+    for name, (model, fields, build) in _RELATIONS.items():
+        ids = {row[f'{name}_id'] for row in rows} - {None}
+        related[name] = {
+            row['id']: build(row)
+            for row in model.objects.filter(pk__in=ids).order_by().values(*fields)
+        } if ids else {}
+    return related
+
+
+# ========================================
+# PERSONAGENS
+# ========================================
+
+def _character_base(row, related):
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'user': related['user'][row['user_id']],
+        'race': related['race'][row['race_id']],
+        'character_class': related['character_class'][row['character_class_id']],
+        'background': related['background'].get(row['background_id']),
+    }
+
+
+def serialize_character_list(rows):
+    """Equivalente a CharacterListSerializer(many=True) para linhas de CHARACTER_LIST_FIELDS"""
+    rows = list(rows)
+    related = _related(rows)
+    return [
+        {
+            **_character_base(row, related),
+            'level': row['level'],
+            'current_hp': row['current_hp'],
+            'max_hp': row['max_hp'],
+            'created_at': _dt(row['created_at']),
+            'updated_at': _dt(row['updated_at']),
+        }
+        for row in rows
+    ]
+
+
+def _spell(row):
+    data = row['payload__data']
+    details = None
+    if row['payload_id']:
+        details = {
+            key: (data[source] if data and source in data else '')
+            for key, source in (
+                ('description', 'desc'), ('casting_time', 'casting_time'), ('range', 'range'),
+                ('components', 'components'), ('duration', 'duration'), ('school', 'school'),
+            )
+        }
+    return {
+        'id': row['id'],
+        'spell_slug': row['spell_slug'],
+        'spell_name': row['spell_name'],
+        'spell_level': row['spell_level'],
+        'is_prepared': row['is_prepared'],
+        'is_known': row['is_known'],
+        'spell_details': details,
+        'created_at': _dt(row['created_at']),
+    }
+
+
+def serialize_character_detail(row):
+    """Equivalente a CharacterDetailSerializer para uma linha de CHARACTER_DETAIL_FIELDS"""
+    related = _joined(row)
+    base = _character_base(row, related)
+
+    # Estatísticas derivadas já materializadas em colunas de Character
+    abilities = {name: row[name] for name in ABILITIES}
+    modifiers = {name: row[f'{name}_modifier'] for name in ABILITIES}
+    combat_stats = {
+        'armor_class': row['armor_class'],
+        'initiative_bonus': row['initiative_bonus'],
+        'proficiency_bonus': row['proficiency_bonus'],
+    }
+    if base['character_class']['is_spellcaster']:
+        combat_stats['spell_save_dc'] = row['spell_save_dc']
+        combat_stats['spell_attack_bonus'] = row['spell_attack_bonus']
+
+    max_slots = get_progression_table().spell_slots(
+        row['character_class_id'], row['level']
+    ) or EMPTY_SPELL_SLOTS
+    spell_slots_current = {}
+    spell_slots_max = {}
+    for i in range(1, SPELL_LEVELS):
+        current = row[f'current_spell_slots_{i}']
+        if current > 0 or max_slots[i] > 0:
+            spell_slots_current[str(i)] = current
+        if max_slots[i] > 0:
+            spell_slots_max[str(i)] = max_slots[i]
+
+    spells = CharacterSpell.objects.filter(character_id=row['id']).values(
+        'id', 'spell_slug', 'spell_name', 'spell_level', 'is_prepared', 'is_known',
+        'payload_id', 'payload__data', 'created_at'
+    )
+
+    return {
+        **base,
+        'level': row['level'],
+        'experience_points': row['experience_points'],
+        'version': row['version'],
+        **{f'base_{name}': row[f'base_{name}'] for name in ABILITIES},
+        'final_abilities': abilities,
+        'ability_modifiers': modifiers,
+        'current_hp': row['current_hp'],
+        'max_hp': row['max_hp'],
+        'temporary_hp': row['temporary_hp'],
+        'combat_stats': combat_stats,
+        'spell_slots_current': spell_slots_current,
+        'spell_slots_max': spell_slots_max,
+        'custom_skill_proficiencies': row['custom_skill_proficiencies'],
+        'custom_saving_throw_proficiencies': row['custom_saving_throw_proficiencies'],
+        'spells': [_spell(spell) for spell in spells],
+        'created_at': _dt(row['created_at']),
+        'updated_at': _dt(row['updated_at']),
+    }
+
+
+# ========================================
+# VIEWS
+# ========================================
+
+class FastCharacterReadMixin:
+    """
+    list/retrieve de personagens pelas funções deste módulo.
+
+    Selecionável por view com `fast_read`; só vale para a representação
+    completa - com ?fields=/?expand= a view volta aos serializers do DRF.
+    A filtragem, a ordenação e a paginação continuam as da view (sobre
+    um queryset `.values()`); o acesso por objeto é o do `get_queryset`.
+    """
+    fast_read = True
+
+    def use_fast_read(self, request):
+        fields, expand = request_fieldset(request)
+        return self.fast_read and fields is None and expand is None
+
+    def _fast_queryset(self, fields):
+        # values() não combina com prefetch_related; select_related é ignorado
+        return self.filter_queryset(self.get_queryset()).prefetch_related(None).values(*fields)
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_read(request):
+            return super().list(request, *args, **kwargs)
+
+        # A paginação por cursor lê da linha as colunas da ordenação
+        extra = tuple(field for field in self.ordering_fields if field not in CHARACTER_LIST_FIELDS)
+        queryset = self._fast_queryset(CHARACTER_LIST_FIELDS + extra)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serialize_character_list(page))
+        return Response(serialize_character_list(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.use_fast_read(request):
+            return super().retrieve(request, *args, **kwargs)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            self._fast_queryset(CHARACTER_DETAIL_FIELDS),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        return Response(serialize_character_detail(row))
@@ -0,0 +1,105 @@
+# apps/characters/fieldsets.py - Campos esparsos (?fields=) e expansão (?expand=)
+
+from rest_framework import serializers
+
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def parse_fieldset(value):
+    """
+    'id,name,race.name,race.slug' -> {'id': {}, 'name': {}, 'race': {'name': {}, 'slug': {}}}
+
+    None quando o parâmetro não foi enviado.
+    """
+    if value is None:
+        return None
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for part in path.strip().split('.'):
+            if part:
+                node = node.setdefault(part, {})
+    return tree
+
+
+def request_fieldset(request):
+    """(fields, expand) da query string; (None, None) sem os parâmetros"""
+    if request is None:
+        return None, None
+    params = request.query_params
+    return parse_fieldset(params.get(FIELDS_PARAM)), parse_fieldset(params.get(EXPAND_PARAM))
+
+
+def expanded_relations(request, relations):
+    """
+    Relações de `relations` que a resposta vai aninhar: todas sem
+    ?fields/?expand, senão só as expandidas ou pedidas com ponto
+    (`race.name`)
+    """
+    fields, expand = request_fieldset(request)
+    if fields is None and expand is None:
+        return set(relations)
+    return {
+        name for name in relations
+        if name in (expand or {}) or (fields or {}).get(name)
+    }
+
+
+def _collapsed(name, field):
+    """Relação não expandida: só o id, sem tocar no objeto relacionado"""
+    if isinstance(field, serializers.ListSerializer):
+        kwargs = {'source': field.source} if field.source not in (None, name) else {}
+        return serializers.PrimaryKeyRelatedField(many=True, read_only=True, **kwargs)
+    return serializers.ReadOnlyField(source=f'{field.source or name}_id')
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer com `?fields=` e `?expand=`.
+
+    - sem os parâmetros: representação completa (compatível com clientes atuais)
+    - `?fields=id,name,level`: só esses campos
+    - `?expand=race`: a relação vem aninhada; relações não expandidas vêm
+      apenas como id (`"race": 3`, sem query nem serializer aninhado)
+    - `?fields=race.name`: expande `race` trazendo só `name`
+
+    Serializers aninhados que também usam o mixin recebem o pedaço
+    correspondente da especificação.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        spec, expand = self._fieldset()
+        if spec is None and expand is None:
+            return fields
+
+        expand = expand or {}
+        for name in list(fields):
+            if spec is not None and name not in spec:
+                fields.pop(name)
+                continue
+
+            field = fields[name]
+            if not isinstance(field, serializers.BaseSerializer):
+                continue
+            sub_spec = (spec or {}).get(name) or None
+            if name in expand or sub_spec:
+                target = getattr(field, 'child', field)
+                if isinstance(target, DynamicFieldsMixin):
+                    target._nested_fieldset = (sub_spec, expand.get(name) or None)
+            else:
+                fields[name] = _collapsed(name, field)
+        return fields
+
+    def _fieldset(self):
+        nested = getattr(self, '_nested_fieldset', None)
+        if nested is not None:
+            return nested
+
+        root = self.root
+        is_top = root is self or (isinstance(root, serializers.ListSerializer) and root.child is self)
+        if not is_top:
+            return None, None
+        return request_fieldset(self.context.get('request'))
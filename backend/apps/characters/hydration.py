@@ -0,0 +1,133 @@
+# apps/characters/hydration.py - Hidratação de feitiços em background
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.api_integration.client import get_client, Open5eError
+
+
+logger = logging.getLogger(__name__)
+
+
+def hydrate_spell(spell_slug):
+    """
+    Busca os dados de um feitiço uma única vez e aponta todos os
+    CharacterSpell com esse slug que ainda não têm dados para o mesmo
+    SpellPayload.
+
+    Retorna o número de feitiços de personagens atualizados, ou None se
+    a API não devolveu dados (o feitiço continua pendente).
+    """
+    from .models import Character, CharacterSpell, Spell, SpellPayload
+
+    data, stale = get_client().get_cached(f"v2/spells/{spell_slug}/")
+    if not data:
+        return None
+
+    pending = CharacterSpell.objects.filter(spell_slug=spell_slug, payload__isnull=True)
+    with transaction.atomic():
+        character_ids = list(pending.values_list('character_id', flat=True))
+        if not character_ids:
+            return 0
+
+        updated = pending.update(
+            payload=SpellPayload.for_data(data, spell_slug),
+            spell_name=data.get('name') or F('spell_name'),
+            spell_level=data.get('level', F('spell_level')),
+        )
+        # update() não dispara signals: invalida o ETag dos personagens aqui
+        Character.objects.filter(pk__in=character_ids).update(
+            version=F('version') + 1, updated_at=timezone.now()
+        )
+
+    if not stale:
+        # Próximos add_spell deste feitiço já saem do catálogo local
+        Spell.upsert_from_api_data(data)
+    return updated
+
+
+class SpellHydrationQueue:
+    """
+    Fila de hidratação de feitiços com deduplicação por slug.
+
+    Enquanto um slug está na fila, novos pedidos para ele reaproveitam o
+    mesmo job, e um único UPDATE hidrata todos os personagens. Jobs
+    posteriores do mesmo slug caem no cache do cliente Open5e, então
+    vários personagens aprendendo o mesmo feitiço geram uma única chamada.
+
+    A fila vive só no processo: um job que falhou (ou que se perdeu num
+    restart) é refeito por `requeue_unhydrated`, chamado nas leituras de
+    feitiços e pelo comando hydrate_spells. Um slug que falhou só volta
+    para a fila depois de `retry_interval` segundos.
+    """
+
+    def __init__(self, max_workers=2, retry_interval=60, clock=time.monotonic):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='spell-hydration')
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._failed = {}
+        self.retry_interval = retry_interval
+        self._clock = clock
+
+    def enqueue(self, spell_slug):
+        """Future do job do slug, ou None se ele falhou há menos de `retry_interval`"""
+        with self._lock:
+            future = self._pending.get(spell_slug)
+            if future is None:
+                failed_at = self._failed.get(spell_slug)
+                if failed_at is not None and self._clock() - failed_at < self.retry_interval:
+                    return None
+                future = self._executor.submit(self._run, spell_slug)
+                self._pending[spell_slug] = future
+        return future
+
+    def pending(self):
+        with self._lock:
+            return set(self._pending)
+
+    def _run(self, spell_slug):
+        # O slug sai da fila antes da consulta: um feitiço adicionado
+        # durante a hidratação ganha um novo job em vez de ficar sem dados
+        with self._lock:
+            self._pending.pop(spell_slug, None)
+
+        close_old_connections()
+        try:
+            updated = hydrate_spell(spell_slug)
+        except Open5eError as e:
+            logger.warning('Hidratação de %s falhou: %s', spell_slug, e)
+            updated = None
+        except Exception:
+            # O future não é observado: sem este log a falha some
+            logger.exception('Hidratação de %s falhou', spell_slug)
+            updated = None
+        finally:
+            close_old_connections()
+
+        with self._lock:
+            if updated is None:
+                self._failed[spell_slug] = self._clock()
+            else:
+                self._failed.pop(spell_slug, None)
+        return updated or 0
+
+
+spell_hydration_queue = SpellHydrationQueue()
+
+
+def schedule_spell_hydration(spell_slug):
+    """Enfileira a hidratação depois do commit da transação atual"""
+    transaction.on_commit(lambda: spell_hydration_queue.enqueue(spell_slug))
+
+
+def requeue_unhydrated(spell_slugs):
+    """Reenfileira os feitiços lidos ainda sem dados (job anterior falhou ou se perdeu)"""
+    pending = spell_hydration_queue.pending()
+    for spell_slug in set(spell_slugs) - pending:
+        schedule_spell_hydration(spell_slug)
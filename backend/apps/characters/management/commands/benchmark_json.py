@@ -0,0 +1,110 @@
+# apps/characters/management/commands/benchmark_json.py
+
+import io
+import timeit
+from contextlib import nullcontext
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from apps.api_integration.fake_server import SAMPLE_FIXTURES
+from apps.characters.models import Character, CharacterClass, CharacterSpell, Race, SpellPayload
+from apps.characters.serializers import CharacterDetailSerializer
+from core import renderers
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+
+def synthetic_character(spell_count, level=17, user=None, name='Benchmark'):
+    """Personagem de nível alto com feitiços completos (dados de exemplo da Open5e)"""
+    user = user or User.objects.create_user(username='benchmark-json')
+    race, _ = Race.objects.get_or_create(slug='benchmark-elf', defaults={'name': 'Elf', 'dexterity_bonus': 2})
+    wizard, _ = CharacterClass.objects.get_or_create(slug='benchmark-wizard', defaults={
+        'name': 'Wizard', 'hit_die': 6, 'is_spellcaster': True,
+        'spellcasting_ability': 'intelligence', 'spell_slots_type': 'full',
+    })
+    character = Character.objects.create(
+        user=user, name=name, race=race, character_class=wizard, level=level,
+        base_intelligence=18, base_dexterity=14
+    )
+
+    samples = SAMPLE_FIXTURES['v2/spells/']
+    spells = []
+    for i in range(spell_count):
+        data = dict(samples[i % len(samples)], key=f'benchmark-spell-{i}', name=f'Spell {i}')
+        spells.append(CharacterSpell(
+            character=character, spell_slug=data['key'], spell_name=data['name'],
+            spell_level=data['level'], payload=SpellPayload.for_data(data, data['key'])
+        ))
+    CharacterSpell.objects.bulk_create(spells)
+    return Character.objects.select_related('race', 'character_class').get(pk=character.pk)
+
+
+class Command(BaseCommand):
+    help = 'Compara JSONRenderer/JSONParser do DRF com core.renderers (orjson) em um detalhe de personagem'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--character',
+            type=int,
+            help='ID de um personagem existente (padrão: personagem sintético, descartado ao final)',
+        )
+        parser.add_argument(
+            '--spells',
+            type=int,
+            default=40,
+            help='Feitiços do personagem sintético',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=1000,
+            help='Repetições de cada medição',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['character']:
+                try:
+                    character = Character.objects.get(pk=options['character'])
+                except Character.DoesNotExist:
+                    raise CommandError(f'Personagem {options["character"]} não encontrado')
+            else:
+                character = synthetic_character(options['spells'])
+            data = CharacterDetailSerializer(character).data
+            transaction.set_rollback(True)
+
+        iterations = options['iterations']
+        body = JSONRenderer().render(data)
+        self.stdout.write(
+            f'Payload: {len(body) / 1024:.1f} KB, {len(data.get("spells", []))} feitiços, '
+            f'{iterations} iterações\n'
+        )
+
+        fast_renderer, fast_parser = FastJSONRenderer(), FastJSONParser()
+        cases = [
+            ('render', 'DRF JSONRenderer', False, lambda: JSONRenderer().render(data)),
+            ('render', 'FastJSONRenderer (stdlib)', True, lambda: fast_renderer.render(data)),
+            ('render', 'FastJSONRenderer (orjson)', False, lambda: fast_renderer.render(data)),
+            ('parse', 'DRF JSONParser', False, lambda: JSONParser().parse(io.BytesIO(body))),
+            ('parse', 'FastJSONParser (stdlib)', True, lambda: fast_parser.parse(io.BytesIO(body))),
+            ('parse', 'FastJSONParser (orjson)', False, lambda: fast_parser.parse(io.BytesIO(body))),
+        ]
+        if renderers.orjson is None:
+            self.stdout.write(self.style.WARNING('orjson não instalado: só o fallback é medido'))
+            cases = [case for case in cases if '(orjson)' not in case[1]]
+
+        baseline = {}
+        for kind, label, stdlib, fn in cases:
+            # core.renderers/core.parsers sem orjson: fallback para a stdlib
+            with mock.patch.object(renderers, 'orjson', None) if stdlib else nullcontext(), \
+                    mock.patch('core.parsers.orjson', None) if stdlib else nullcontext():
+                elapsed = min(timeit.repeat(fn, number=iterations, repeat=3)) / iterations
+            baseline.setdefault(kind, elapsed)
+            self.stdout.write(
+                f'  {label:<28} {elapsed * 1e6:9.1f} µs   {baseline[kind] / elapsed:5.2f}x'
+            )
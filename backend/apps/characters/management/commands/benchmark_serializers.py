@@ -0,0 +1,88 @@
+# apps/characters/management/commands/benchmark_serializers.py
+
+import timeit
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+
+from apps.characters.fast_serializers import (
+    CHARACTER_DETAIL_FIELDS, CHARACTER_LIST_FIELDS,
+    serialize_character_detail, serialize_character_list
+)
+from apps.characters.models import Character, CharacterSpell
+from apps.characters.serializers import CharacterDetailSerializer, CharacterListSerializer
+
+from .benchmark_json import synthetic_character
+
+
+class Command(BaseCommand):
+    help = 'Compara CharacterDetail/ListSerializer do DRF com apps.characters.fast_serializers (query + serialização)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--characters',
+            type=int,
+            default=20,
+            help='Personagens na página da listagem',
+        )
+        parser.add_argument(
+            '--spells',
+            type=int,
+            default=40,
+            help='Feitiços do personagem do detalhe',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=200,
+            help='Repetições de cada medição',
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+
+        # Dados sintéticos, descartados ao final
+        with transaction.atomic():
+            user = User.objects.create_user(username='benchmark-serializers')
+            character = synthetic_character(options['spells'], user=user)
+            for i in range(options['characters'] - 1):
+                synthetic_character(0, level=1 + i % 20, user=user, name=f'Benchmark {i}')
+
+            characters = Character.objects.filter(user=user)
+            cases = [
+                ('detail', 'CharacterDetailSerializer', lambda: CharacterDetailSerializer(
+                    characters.select_related('user', 'race', 'character_class', 'background')
+                    .prefetch_related(Prefetch('spells', queryset=CharacterSpell.objects.select_related('payload')))
+                    .get(pk=character.pk)
+                ).data),
+                ('detail', 'fast_serializers', lambda: serialize_character_detail(
+                    characters.values(*CHARACTER_DETAIL_FIELDS).get(pk=character.pk)
+                )),
+                ('list', 'CharacterListSerializer', lambda: CharacterListSerializer(
+                    characters.select_related('user', 'race', 'character_class', 'background'), many=True
+                ).data),
+                ('list', 'fast_serializers', lambda: serialize_character_list(
+                    characters.values(*CHARACTER_LIST_FIELDS)
+                )),
+            ]
+
+            # Paridade antes de medir
+            renderer = JSONRenderer()
+            for first, second in zip(cases[::2], cases[1::2]):
+                assert renderer.render(first[2]()) == renderer.render(second[2]()), first[0]
+
+            self.stdout.write(
+                f'Detalhe com {options["spells"]} feitiços, listagem de {options["characters"]} '
+                f'personagens, {iterations} iterações\n'
+            )
+            baseline = {}
+            for kind, label, fn in cases:
+                elapsed = min(timeit.repeat(fn, number=iterations, repeat=3)) / iterations
+                baseline.setdefault(kind, elapsed)
+                self.stdout.write(
+                    f'  {kind:<7} {label:<26} {elapsed * 1e6:9.1f} µs   {baseline[kind] / elapsed:5.2f}x'
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,38 @@
+# apps/characters/management/commands/export_open5e_snapshot.py
+
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.api_integration.snapshot import export_snapshot
+from apps.api_integration.sync import RESOURCES
+
+
+class Command(BaseCommand):
+    help = 'Exporta o catálogo Open5e local para um snapshot offline (NDJSON + gzip)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=settings.OPEN5E_SNAPSHOT_PATH,
+            help='Arquivo de saída (padrão: OPEN5E_SNAPSHOT_PATH)',
+        )
+        parser.add_argument(
+            '--resources',
+            nargs='+',
+            choices=list(RESOURCES),
+            help='Recursos a exportar (padrão: todos)',
+        )
+
+    def handle(self, *args, **options):
+        output = Path(options['output'])
+        output.parent.mkdir(parents=True, exist_ok=True)
+
+        counts = export_snapshot(output, options['resources'])
+        for name, count in counts.items():
+            self.stdout.write(f'  ✓ {name}: {count} registros')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Snapshot gravado em {output} ({output.stat().st_size / 1024:.0f} KB)'
+        ))
@@ -0,0 +1,37 @@
+# apps/characters/management/commands/hydrate_spells.py
+
+from django.core.management.base import BaseCommand
+
+from apps.api_integration.client import Open5eError
+from apps.characters.hydration import hydrate_spell
+from apps.characters.models import CharacterSpell
+
+
+class Command(BaseCommand):
+    help = 'Hidrata os feitiços de personagens que ainda estão sem dados da Open5e (ex: via cron)'
+
+    def handle(self, *args, **options):
+        slugs = sorted(set(
+            CharacterSpell.objects.filter(payload__isnull=True).values_list('spell_slug', flat=True)
+        ))
+        if not slugs:
+            self.stdout.write('Nenhum feitiço pendente')
+            return
+
+        hydrated, failed = 0, []
+        for spell_slug in slugs:
+            try:
+                updated = hydrate_spell(spell_slug)
+            except Open5eError as e:
+                self.stdout.write(self.style.WARNING(f'  {spell_slug}: {e}'))
+                updated = None
+            if updated is None:
+                failed.append(spell_slug)
+            else:
+                hydrated += updated
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{hydrated} feitiços de personagens hidratados ({len(slugs) - len(failed)}/{len(slugs)} slugs)'
+        ))
+        if failed:
+            self.stdout.write(self.style.WARNING(f'Sem dados: {", ".join(failed)}'))
@@ -0,0 +1,52 @@
+# apps/characters/management/commands/load_open5e_snapshot.py
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.api_integration.snapshot import load_snapshot, read_header, SnapshotError
+from apps.api_integration.sync import RESOURCES
+
+
+class Command(BaseCommand):
+    help = 'Importa um snapshot offline da Open5e para o catálogo local (sem rede)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=settings.OPEN5E_SNAPSHOT_PATH,
+            help='Arquivo do snapshot (padrão: OPEN5E_SNAPSHOT_PATH)',
+        )
+        parser.add_argument(
+            '--resources',
+            nargs='+',
+            choices=list(RESOURCES),
+            help='Recursos a importar (padrão: todos do snapshot)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regravar todos os registros, mesmo os que não mudaram',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        start = time.monotonic()
+        try:
+            header = read_header(path)
+            self.stdout.write(f'Snapshot v{header["version"]} de {header.get("created_at", "?")}')
+            loaded = load_snapshot(path, options['resources'], force=options['force'])
+        except FileNotFoundError:
+            raise CommandError(f'Snapshot não encontrado: {path}')
+        except SnapshotError as e:
+            raise CommandError(str(e))
+
+        for name, count in loaded.items():
+            self.stdout.write(
+                f'  ✓ {name}: {count} gravados de {header["resources"].get(name, 0)}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Snapshot carregado em {time.monotonic() - start:.1f}s'
+        ))
@@ -0,0 +1,21 @@
+# apps/characters/management/commands/rebuild_spell_search.py
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.characters.search import install_search_index, get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Recria o índice de busca textual de feitiços (tsvector/pg_trgm ou FTS5)'
+
+    def handle(self, *args, **options):
+        with connection.schema_editor() as schema_editor:
+            install_search_index(schema_editor)
+
+        if get_search_backend() is None:
+            self.stdout.write(self.style.WARNING(
+                f'Banco {connection.vendor} sem suporte: busca usa icontains'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('Índice de busca de feitiços reconstruído!'))
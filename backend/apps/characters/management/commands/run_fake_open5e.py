@@ -0,0 +1,73 @@
+# apps/characters/management/commands/run_fake_open5e.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.api_integration.fake_server import FakeOpen5eApp, FakeOpen5eServer
+from apps.api_integration.snapshot import SnapshotError
+
+
+class Command(BaseCommand):
+    help = 'Sobe um servidor Open5e falso local (fixtures, latência e falhas configuráveis)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--snapshot',
+            help='Snapshot usado como fixtures (padrão: registros de exemplo)',
+        )
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8001)
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=0.0,
+            help='Segundos de espera em cada resposta',
+        )
+        parser.add_argument(
+            '--jitter',
+            type=float,
+            default=0.0,
+            help='Espera extra aleatória de até N segundos',
+        )
+        parser.add_argument(
+            '--error-rate',
+            type=float,
+            default=0.0,
+            help='Fração das requisições que falham (0 a 1)',
+        )
+        parser.add_argument(
+            '--error-status',
+            type=int,
+            default=503,
+            help='Status HTTP das falhas injetadas',
+        )
+        parser.add_argument(
+            '--retry-after',
+            type=float,
+            help='Header Retry-After das falhas injetadas',
+        )
+
+    def handle(self, *args, **options):
+        app_options = {
+            'latency': options['latency'],
+            'jitter': options['jitter'],
+            'error_rate': options['error_rate'],
+            'error_status': options['error_status'],
+            'retry_after': options['retry_after'],
+        }
+        try:
+            if options['snapshot']:
+                app = FakeOpen5eApp.from_snapshot(options['snapshot'], **app_options)
+            else:
+                app = FakeOpen5eApp(**app_options)
+        except (OSError, SnapshotError) as e:
+            raise CommandError(str(e))
+
+        server = FakeOpen5eServer(app, options['host'], options['port'], quiet=options['verbosity'] < 2)
+        server.start()
+        total = sum(len(records) for records in app.fixtures.values())
+        self.stdout.write(self.style.SUCCESS(f'Open5e falso em {server.url} ({total} registros)'))
+        self.stdout.write(f'Aponte o backend para ele com OPEN5E_BASE_URL={server.url}')
+        try:
+            server.join()
+        except KeyboardInterrupt:
+            server.stop()
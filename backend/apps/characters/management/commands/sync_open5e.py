@@ -1,13 +1,14 @@
 # apps/characters/management/commands/sync_open5e.py
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from apps.characters.models import Race, CharacterClass, Background
-import requests
-import time
+
+from apps.api_integration.client import get_client, Open5eError
+from apps.api_integration.sync import Open5eSyncEngine, RESOURCES
 
 
 class Command(BaseCommand):
-    help = 'Sincroniza dados com a Open5e API'
+    help = 'Sincroniza dados com a Open5e API (páginas em paralelo, com checkpoints)'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -20,60 +21,60 @@ class Command(BaseCommand):
             action='store_true',
             help='Sincronizar apenas classes',
         )
+        parser.add_argument(
+            '--backgrounds',
+            action='store_true',
+            help='Sincronizar apenas backgrounds',
+        )
+        parser.add_argument(
+            '--spells',
+            action='store_true',
+            help='Sincronizar apenas o catálogo de feitiços',
+        )
         parser.add_argument(
             '--force',
             action='store_true',
-            help='Forçar atualização mesmo se já tem dados',
+            help='Ignorar checkpoints e regravar todos os registros',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=getattr(settings, 'OPEN5E_SYNC_WORKERS', 4),
+            help='Requisições simultâneas',
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=getattr(settings, 'OPEN5E_SYNC_RATE', 5.0),
+            help='Máximo de requisições por segundo (0 = sem limite)',
         )
 
     def handle(self, *args, **options):
-        if options['races'] or not any([options['races'], options['classes']]):
-            self.sync_races(options['force'])
-        
-        if options['classes'] or not any([options['races'], options['classes']]):
-            self.sync_classes(options['force'])
+        resources = [name for name in RESOURCES if options[name]] or list(RESOURCES)
 
-        self.stdout.write(
-            self.style.SUCCESS('Sincronização com Open5e API concluída!')
+        engine = Open5eSyncEngine(
+            workers=options['workers'], rate=options['rate'], log=self.stdout.write
         )
+        try:
+            results = engine.sync(resources, force=options['force'])
+        except Open5eError as e:
+            self.stdout.write(self.style.ERROR(
+                f'✗ Erro: {e} - rode novamente para retomar do último checkpoint'
+            ))
+            return
 
-    def sync_races(self, force=False):
-        """Sincroniza raças com a API"""
-        self.stdout.write('Sincronizando raças...')
-        
-        races = Race.objects.all()
-        if not force:
-            races = races.filter(api_data__isnull=True)
-        
-        for race in races:
-            self.stdout.write(f'  Sincronizando {race.name}...')
-            try:
-                if race.fetch_api_data():
-                    self.stdout.write(f'    ✓ {race.name} atualizada')
-                else:
-                    self.stdout.write(f'    ✗ Falha ao atualizar {race.name}')
-            except Exception as e:
-                self.stdout.write(f'    ✗ Erro: {e}')
-            
-            # Delay para não sobrecarregar a API
-            time.sleep(0.5)
+        for result in results:
+            self.stdout.write(
+                f'  ✓ {result.resource}: {result.changed} alterados de {result.seen} '
+                f'({result.pages} páginas{", retomado" if result.resumed else ""})'
+            )
 
-    def sync_classes(self, force=False):
-        """Sincroniza classes com a API"""
-        self.stdout.write('Sincronizando classes...')
-        
-        classes = CharacterClass.objects.all()
-        if not force:
-            classes = classes.filter(api_data__isnull=True)
-        
-        for char_class in classes:
-            self.stdout.write(f'  Sincronizando {char_class.name}...')
-            try:
-                if char_class.fetch_api_data():
-                    self.stdout.write(f'    ✓ {char_class.name} atualizada')
-                else:
-                    self.stdout.write(f'    ✗ Falha ao atualizar {char_class.name}')
-            except Exception as e:
-                self.stdout.write(f'    ✗ Erro: {e}')
-            
-            time.sleep(0.5)
\ No newline at end of file
+        for host, metrics in get_client().metrics().items():
+            self.stdout.write(
+                f'  {host}: {metrics["requests"]} requisições, {metrics["retries"]} retries, '
+                f'{metrics["errors"]} erros, média {metrics["avg_time"]:.3f}s'
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS('Sincronização com Open5e API concluída!')
+        )
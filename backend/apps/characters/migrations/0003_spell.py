@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:25
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0002_background_campaign_characterclass_equipment_race_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Spell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(help_text='Slug do feitiço na Open5e API', max_length=100, unique=True)),
+                ('name', models.CharField(db_index=True, max_length=100)),
+                ('level', models.IntegerField(db_index=True, default=0, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(9)])),
+                ('school', models.CharField(blank=True, db_index=True, max_length=50)),
+                ('classes', models.JSONField(default=list, help_text='Nomes das classes')),
+                ('class_keys', models.CharField(blank=True, default='', help_text="Classes normalizadas (',wizard,sorcerer,') para filtro", max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('higher_level', models.TextField(blank=True)),
+                ('casting_time', models.CharField(blank=True, max_length=100)),
+                ('range', models.CharField(blank=True, max_length=100)),
+                ('components', models.CharField(blank=True, max_length=100)),
+                ('duration', models.CharField(blank=True, max_length=100)),
+                ('concentration', models.BooleanField(default=False)),
+                ('ritual', models.BooleanField(default=False)),
+                ('api_data', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Spell',
+                'verbose_name_plural': 'Spells',
+                'ordering': ['level', 'name'],
+            },
+        ),
+    ]
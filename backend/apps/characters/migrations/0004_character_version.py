@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0003_spell'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='character',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
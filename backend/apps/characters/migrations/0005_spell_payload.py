@@ -0,0 +1,71 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+import hashlib
+import json
+
+
+def _hash_data(data):
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def move_api_data_to_payloads(apps, schema_editor):
+    """Uma linha de SpellPayload por conteúdo distinto de api_data"""
+    CharacterSpell = apps.get_model('characters', 'CharacterSpell')
+    SpellPayload = apps.get_model('characters', 'SpellPayload')
+
+    payload_ids = {}
+    spells = CharacterSpell.objects.filter(api_data__isnull=False).only('id', 'spell_slug', 'api_data')
+    for spell in spells.iterator(chunk_size=500):
+        content_hash = _hash_data(spell.api_data)
+        if content_hash not in payload_ids:
+            payload, _ = SpellPayload.objects.get_or_create(
+                content_hash=content_hash,
+                defaults={'slug': spell.spell_slug, 'data': spell.api_data}
+            )
+            payload_ids[content_hash] = payload.id
+        CharacterSpell.objects.filter(pk=spell.pk).update(payload_id=payload_ids[content_hash])
+
+
+def copy_payloads_to_api_data(apps, schema_editor):
+    CharacterSpell = apps.get_model('characters', 'CharacterSpell')
+
+    spells = CharacterSpell.objects.filter(payload__isnull=False).select_related('payload')
+    for spell in spells.iterator(chunk_size=500):
+        CharacterSpell.objects.filter(pk=spell.pk).update(api_data=spell.payload.data)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0004_character_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpellPayload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True)),
+                ('slug', models.CharField(db_index=True, max_length=100)),
+                ('data', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Spell Payload',
+                'verbose_name_plural': 'Spell Payloads',
+            },
+        ),
+        migrations.AddField(
+            model_name='characterspell',
+            name='payload',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='character_spells', to='characters.spellpayload'),
+        ),
+        migrations.RunPython(move_api_data_to_payloads, copy_payloads_to_api_data),
+        migrations.RemoveField(
+            model_name='characterspell',
+            name='api_data',
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Índice de busca textual de feitiços: tsvector + pg_trgm (PostgreSQL)
+# ou FTS5 com triggers (SQLite). Outros bancos usam a busca por icontains.
+
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from apps.characters.search import install_search_index
+    install_search_index(schema_editor)
+
+
+def uninstall(apps, schema_editor):
+    from apps.characters.search import uninstall_search_index
+    uninstall_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0005_spell_payload'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
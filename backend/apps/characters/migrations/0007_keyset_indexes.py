@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0006_spell_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='campaign',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='character',
+            options={'ordering': ['-created_at', '-id'], 'verbose_name': 'Character', 'verbose_name_plural': 'Characters'},
+        ),
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(fields=['dm', 'created_at', 'id'], name='campaign_dm_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='character_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='spell',
+            index=models.Index(fields=['level', 'name', 'id'], name='spell_level_name_idx'),
+        ),
+    ]
@@ -0,0 +1,151 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:05
+
+from django.db import migrations, models
+
+
+ABILITIES = ('strength', 'dexterity', 'constitution', 'intelligence', 'wisdom', 'charisma')
+
+
+def populate_derived_stats(apps, schema_editor):
+    """Mesmas regras de Character.compute_derived_stats no momento da migração"""
+    Character = apps.get_model('characters', 'Character')
+
+    fields = None
+    batch = []
+    characters = Character.objects.select_related('race', 'character_class').order_by()
+    for character in characters.iterator(chunk_size=500):
+        stats = {}
+        for name in ABILITIES:
+            score = min(20, getattr(character, f'base_{name}') + getattr(character.race, f'{name}_bonus'))
+            stats[name] = score
+            stats[f'{name}_modifier'] = (score - 10) // 2
+        stats['proficiency_bonus'] = 2 + ((character.level - 1) // 4)
+        stats['armor_class'] = 10 + stats['dexterity_modifier']
+        stats['initiative_bonus'] = stats['dexterity_modifier']
+        stats['spell_save_dc'] = stats['spell_attack_bonus'] = None
+        if character.character_class.is_spellcaster:
+            modifier = stats.get(f'{character.character_class.spellcasting_ability}_modifier', 0)
+            stats['spell_save_dc'] = 8 + stats['proficiency_bonus'] + modifier
+            stats['spell_attack_bonus'] = stats['proficiency_bonus'] + modifier
+
+        for name, value in stats.items():
+            setattr(character, name, value)
+        fields = list(stats)
+        batch.append(character)
+        if len(batch) >= 500:
+            Character.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        Character.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0007_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='character',
+            name='armor_class',
+            field=models.IntegerField(default=10, editable=False),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='charisma',
+            field=models.IntegerField(default=10, editable=False, help_text='Carisma final (base + racial)'),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='charisma_modifier',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='constitution',
+            field=models.IntegerField(default=10, editable=False, help_text='Constituição final (base + racial)'),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='constitution_modifier',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='dexterity',
+            field=models.IntegerField(default=10, editable=False, help_text='Destreza final (base + racial)'),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='dexterity_modifier',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='initiative_bonus',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='intelligence',
+            field=models.IntegerField(default=10, editable=False, help_text='Inteligência final (base + racial)'),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='intelligence_modifier',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='proficiency_bonus',
+            field=models.IntegerField(default=2, editable=False),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='spell_attack_bonus',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='spell_save_dc',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='strength',
+            field=models.IntegerField(default=10, editable=False, help_text='Força final (base + racial)'),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='strength_modifier',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='wisdom',
+            field=models.IntegerField(default=10, editable=False, help_text='Sabedoria final (base + racial)'),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='wisdom_modifier',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_derived_stats, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(fields=['user', 'armor_class'], name='character_user_ac_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(fields=['user', 'spell_save_dc'], name='character_user_save_dc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(fields=['armor_class'], name='character_ac_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(fields=['spell_save_dc'], name='character_save_dc_idx'),
+        ),
+    ]
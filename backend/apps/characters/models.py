@@ -1,12 +1,23 @@
 # apps/characters/models.py - Models completos para D&D Character Creator
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest, Least
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
-from functools import cached_property
-import requests
+from django.utils import timezone
+import hashlib
 import json
 
+from apps.api_integration.client import get_client, Open5eError
+
+from .cache import invalidate_reference_cache, invalidate_spell_catalog
+from .spell_index import invalidate_spell_index
+from .progression import (
+    get_progression_table, invalidate_progression_table,
+    EMPTY_SPELL_SLOTS, SPELL_LEVELS, SpellSlotSnapshot
+)
+
 
 class Race(models.Model):
     """
@@ -38,20 +49,33 @@ class Race(models.Model):
     def __str__(self):
         return self.name
     
+    BONUS_FIELDS = (
+        'strength_bonus', 'dexterity_bonus', 'constitution_bonus',
+        'intelligence_bonus', 'wisdom_bonus', 'charisma_bonus',
+    )
+
+    @classmethod
+    def parse_api_data(cls, data):
+        """
+        Campos do model a partir de uma raça da Open5e API: `api_data` e
+        os bônus de atributos presentes em `asi` (os demais não mudam)
+        """
+        fields = {'api_data': data}
+        for asi in data.get('asi') or []:
+            if 'attributes' in asi and asi['attributes']:
+                attr_name = f"{asi['attributes'][0].lower()}_bonus"
+                if attr_name in cls.BONUS_FIELDS:
+                    fields[attr_name] = asi.get('value', 0)
+        return fields
+
     def fetch_api_data(self):
         """Busca dados da Open5e API e atualiza o model"""
         try:
-            response = requests.get(f"https://api.open5e.com/v2/races/{self.slug}/", timeout=10)
-            if response.status_code == 200:
-                self.api_data = response.json()
-                
+            self.api_data = get_client().get_cached(f"v2/races/{self.slug}/").data
+            if self.api_data:
                 # Atualiza bônus de atributos se disponível na API
-                if 'asi' in self.api_data:
-                    for asi in self.api_data['asi']:
-                        if 'attributes' in asi and asi['attributes']:
-                            attr_name = f"{asi['attributes'][0].lower()}_bonus"
-                            if hasattr(self, attr_name):
-                                setattr(self, attr_name, asi.get('value', 0))
+                for name, value in self.parse_api_data(self.api_data).items():
+                    setattr(self, name, value)
                 
                 self.save()
                 return True
@@ -107,25 +131,40 @@ class CharacterClass(models.Model):
     def __str__(self):
         return self.name
     
+    API_FIELDS = ('hit_die', 'is_spellcaster', 'spellcasting_ability')
+
+    @classmethod
+    def parse_api_data(cls, data):
+        """
+        Campos do model a partir de uma classe da Open5e API: `api_data` e
+        só os campos de API_FIELDS que o payload informa
+        """
+        fields = {'api_data': data}
+
+        # Extrai informações básicas ("8" ou "1d8")
+        if 'hit_die' in data:
+            try:
+                fields['hit_die'] = int(str(data['hit_die']).rsplit('d', 1)[-1])
+            except ValueError:
+                pass
+
+        # Verifica spellcasting
+        if 'spellcasting' in data:
+            fields['is_spellcaster'] = True
+            spellcasting = data['spellcasting']
+            if isinstance(spellcasting, dict) and 'spellcasting_ability' in spellcasting:
+                ability = spellcasting['spellcasting_ability']
+                if isinstance(ability, dict) and 'index' in ability:
+                    fields['spellcasting_ability'] = ability['index']
+        return fields
+
     def fetch_api_data(self):
         """Busca dados da Open5e API"""
         try:
-            response = requests.get(f"https://api.open5e.com/v1/classes/{self.slug}/", timeout=10)
-            if response.status_code == 200:
-                self.api_data = response.json()
-                
-                # Extrai informações básicas
-                if 'hit_die' in self.api_data:
-                    self.hit_die = self.api_data['hit_die']
-                
-                # Verifica spellcasting
-                if 'spellcasting' in self.api_data:
-                    self.is_spellcaster = True
-                    spellcasting = self.api_data['spellcasting']
-                    if 'spellcasting_ability' in spellcasting:
-                        ability = spellcasting['spellcasting_ability']
-                        if isinstance(ability, dict) and 'index' in ability:
-                            self.spellcasting_ability = ability['index']
+            self.api_data = get_client().get_cached(f"v1/classes/{self.slug}/").data
+            if self.api_data:
+                for name, value in self.parse_api_data(self.api_data).items():
+                    setattr(self, name, value)
                 
                 self.save()
                 return True
@@ -199,6 +238,135 @@ class Background(models.Model):
         return self.name
 
 
+class Spell(models.Model):
+    """
+    Catálogo local de feitiços - alimentado pelo sync com a Open5e API
+    """
+    slug = models.SlugField(max_length=100, unique=True, help_text="Slug do feitiço na Open5e API")
+    name = models.CharField(max_length=100, db_index=True)
+    level = models.IntegerField(
+        default=0, db_index=True,
+        validators=[MinValueValidator(0), MaxValueValidator(9)]
+    )
+    school = models.CharField(max_length=50, blank=True, db_index=True)
+
+    # Classes que podem aprender o feitiço
+    classes = models.JSONField(default=list, help_text="Nomes das classes")
+    class_keys = models.CharField(
+        max_length=255, blank=True, default='',
+        help_text="Classes normalizadas (',wizard,sorcerer,') para filtro"
+    )
+
+    # Detalhes do feitiço
+    description = models.TextField(blank=True)
+    higher_level = models.TextField(blank=True)
+    casting_time = models.CharField(max_length=100, blank=True)
+    range = models.CharField(max_length=100, blank=True)
+    components = models.CharField(max_length=100, blank=True)
+    duration = models.CharField(max_length=100, blank=True)
+    concentration = models.BooleanField(default=False)
+    ritual = models.BooleanField(default=False)
+
+    # Cache dos dados da API
+    api_data = models.JSONField(blank=True, null=True)
+
+    # Metadata
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['level', 'name']
+        verbose_name = 'Spell'
+        verbose_name_plural = 'Spells'
+        indexes = [
+            models.Index(fields=['level', 'name', 'id'], name='spell_level_name_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def _as_bool(value):
+        """Open5e v1 usa 'yes'/'no', v2 usa booleanos"""
+        if isinstance(value, str):
+            return value.strip().lower() in ('yes', 'true', '1')
+        return bool(value)
+
+    @staticmethod
+    def _as_name(value):
+        """Extrai nome de um campo que pode ser string ou objeto da API"""
+        if isinstance(value, dict):
+            return value.get('name', '')
+        return value or ''
+
+    @classmethod
+    def parse_api_data(cls, data):
+        """Converte um feitiço da Open5e API (v1 ou v2) nos campos do model"""
+        # Classes: lista de objetos (v2), lista de strings ou string "Wizard, Sorcerer" (v1)
+        raw_classes = data.get('classes') or data.get('dnd_class') or []
+        if isinstance(raw_classes, str):
+            raw_classes = raw_classes.split(',')
+        class_names = [cls._as_name(c).strip() for c in raw_classes]
+        class_names = [name for name in class_names if name]
+
+        level = data.get('level_int', data.get('level', 0))
+        try:
+            level = int(level)
+        except (TypeError, ValueError):
+            level = 0
+
+        components = data.get('components', '')
+        if not components:
+            components = ', '.join(
+                letter for letter, key in (('V', 'verbal'), ('S', 'somatic'), ('M', 'material'))
+                if data.get(key)
+            )
+
+        return {
+            'name': data.get('name', ''),
+            'level': level,
+            'school': cls._as_name(data.get('school', '')).lower(),
+            'classes': class_names,
+            'class_keys': ',' + ','.join(name.lower() for name in class_names) + ',' if class_names else '',
+            'description': data.get('desc', '') or '',
+            'higher_level': data.get('higher_level', '') or '',
+            'casting_time': data.get('casting_time', '') or '',
+            'range': data.get('range_text') or str(data.get('range', '') or ''),
+            'components': components or '',
+            'duration': data.get('duration', '') or '',
+            'concentration': cls._as_bool(data.get('concentration', False)),
+            'ritual': cls._as_bool(data.get('ritual', False)),
+            'api_data': data,
+        }
+
+    @classmethod
+    def upsert_from_api_data(cls, data):
+        """Cria ou atualiza um feitiço do catálogo a partir dos dados da API"""
+        slug = data.get('slug') or data.get('key')
+        if not slug:
+            return None
+        spell, _ = cls.objects.update_or_create(slug=slug, defaults=cls.parse_api_data(data))
+        return spell
+
+    def to_dict(self):
+        """Representação usada pelos endpoints de busca de feitiços"""
+        return {
+            'name': self.name,
+            'slug': self.slug,
+            'level': self.level,
+            'school': self.school,
+            'classes': self.classes,
+            'description': self.description,
+            'casting_time': self.casting_time,
+            'range': self.range,
+            'components': self.components,
+            'duration': self.duration,
+            'concentration': self.concentration,
+            'ritual': self.ritual,
+            'higher_level': self.higher_level,
+        }
+
+
 class Character(models.Model):
     """
     Personagem principal com todos os cálculos
@@ -231,6 +399,29 @@ class Character(models.Model):
     custom_skill_proficiencies = models.JSONField(default=list)
     custom_saving_throw_proficiencies = models.JSONField(default=list)
     
+    # Versão do estado - incrementada a cada alteração (respostas delta)
+    version = models.PositiveIntegerField(default=0)
+    
+    # Estatísticas derivadas (desnormalizadas): recalculadas no save() e
+    # quando a raça ou a classe muda - filtráveis/ordenáveis no banco
+    strength = models.IntegerField(default=10, editable=False, help_text="Força final (base + racial)")
+    dexterity = models.IntegerField(default=10, editable=False, help_text="Destreza final (base + racial)")
+    constitution = models.IntegerField(default=10, editable=False, help_text="Constituição final (base + racial)")
+    intelligence = models.IntegerField(default=10, editable=False, help_text="Inteligência final (base + racial)")
+    wisdom = models.IntegerField(default=10, editable=False, help_text="Sabedoria final (base + racial)")
+    charisma = models.IntegerField(default=10, editable=False, help_text="Carisma final (base + racial)")
+    strength_modifier = models.IntegerField(default=0, editable=False)
+    dexterity_modifier = models.IntegerField(default=0, editable=False)
+    constitution_modifier = models.IntegerField(default=0, editable=False)
+    intelligence_modifier = models.IntegerField(default=0, editable=False)
+    wisdom_modifier = models.IntegerField(default=0, editable=False)
+    charisma_modifier = models.IntegerField(default=0, editable=False)
+    proficiency_bonus = models.IntegerField(default=2, editable=False)
+    armor_class = models.IntegerField(default=10, editable=False)
+    initiative_bonus = models.IntegerField(default=0, editable=False)
+    spell_save_dc = models.IntegerField(null=True, blank=True, editable=False)
+    spell_attack_bonus = models.IntegerField(null=True, blank=True, editable=False)
+    
     # Spell slots atuais (para spellcasters)
     current_spell_slots_1 = models.IntegerField(default=0)
     current_spell_slots_2 = models.IntegerField(default=0)
@@ -246,145 +437,176 @@ class Character(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Campos de estado alterados pelas ações de combate/descanso
+    STATE_FIELDS = (
+        'level', 'current_hp', 'max_hp', 'temporary_hp',
+    ) + tuple(f'current_spell_slots_{i}' for i in range(1, 10))
+    
+    ABILITIES = ('strength', 'dexterity', 'constitution', 'intelligence', 'wisdom', 'charisma')
+    
+    # Colunas derivadas e os campos de que elas dependem
+    DERIVED_FIELDS = ABILITIES + tuple(f'{name}_modifier' for name in ABILITIES) + (
+        'proficiency_bonus', 'armor_class', 'initiative_bonus',
+        'spell_save_dc', 'spell_attack_bonus',
+    )
+    DERIVED_INPUTS = ('race_id', 'character_class_id', 'level') + tuple(
+        f'base_{name}' for name in ABILITIES
+    )
+    
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
         verbose_name = 'Character'
         verbose_name_plural = 'Characters'
+        indexes = [
+            # Paginação por cursor da listagem do usuário (KeysetPagination)
+            models.Index(fields=['user', 'created_at', 'id'], name='character_user_created_idx'),
+            # Filtros por estatísticas derivadas (listagem do usuário e campanhas)
+            models.Index(fields=['user', 'armor_class'], name='character_user_ac_idx'),
+            models.Index(fields=['user', 'spell_save_dc'], name='character_user_save_dc_idx'),
+            models.Index(fields=['armor_class'], name='character_ac_idx'),
+            models.Index(fields=['spell_save_dc'], name='character_save_dc_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.character_class.name} {self.level})"
     
     # ========================================
-    # PROPRIEDADES CALCULADAS - ATRIBUTOS
-    # ========================================
-    
-    @cached_property
-    def strength(self):
-        """Força final (base + racial)"""
-        return min(20, self.base_strength + self.race.strength_bonus)
-    
-    @cached_property
-    def dexterity(self):
-        """Destreza final (base + racial)"""
-        return min(20, self.base_dexterity + self.race.dexterity_bonus)
-    
-    @cached_property
-    def constitution(self):
-        """Constituição final (base + racial)"""
-        return min(20, self.base_constitution + self.race.constitution_bonus)
-    
-    @cached_property
-    def intelligence(self):
-        """Inteligência final (base + racial)"""
-        return min(20, self.base_intelligence + self.race.intelligence_bonus)
-    
-    @cached_property
-    def wisdom(self):
-        """Sabedoria final (base + racial)"""
-        return min(20, self.base_wisdom + self.race.wisdom_bonus)
-    
-    @cached_property
-    def charisma(self):
-        """Carisma final (base + racial)"""
-        return min(20, self.base_charisma + self.race.charisma_bonus)
-    
-    # ========================================
-    # MODIFICADORES DE ATRIBUTOS
+    # ESTATÍSTICAS DERIVADAS
     # ========================================
     
-    @cached_property
-    def strength_modifier(self):
-        return (self.strength - 10) // 2
-    
-    @cached_property
-    def dexterity_modifier(self):
-        return (self.dexterity - 10) // 2
-    
-    @cached_property
-    def constitution_modifier(self):
-        return (self.constitution - 10) // 2
-    
-    @cached_property
-    def intelligence_modifier(self):
-        return (self.intelligence - 10) // 2
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Entradas das colunas derivadas como vieram do banco (ver save())
+        instance._loaded_derived_inputs = instance._derived_inputs()
+        return instance
     
-    @cached_property
-    def wisdom_modifier(self):
-        return (self.wisdom - 10) // 2
+    def _derived_inputs(self):
+        # Campos adiados (.only()) não entram - ler forçaria uma query
+        deferred = self.get_deferred_fields()
+        return tuple(
+            None if name in deferred else getattr(self, name) for name in self.DERIVED_INPUTS
+        )
     
-    @cached_property
-    def charisma_modifier(self):
-        return (self.charisma - 10) // 2
-    
-    # ========================================
-    # ESTATÍSTICAS DE COMBATE
-    # ========================================
-    
-    @cached_property
-    def proficiency_bonus(self):
-        """Bônus de proficiência baseado no nível"""
-        return 2 + ((self.level - 1) // 4)
-    
-    @cached_property
-    def armor_class(self):
-        """AC base (10 + Dex modifier) - pode ser sobrescrito por equipamentos"""
-        return 10 + self.dexterity_modifier
-    
-    @cached_property
-    def initiative_bonus(self):
-        """Bônus de iniciativa"""
-        return self.dexterity_modifier
-    
-    @cached_property
-    def spell_save_dc(self):
-        """DC para salvar contra feitiços do personagem"""
-        if not self.character_class.is_spellcaster:
-            return None
+    @staticmethod
+    def compute_derived_stats(base_scores, race, character_class, level):
+        """
+        Atributos finais, modificadores e estatísticas de combate.
         
-        ability_modifier = getattr(self, f"{self.character_class.spellcasting_ability}_modifier", 0)
-        return 8 + self.proficiency_bonus + ability_modifier
-    
-    @cached_property
-    def spell_attack_bonus(self):
-        """Bônus para ataques com feitiços"""
-        if not self.character_class.is_spellcaster:
-            return None
+        base_scores: {atributo: valor base}; race/character_class: objetos
+        (ou qualquer coisa com os bônus/`is_spellcaster`/`spellcasting_ability`)
+        """
+        stats = {}
+        for name in Character.ABILITIES:
+            # Atributo final (base + racial), limitado a 20
+            score = min(20, base_scores[name] + getattr(race, f'{name}_bonus'))
+            stats[name] = score
+            stats[f'{name}_modifier'] = (score - 10) // 2
         
-        ability_modifier = getattr(self, f"{self.character_class.spellcasting_ability}_modifier", 0)
-        return self.proficiency_bonus + ability_modifier
+        # Bônus de proficiência baseado no nível
+        stats['proficiency_bonus'] = 2 + ((level - 1) // 4)
+        # AC base (10 + Dex modifier) - pode ser sobrescrito por equipamentos
+        stats['armor_class'] = 10 + stats['dexterity_modifier']
+        stats['initiative_bonus'] = stats['dexterity_modifier']
+        
+        # DC e bônus de ataque de feitiços (None para não conjuradores)
+        stats['spell_save_dc'] = stats['spell_attack_bonus'] = None
+        if character_class.is_spellcaster:
+            ability_modifier = stats.get(f'{character_class.spellcasting_ability}_modifier', 0)
+            stats['spell_save_dc'] = 8 + stats['proficiency_bonus'] + ability_modifier
+            stats['spell_attack_bonus'] = stats['proficiency_bonus'] + ability_modifier
+        return stats
+    
+    def update_derived_stats(self):
+        """Recalcula as colunas derivadas no objeto; retorna os campos alterados"""
+        stats = self.compute_derived_stats(
+            {name: getattr(self, f'base_{name}') for name in self.ABILITIES},
+            self.race, self.character_class, self.level
+        )
+        changed = [name for name, value in stats.items() if getattr(self, name) != value]
+        for name in changed:
+            setattr(self, name, stats[name])
+        return changed
     
     # ========================================
     # SPELL SLOTS
     # ========================================
     
+    def get_spell_slot_snapshot(self):
+        """
+        Slots máximos e atuais de todos os níveis de magia, calculados em
+        uma única passada e reaproveitados até o próximo save()
+        """
+        snapshot = getattr(self, '_spell_slot_snapshot', None)
+        if snapshot is None:
+            max_slots = get_progression_table().spell_slots(
+                self.character_class_id, self.level
+            ) or EMPTY_SPELL_SLOTS
+            # Cantrips são ilimitados: "atual" de nível 0 é o próprio máximo
+            current_slots = (max_slots[0],) + tuple(
+                getattr(self, f'current_spell_slots_{i}') for i in range(1, SPELL_LEVELS)
+            )
+            snapshot = SpellSlotSnapshot(max_slots, current_slots)
+            self._spell_slot_snapshot = snapshot
+        return snapshot
+    
     def get_max_spell_slots(self, spell_level):
         """Retorna o máximo de spell slots para um nível específico"""
-        try:
-            progression = ClassLevelProgression.objects.get(
-                character_class=self.character_class,
-                level=self.level
-            )
-            return getattr(progression, f'spell_slots_{spell_level}', 0)
-        except ClassLevelProgression.DoesNotExist:
+        if not 0 <= spell_level < SPELL_LEVELS:
             return 0
+        return self.get_spell_slot_snapshot().max_slots[spell_level]
     
     def get_current_spell_slots(self, spell_level):
         """Retorna spell slots atuais para um nível específico"""
-        if spell_level == 0:  # Cantrips são ilimitados
-            return self.get_max_spell_slots(0)
-        return getattr(self, f'current_spell_slots_{spell_level}', 0)
+        if not 0 <= spell_level < SPELL_LEVELS:
+            return 0
+        return self.get_spell_slot_snapshot().current_slots[spell_level]
     
-    def use_spell_slot(self, spell_level):
-        """Usa um spell slot do nível especificado"""
+    def use_spell_slot(self, spell_level, commit=True):
+        """
+        Usa um spell slot do nível especificado (UPDATE condicional atômico).
+        
+        Com commit=False altera apenas o objeto em memória - para quem já
+        travou a linha (select_for_update) e vai gravar em lote.
+        """
         if spell_level == 0:  # Cantrips não consomem slots
             return True
+        if not 1 <= spell_level < SPELL_LEVELS:
+            return False
         
-        current = self.get_current_spell_slots(spell_level)
-        if current > 0:
-            setattr(self, f'current_spell_slots_{spell_level}', current - 1)
-            self.save()
+        field = f'current_spell_slots_{spell_level}'
+        if not commit:
+            current = getattr(self, field)
+            if current <= 0:
+                return False
+            setattr(self, field, current - 1)
+            self._spell_slot_snapshot = None
             return True
-        return False
+        
+        return self._atomic_update(
+            filters={f'{field}__gt': 0},
+            **{field: F(field) - 1}
+        )
+    
+    def _atomic_update(self, filters=None, **expressions):
+        """
+        Aplica as expressões em um único UPDATE (sem ler-calcular-salvar)
+        e recarrega no objeto os valores resultantes.
+        
+        Retorna False se `filters` não casou a linha (nada foi alterado).
+        """
+        fields = list(expressions) + ['version']
+        expressions['version'] = F('version') + 1
+        expressions['updated_at'] = timezone.now()
+        
+        with transaction.atomic():
+            updated = type(self).objects.filter(pk=self.pk, **(filters or {})).update(**expressions)
+            if updated:
+                # O UPDATE mantém a linha travada até o fim da transação
+                self.refresh_from_db(fields=fields + ['updated_at'])
+        
+        self._spell_slot_snapshot = None
+        return bool(updated)
     
     # ========================================
     # SISTEMA DE HP
@@ -403,30 +625,47 @@ class Character(models.Model):
         
         return max(1, base_hp)  # Mínimo 1 HP
     
-    def take_damage(self, damage):
-        """Aplica dano ao personagem"""
+    def take_damage(self, damage, commit=True):
+        """
+        Aplica dano ao personagem em um único UPDATE atômico:
+        temporary HP absorve primeiro, o restante sai do HP atual
+        """
         damage = max(0, damage)  # Não pode ser negativo
+        temp_before = self.temporary_hp
         
-        # Primeiro, reduz temporary HP
-        if self.temporary_hp > 0:
-            temp_damage = min(damage, self.temporary_hp)
-            self.temporary_hp -= temp_damage
-            damage -= temp_damage
+        if not commit:
+            absorbed = min(damage, self.temporary_hp)
+            self.temporary_hp -= absorbed
+            self.current_hp = max(0, self.current_hp - (damage - absorbed))
+            return damage - absorbed
         
-        # Depois, reduz HP atual
-        self.current_hp = max(0, self.current_hp - damage)
-        self.save()
+        # Ambas as expressões usam os valores da linha antes do UPDATE
+        self._atomic_update(
+            temporary_hp=Greatest(F('temporary_hp') - damage, Value(0)),
+            current_hp=Greatest(
+                F('current_hp') - Greatest(Value(damage) - F('temporary_hp'), Value(0)),
+                Value(0)
+            ),
+        )
         
-        return damage
+        # Dano que passou do temporary HP (relativo ao estado carregado)
+        if self.temporary_hp > 0:
+            return 0
+        return max(0, damage - temp_before)
     
-    def heal(self, amount):
-        """Cura o personagem"""
+    def heal(self, amount, commit=True):
+        """Cura o personagem em um único UPDATE atômico (limitado ao HP máximo)"""
         amount = max(0, amount)
         old_hp = self.current_hp
-        self.current_hp = min(self.max_hp, self.current_hp + amount)
-        self.save()
         
-        return self.current_hp - old_hp  # Retorna HP efetivamente curado
+        if not commit:
+            self.current_hp = min(self.max_hp, old_hp + amount)
+        else:
+            self._atomic_update(
+                current_hp=Least(F('current_hp') + amount, F('max_hp'))
+            )
+        
+        return max(0, self.current_hp - old_hp)  # Retorna HP efetivamente curado
     
     # ========================================
     # SISTEMA DE PROGRESSÃO
@@ -442,7 +681,15 @@ class Character(models.Model):
     # ========================================
     
     def save(self, *args, **kwargs):
-        """Override save para calcular HP inicial e spell slots"""
+        """Override save para calcular HP inicial, spell slots e estatísticas derivadas"""
+        update_fields = kwargs.get('update_fields')
+        
+        # Só recalcula (e lê raça/classe) se alguma entrada mudou desde a leitura
+        if not self.pk or self._derived_inputs() != getattr(self, '_loaded_derived_inputs', None):
+            self.update_derived_stats()
+            if update_fields is not None:
+                update_fields = list(dict.fromkeys([*update_fields, *self.DERIVED_FIELDS]))
+        
         # Primeira vez sendo salvo
         if not self.pk:
             if not self.max_hp:
@@ -453,30 +700,27 @@ class Character(models.Model):
             if self.character_class.is_spellcaster:
                 self._initialize_spell_slots()
         
+        self.version += 1
+        if update_fields is not None:
+            kwargs['update_fields'] = list(dict.fromkeys([*update_fields, 'version']))
+        
         super().save(*args, **kwargs)
+        self._loaded_derived_inputs = self._derived_inputs()
+        self._spell_slot_snapshot = None
 
     def _initialize_spell_slots(self):
         """Inicializa spell slots baseado na classe e nível"""
-        try:
-            progression = ClassLevelProgression.objects.get(
-                character_class=self.character_class,
-                level=self.level
-            )
-            
-            # Para Warlock, só tem slots de um nível específico
-            for spell_level in range(1, 10):
-                max_slots = getattr(progression, f'spell_slots_{spell_level}', 0)
-                if max_slots > 0:
-                    setattr(self, f'current_spell_slots_{spell_level}', max_slots)
-                else:
-                    setattr(self, f'current_spell_slots_{spell_level}', 0)
-                    
-        except ClassLevelProgression.DoesNotExist:
-            # Se não há progressão definida, zerar todos os slots
-            for spell_level in range(1, 10):
-                setattr(self, f'current_spell_slots_{spell_level}', 0)
+        # Se não há progressão definida, todos os slots ficam zerados.
+        # Para Warlock, só há slots de um nível específico.
+        max_slots = get_progression_table().spell_slots(
+            self.character_class_id, self.level
+        ) or EMPTY_SPELL_SLOTS
+        
+        for spell_level in range(1, 10):
+            setattr(self, f'current_spell_slots_{spell_level}', max_slots[spell_level])
+        self._spell_slot_snapshot = None
 
-    def rest_short(self):
+    def rest_short(self, commit=True):
         """Descanso curto - Warlock recupera TODOS os spell slots"""
         if self.character_class.spell_slots_type == 'warlock':
             # Warlock recupera TODOS os spell slots em descanso curto
@@ -484,14 +728,17 @@ class Character(models.Model):
                 max_slots = self.get_max_spell_slots(spell_level)
                 setattr(self, f'current_spell_slots_{spell_level}', max_slots)
             
-            self.save()
+            self._spell_slot_snapshot = None
+            if commit:
+                self.save()
             return True
         
         # Outras classes podem ter mecânicas específicas aqui
-        self.save()
+        if commit:
+            self.save()
         return False
 
-    def rest_long(self):
+    def rest_long(self, commit=True):
         """Descanso longo - restaura HP e spell slots"""
         self.current_hp = self.max_hp
         self.temporary_hp = 0
@@ -501,7 +748,9 @@ class Character(models.Model):
             max_slots = self.get_max_spell_slots(spell_level)
             setattr(self, f'current_spell_slots_{spell_level}', max_slots)
         
-        self.save()
+        self._spell_slot_snapshot = None
+        if commit:
+            self.save()
 
     def level_up(self):
         """Sobe um nível e atualiza todas as estatísticas"""
@@ -524,16 +773,50 @@ class Character(models.Model):
         # Atualiza spell slots para o novo nível
         self._initialize_spell_slots()
         
+        # save() recalcula proficiência, DC e ataque de feitiços para o novo nível
         self.save()
         
-        # Limpar cache de propriedades calculadas
-        if hasattr(self, '_state'):
-            for attr in ['proficiency_bonus', 'spell_save_dc', 'spell_attack_bonus']:
-                if hasattr(self, f'_{attr}'):
-                    delattr(self, f'_{attr}')
-        
         return True
 
+class SpellPayload(models.Model):
+    """
+    Dados de um feitiço da Open5e API, armazenados uma única vez.
+
+    Endereçado pelo conteúdo: o SHA-256 do JSON canônico identifica o
+    registro, então todos os personagens que conhecem o mesmo feitiço
+    (na mesma versão da API) apontam para a mesma linha.
+    """
+    content_hash = models.CharField(max_length=64, unique=True)
+    slug = models.CharField(max_length=100, db_index=True)
+    data = models.JSONField()
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Spell Payload'
+        verbose_name_plural = 'Spell Payloads'
+    
+    def __str__(self):
+        return f"{self.slug} ({self.content_hash[:12]})"
+    
+    @staticmethod
+    def hash_data(data):
+        """SHA-256 do JSON canônico (chaves ordenadas, sem espaços)"""
+        canonical = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def for_data(cls, data, slug=''):
+        """Retorna o registro compartilhado para `data`, criando se necessário"""
+        if not data:
+            return None
+        payload, _ = cls.objects.get_or_create(
+            content_hash=cls.hash_data(data),
+            defaults={'slug': slug or data.get('slug') or data.get('key') or '', 'data': data}
+        )
+        return payload
+
+
 class CharacterSpell(models.Model):
     """
     Feitiços conhecidos/preparados por um personagem
@@ -547,12 +830,19 @@ class CharacterSpell(models.Model):
     is_prepared = models.BooleanField(default=True, help_text="False para conhecidos mas não preparados")
     is_known = models.BooleanField(default=True, help_text="Se o personagem conhece este feitiço")
     
-    # Cache de dados da API
-    api_data = models.JSONField(blank=True, null=True)
+    # Dados da API, compartilhados entre personagens
+    payload = models.ForeignKey(
+        SpellPayload, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='character_spells'
+    )
     
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     
+    # True quando fetch_spell_data serviu dados antigos do cache (Open5e fora);
+    # a action do admin avisa quantos vieram assim
+    api_data_stale = False
+    
     class Meta:
         unique_together = ['character', 'spell_slug']
         ordering = ['spell_level', 'spell_name']
@@ -563,17 +853,24 @@ class CharacterSpell(models.Model):
     def fetch_spell_data(self):
         """Busca dados do feitiço da Open5e API"""
         try:
-            response = requests.get(f"https://api.open5e.com/v2/spells/{self.spell_slug}/", timeout=10)
-            if response.status_code == 200:
-                self.api_data = response.json()
-                self.spell_name = self.api_data.get('name', self.spell_name)
-                self.spell_level = self.api_data.get('level', self.spell_level)
+            data, self.api_data_stale = get_client().get_cached(f"v2/spells/{self.spell_slug}/")
+            if data:
+                self.payload = SpellPayload.for_data(data, self.spell_slug)
+                self.spell_name = data.get('name', self.spell_name)
+                self.spell_level = data.get('level', self.spell_level)
                 self.save()
                 return True
         except Exception as e:
             print(f"Erro ao buscar dados do feitiço {self.spell_slug}: {e}")
         return False
     
+    @property
+    def api_data(self):
+        """Dados da API (do SpellPayload compartilhado) ou None"""
+        if self.payload_id is None:
+            return None
+        return self.payload.data
+    
     @property
     def description(self):
         """Retorna a descrição do feitiço"""
@@ -693,7 +990,10 @@ class Campaign(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['dm', 'created_at', 'id'], name='campaign_dm_created_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -721,9 +1021,76 @@ class CampaignCharacter(models.Model):
 # SIGNALS E UTILIDADES
 # ========================================
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
+# Mantém a tabela compilada de progressão em sincronia com o banco
+post_save.connect(invalidate_progression_table, sender=ClassLevelProgression)
+post_delete.connect(invalidate_progression_table, sender=ClassLevelProgression)
+
+# Dados de referência: qualquer alteração troca a versão do cache
+for reference_model in (Race, CharacterClass, ClassLevelProgression, Background):
+    post_save.connect(invalidate_reference_cache, sender=reference_model)
+    post_delete.connect(invalidate_reference_cache, sender=reference_model)
+
+# Catálogo de feitiços: índice de autocomplete é reconstruído sob demanda
+post_save.connect(invalidate_spell_catalog, sender=Spell)
+post_delete.connect(invalidate_spell_catalog, sender=Spell)
+post_save.connect(invalidate_spell_index, sender=Spell)
+post_delete.connect(invalidate_spell_index, sender=Spell)
+
+def refresh_derived_stats(queryset, batch_size=500):
+    """
+    Recalcula as estatísticas derivadas dos personagens do queryset,
+    gravando com bulk_update só as linhas que mudaram.
+    
+    Retorna quantos personagens foram atualizados.
+    """
+    updated = 0
+    pending, fields = [], set()
+    characters = queryset.select_related('race', 'character_class').order_by()
+    for character in characters.iterator(chunk_size=batch_size):
+        changed = character.update_derived_stats()
+        if changed:
+            pending.append(character)
+            fields.update(changed)
+        if len(pending) >= batch_size:
+            Character.objects.bulk_update(pending, sorted(fields))
+            updated += len(pending)
+            pending, fields = [], set()
+    if pending:
+        Character.objects.bulk_update(pending, sorted(fields))
+        updated += len(pending)
+    return updated
+
+
+# Campos de raça/classe que entram nas estatísticas derivadas
+RACE_STAT_FIELDS = {f'{name}_bonus' for name in Character.ABILITIES}
+CLASS_STAT_FIELDS = {'is_spellcaster', 'spellcasting_ability'}
+
+
+@receiver(post_save, sender=Race)
+@receiver(post_save, sender=CharacterClass)
+def refresh_stats_on_reference_change(sender, instance, created, update_fields=None, **kwargs):
+    """Bônus raciais e conjuração da classe alteram as colunas derivadas"""
+    relevant = RACE_STAT_FIELDS if sender is Race else CLASS_STAT_FIELDS
+    if created or (update_fields is not None and not relevant & set(update_fields)):
+        return
+    lookup = 'race' if sender is Race else 'character_class'
+    refresh_derived_stats(Character.objects.filter(**{lookup: instance}))
+
+
+@receiver([post_save, post_delete], sender=CharacterSpell)
+def touch_character_on_spell_change(sender, instance, **kwargs):
+    """
+    Feitiços fazem parte do detalhe do personagem: trocar a versão
+    invalida o ETag do detalhe
+    """
+    Character.objects.filter(pk=instance.character_id).update(
+        version=F('version') + 1, updated_at=timezone.now()
+    )
+
+
 @receiver(post_save, sender=Character)
 def initialize_character_stats(sender, instance, created, **kwargs):
     """
@@ -777,10 +1144,8 @@ def validate_spell_for_class(spell_slug, character_class):
     """
     try:
         # Buscar dados do feitiço na API
-        response = requests.get(f"https://api.open5e.com/v2/spells/{spell_slug}/", timeout=10)
-        if response.status_code == 200:
-            spell_data = response.json()
-            
+        spell_data = get_client().get_cached(f"v2/spells/{spell_slug}/").data
+        if spell_data:
             # Verificar se a classe está na lista
             if 'dnd_class' in spell_data:
                 class_names = [cls.get('name', '').lower() for cls in spell_data['dnd_class']]
@@ -788,9 +1153,9 @@ def validate_spell_for_class(spell_slug, character_class):
                     raise ValidationError(f"Feitiço não disponível para {character_class.name}")
             
             return True
-    except requests.RequestException:
+    except Open5eError as e:
         # Se não conseguir validar pela API, permite por enquanto
-        return True
+        return e.status_code is None
     
     return False
 
@@ -0,0 +1,196 @@
+# apps/characters/pagination.py - Paginação por cursor (keyset)
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def _parse_bool(value, default=True):
+    if value is None:
+        return default
+    return str(value).lower() not in ('0', 'false', 'no', 'off')
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginação por cursor sobre a ordenação completa da listagem
+    (ex: `created_at, id`), em vez de OFFSET.
+
+    O cursor guarda os valores da última linha da página; a próxima
+    página filtra `(created_at, id) < (x, y)` e lê `page_size + 1` linhas
+    pelo índice composto - o custo não cresce com a profundidade da
+    página. `?count=false` omite o COUNT(*) total (`count: null`).
+
+    Views podem definir `cursor_ordering`; uma ordenação pedida via
+    OrderingFilter é respeitada, com `id` como desempate.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = api_settings.PAGE_SIZE or 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    include_count = True
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        reverse, position = self.decode_cursor(request)
+        if position is not None:
+            position = self.clean_position(queryset, position)
+
+        self.count = None
+        if _parse_bool(request.query_params.get(self.count_query_param), self.include_count):
+            self.count = queryset.count()
+
+        if position is not None:
+            queryset = queryset.filter(self._keyset_filter(position, reverse))
+        ordering = [self._flip(field) for field in self.ordering] if reverse else self.ordering
+        rows = list(queryset.order_by(*ordering)[:self.page_size + 1])
+
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Indo para trás, "mais linhas" significa que há página anterior
+        self.has_next = (has_more if not reverse else position is not None) and bool(rows)
+        self.has_previous = (position is not None if not reverse else has_more) and bool(rows)
+        self.first_position = self._position(rows[0]) if rows else None
+        self.last_position = self._position(rows[-1]) if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    # ========================================
+    # ORDENAÇÃO E FILTRO
+    # ========================================
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, request, queryset, view):
+        """Ordenação da view (ou do OrderingFilter) terminada em `id`"""
+        ordering = list(getattr(view, 'cursor_ordering', None) or self.ordering)
+        if view is not None and OrderingFilter in getattr(view, 'filter_backends', ()):
+            requested = OrderingFilter().remove_invalid_fields(
+                queryset,
+                [term.strip() for term in request.query_params.get(api_settings.ORDERING_PARAM, '').split(',')
+                 if term.strip()],
+                view, request
+            )
+            if requested:
+                ordering = requested
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering.append('-id' if ordering[-1].startswith('-') else 'id')
+        return tuple(ordering)
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def _keyset_filter(self, position, reverse):
+        """(a, b, c) depois de (x, y, z): a > x OU (a = x E b > y) OU ..."""
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            descending = field.startswith('-') != reverse
+            name = field.lstrip('-')
+            term = Q(**{f'{name}__{"lt" if descending else "gt"}': position[i]})
+            for previous, value in zip(self.ordering[:i], position[:i]):
+                term &= Q(**{previous.lstrip('-'): value})
+            condition |= term
+        return condition
+
+    def _position(self, obj):
+        # Instâncias ou linhas de `.values()` (serializers rápidos)
+        values = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            value = obj[name] if isinstance(obj, dict) else getattr(obj, name)
+            values.append(value.isoformat() if isinstance(value, (date, datetime)) else value)
+        return values
+
+    # ========================================
+    # CURSORES
+    # ========================================
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return False, None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            reverse, position = bool(data['r']), list(data['p'])
+        except (binascii.Error, ValueError, KeyError, TypeError, UnicodeEncodeError):
+            raise NotFound('Cursor inválido')
+        if len(position) != len(self.ordering):
+            raise NotFound('Cursor inválido')
+        return reverse, position
+
+    def clean_position(self, queryset, position):
+        """Converte os valores do cursor pelos campos do model (cursor adulterado vira 404)"""
+        opts = queryset.model._meta
+        cleaned = []
+        try:
+            for field, value in zip(self.ordering, position):
+                name = field.lstrip('-')
+                model_field = opts.pk if name == 'pk' else opts.get_field(name)
+                value = model_field.to_python(value)
+                if value is None:
+                    raise ValidationError('Valor nulo no cursor')
+                cleaned.append(value)
+        except (FieldDoesNotExist, ValidationError, ValueError, TypeError):
+            raise NotFound('Cursor inválido')
+        return cleaned
+
+    def encode_cursor(self, position, reverse):
+        data = json.dumps({'r': int(reverse), 'p': position}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.last_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.first_position, reverse=True)
+
+
+class SpellKeysetPagination(KeysetPagination):
+    """Catálogo de feitiços na ordem nível, nome"""
+    ordering = ('level', 'name', 'id')
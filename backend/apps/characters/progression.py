@@ -0,0 +1,117 @@
+# apps/characters/progression.py - Tabela compilada de ClassLevelProgression
+
+from array import array
+from collections import namedtuple
+import threading
+
+from .cache import ThrottledVersion, REFERENCE_NAMESPACE
+
+
+SPELL_LEVELS = 10  # Nível 0 (cantrips) até 9
+MAX_CHARACTER_LEVEL = 20
+SPELL_SLOT_FIELDS = tuple(f'spell_slots_{i}' for i in range(SPELL_LEVELS))
+EMPTY_SPELL_SLOTS = (0,) * SPELL_LEVELS
+
+# Slots máximos e atuais de um personagem, indexados pelo nível de magia (0-9)
+SpellSlotSnapshot = namedtuple('SpellSlotSnapshot', ['max_slots', 'current_slots'])
+
+
+class ProgressionTable:
+    """
+    Tabela imutável de spell slots indexada por (class_id, level).
+
+    Cada classe ocupa um único array compacto de 20 x 10 inteiros
+    (nível do personagem x nível de magia), então uma consulta é apenas
+    aritmética de offset - sem acessar o banco.
+    """
+    __slots__ = ('_slots', '_levels')
+
+    def __init__(self, rows):
+        """
+        rows: iterável de (class_id, level, slots_0, ..., slots_9)
+        """
+        slots = {}
+        levels = set()
+        for class_id, level, *counts in rows:
+            if not 1 <= level <= MAX_CHARACTER_LEVEL:
+                continue
+            table = slots.get(class_id)
+            if table is None:
+                table = slots[class_id] = array('H', EMPTY_SPELL_SLOTS * MAX_CHARACTER_LEVEL)
+            offset = (level - 1) * SPELL_LEVELS
+            table[offset:offset + SPELL_LEVELS] = array('H', (max(0, c or 0) for c in counts))
+            levels.add((class_id, level))
+
+        self._slots = slots
+        self._levels = frozenset(levels)
+
+    def __contains__(self, key):
+        return key in self._levels
+
+    def __len__(self):
+        return len(self._levels)
+
+    def spell_slots(self, class_id, level):
+        """Retorna tupla com os 10 níveis de slots, ou None se não há progressão"""
+        if (class_id, level) not in self._levels:
+            return None
+        offset = (level - 1) * SPELL_LEVELS
+        return tuple(self._slots[class_id][offset:offset + SPELL_LEVELS])
+
+    def max_spell_slots(self, class_id, level, spell_level):
+        """Máximo de slots de um nível de magia (0 se não há progressão)"""
+        if (class_id, level) not in self._levels or not 0 <= spell_level < SPELL_LEVELS:
+            return 0
+        return self._slots[class_id][(level - 1) * SPELL_LEVELS + spell_level]
+
+
+_table = None
+_table_version = None
+_reference_version = ThrottledVersion(REFERENCE_NAMESPACE, 'PROGRESSION_VERSION_CHECK_INTERVAL')
+_lock = threading.Lock()
+
+
+def _load_table():
+    # Import local para evitar import circular com models.py
+    from .models import ClassLevelProgression
+
+    rows = ClassLevelProgression.objects.values_list(
+        'character_class_id', 'level', *SPELL_SLOT_FIELDS
+    ).order_by()
+    return ProgressionTable(rows)
+
+
+def get_progression_table():
+    """
+    Retorna a tabela do processo, carregando-a na primeira chamada.
+
+    A tabela é recarregada quando a versão de dados de referência no cache
+    muda - assim alterações feitas em outro worker também são vistas. A
+    versão (uma ida ao Redis) é consultada no máximo uma vez a cada
+    PROGRESSION_VERSION_CHECK_INTERVAL segundos; entre as consultas a
+    busca não faz I/O. Alterações no próprio processo descartam a tabela
+    na hora (signals -> invalidate_progression_table).
+    """
+    global _table, _table_version
+    version = _reference_version.get()
+    table = _table
+    if table is not None and _table_version == version:
+        return table
+
+    with _lock:
+        if _table is None or _table_version != version:
+            _table = _load_table()
+            _table_version = version
+        return _table
+
+
+def invalidate_progression_table(**kwargs):
+    """Descarta a tabela; a próxima consulta recarrega do banco.
+
+    Aceita **kwargs para poder ser conectada diretamente a signals.
+    """
+    global _table, _table_version
+    with _lock:
+        _table = None
+        _table_version = None
+        _reference_version.reset()
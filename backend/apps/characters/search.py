@@ -0,0 +1,258 @@
+# apps/characters/search.py - Busca textual ranqueada no catálogo de feitiços
+
+import difflib
+import re
+from collections import namedtuple
+
+from django.db import connection
+
+
+SPELL_TABLE = 'characters_spell'
+FTS_TABLE = 'characters_spell_fts'
+
+# Resultado ranqueado: `highlight` traz nome/descrição com <mark>...</mark>
+SearchHit = namedtuple('SearchHit', ['spell_id', 'rank', 'highlight'])
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+# ========================================
+# SQL DOS ÍNDICES
+# ========================================
+
+POSTGRES_INSTALL_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""
+    ALTER TABLE {SPELL_TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(school, '') || ' ' ||
+                              replace(coalesce(class_keys, ''), ',', ' ')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    f"CREATE INDEX IF NOT EXISTS {SPELL_TABLE}_search_idx ON {SPELL_TABLE} USING GIN (search_vector)",
+    f"CREATE INDEX IF NOT EXISTS {SPELL_TABLE}_name_trgm_idx ON {SPELL_TABLE} USING GIN (name gin_trgm_ops)",
+]
+
+POSTGRES_UNINSTALL_SQL = [
+    f"DROP INDEX IF EXISTS {SPELL_TABLE}_name_trgm_idx",
+    f"DROP INDEX IF EXISTS {SPELL_TABLE}_search_idx",
+    f"ALTER TABLE {SPELL_TABLE} DROP COLUMN IF EXISTS search_vector",
+]
+
+_FTS_COLUMNS = 'name, description, school, class_keys'
+
+SQLITE_INSTALL_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {_FTS_COLUMNS}, content='{SPELL_TABLE}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {SPELL_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS})
+        VALUES (new.id, new.name, new.description, new.school, new.class_keys);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {SPELL_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_FTS_COLUMNS})
+        VALUES ('delete', old.id, old.name, old.description, old.school, old.class_keys);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {SPELL_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_FTS_COLUMNS})
+        VALUES ('delete', old.id, old.name, old.description, old.school, old.class_keys);
+        INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS})
+        VALUES (new.id, new.name, new.description, new.school, new.class_keys);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def install_search_index(schema_editor):
+    """Cria (ou reconstrói) o índice do banco atual; outros bancos são ignorados"""
+    statements = {
+        'postgresql': POSTGRES_INSTALL_SQL,
+        'sqlite': SQLITE_INSTALL_SQL,
+    }.get(schema_editor.connection.vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+    _available.clear()
+
+
+def uninstall_search_index(schema_editor):
+    statements = {
+        'postgresql': POSTGRES_UNINSTALL_SQL,
+        'sqlite': SQLITE_UNINSTALL_SQL,
+    }.get(schema_editor.connection.vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+    _available.clear()
+
+
+# ========================================
+# FILTROS E CONSULTA
+# ========================================
+
+def _tokens(query):
+    return TOKEN_RE.findall(query.lower())[:10]
+
+
+def _filter_sql(spell_class, level, school, alias='s'):
+    """WHERE adicional (classe/nível/escola) compartilhado pelos backends"""
+    clauses, params = [], []
+    if spell_class:
+        clauses.append(f"{alias}.class_keys LIKE %s")
+        params.append(f'%,{spell_class.lower()},%')
+    if level is not None:
+        clauses.append(f"{alias}.level = %s")
+        params.append(level)
+    if school:
+        clauses.append(f"LOWER({alias}.school) = %s")
+        params.append(school.lower())
+    return ''.join(f' AND {clause}' for clause in clauses), params
+
+
+class PostgresSpellSearch:
+    """tsvector ponderado (nome > escola/classes > descrição) + pg_trgm para erros de digitação"""
+
+    def search(self, query, spell_class='', level=None, school='', limit=20):
+        tokens = _tokens(query)
+        if not tokens:
+            return [], 0
+
+        # Prefixo em cada termo: "fire bal" -> fire:* & bal:*
+        tsquery = ' & '.join(f'{token}:*' for token in tokens)
+        extra, extra_params = _filter_sql(spell_class, level, school)
+        matches = f"""
+            FROM {SPELL_TABLE} s, to_tsquery('english', %s) query
+            WHERE (s.search_vector @@ query OR s.name %% %s){extra}
+        """
+        params = [tsquery, query] + extra_params
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT ranked.id, ranked.rank,
+                       ts_headline('english', ranked.name, ranked.query,
+                                   'StartSel=<mark>, StopSel=</mark>, HighlightAll=true'),
+                       ts_headline('english', ranked.description, ranked.query,
+                                   'StartSel=<mark>, StopSel=</mark>, MaxWords=20, MinWords=8')
+                FROM (
+                    SELECT s.id, s.name, s.description, query,
+                           ts_rank_cd(s.search_vector, query) * 2 + similarity(s.name, %s) AS rank
+                    {matches}
+                    ORDER BY rank DESC, s.name
+                    LIMIT %s
+                ) ranked
+                ORDER BY ranked.rank DESC, ranked.name
+            """, [query] + params + [limit])
+            hits = [
+                SearchHit(spell_id, rank, {'name': name, 'description': description})
+                for spell_id, rank, name, description in cursor.fetchall()
+            ]
+            cursor.execute(f"SELECT COUNT(*) {matches}", params)
+            total = cursor.fetchone()[0]
+        return hits, total
+
+
+class SqliteSpellSearch:
+    """FTS5 (bm25) para desenvolvimento; erros de digitação via difflib nos nomes"""
+
+    # Pesos do bm25 na ordem das colunas: name, description, school, class_keys
+    weights = (10.0, 1.0, 3.0, 3.0)
+
+    def search(self, query, spell_class='', level=None, school='', limit=20):
+        tokens = _tokens(query)
+        if not tokens:
+            return [], 0
+
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        extra, extra_params = _filter_sql(spell_class, level, school)
+        matches = f"""
+            FROM {FTS_TABLE} JOIN {SPELL_TABLE} s ON s.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH %s{extra}
+        """
+        params = [match] + extra_params
+        weights = ', '.join(str(weight) for weight in self.weights)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT s.id, -bm25({FTS_TABLE}, {weights}) AS rank,
+                       highlight({FTS_TABLE}, 0, '<mark>', '</mark>'),
+                       snippet({FTS_TABLE}, 1, '<mark>', '</mark>', '…', 20)
+                {matches}
+                ORDER BY rank DESC, s.name
+                LIMIT %s
+            """, params + [limit])
+            hits = [
+                SearchHit(spell_id, rank, {'name': name, 'description': description})
+                for spell_id, rank, name, description in cursor.fetchall()
+            ]
+            if hits:
+                cursor.execute(f"SELECT COUNT(*) {matches}", params)
+                return hits, cursor.fetchone()[0]
+
+            # Nenhum termo casou: tenta nomes parecidos (erro de digitação)
+            cursor.execute(
+                f"SELECT s.id, s.name FROM {SPELL_TABLE} s WHERE 1 = 1{extra}", extra_params
+            )
+            names = {}
+            for spell_id, name in cursor.fetchall():
+                names.setdefault(name.lower(), spell_id)
+
+        close = difflib.get_close_matches(query.lower(), names, n=limit, cutoff=0.6)
+        hits = [
+            SearchHit(names[name], difflib.SequenceMatcher(None, query.lower(), name).ratio(), None)
+            for name in close
+        ]
+        return hits, len(hits)
+
+
+_available = {}
+
+
+def _sqlite_index_ready():
+    """FTS5 e triggers presentes (uma reconstrução da tabela no SQLite remove triggers)"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+            [FTS_TABLE, f'{FTS_TABLE}_ai', f'{FTS_TABLE}_ad', f'{FTS_TABLE}_au']
+        )
+        return cursor.fetchone()[0] == 4
+
+
+def _postgres_index_ready():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM information_schema.columns WHERE table_name = %s AND column_name = 'search_vector'",
+            [SPELL_TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def get_search_backend():
+    """
+    Backend de busca do banco atual, ou None se o índice não existe
+    (MySQL, FTS5 indisponível...) - nesse caso a view usa icontains
+    """
+    vendor = connection.vendor
+    if vendor not in _available:
+        if vendor == 'postgresql':
+            _available[vendor] = PostgresSpellSearch() if _postgres_index_ready() else None
+        elif vendor == 'sqlite':
+            _available[vendor] = SqliteSpellSearch() if _sqlite_index_ready() else None
+        else:
+            _available[vendor] = None
+    return _available[vendor]
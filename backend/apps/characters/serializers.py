@@ -4,11 +4,12 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import (
     Race, CharacterClass, ClassLevelProgression, Background,
-    Character, CharacterSpell, Equipment, Campaign
+    Character, CharacterSpell, Equipment, Campaign, Spell, SpellPayload
 )
+from .fieldsets import DynamicFieldsMixin
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer básico para User"""
     class Meta:
         model = User
@@ -16,7 +17,7 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class RaceSerializer(serializers.ModelSerializer):
+class RaceSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer para Race com dados da API"""
     ability_bonuses = serializers.SerializerMethodField()
     traits = serializers.SerializerMethodField()
@@ -47,7 +48,7 @@ class RaceSerializer(serializers.ModelSerializer):
         return obj.traits if hasattr(obj, 'traits') else []
 
 
-class CharacterClassSerializer(serializers.ModelSerializer):
+class CharacterClassSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer para CharacterClass"""
     spell_slots_type_display = serializers.CharField(source='get_spell_slots_type_display', read_only=True)
     
@@ -86,7 +87,7 @@ class ClassLevelProgressionSerializer(serializers.ModelSerializer):
         return slots
 
 
-class BackgroundSerializer(serializers.ModelSerializer):
+class BackgroundSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer para Background"""
     class Meta:
         model = Background
@@ -97,7 +98,7 @@ class BackgroundSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class CharacterSpellSerializer(serializers.ModelSerializer):
+class CharacterSpellSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer para feitiços do personagem"""
     spell_details = serializers.SerializerMethodField()
     
@@ -108,10 +109,28 @@ class CharacterSpellSerializer(serializers.ModelSerializer):
             'is_prepared', 'is_known', 'spell_details', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
+        extra_kwargs = {
+            'spell_name': {'required': False},
+            'spell_level': {'required': False},
+        }
+    
+    def validate(self, data):
+        """Nome, nível e dados da API vêm do catálogo local quando disponível"""
+        if self.instance is None:
+            catalog_spell = Spell.objects.filter(slug=data.get('spell_slug')).first()
+            if catalog_spell:
+                data['spell_name'] = catalog_spell.name
+                data['spell_level'] = catalog_spell.level
+                data['payload'] = SpellPayload.for_data(catalog_spell.api_data, catalog_spell.slug)
+            elif 'spell_name' not in data or 'spell_level' not in data:
+                raise serializers.ValidationError(
+                    "spell_name e spell_level são obrigatórios para feitiços fora do catálogo"
+                )
+        return data
     
     def get_spell_details(self, obj):
         """Retorna detalhes do feitiço da API se disponível"""
-        if obj.api_data:
+        if obj.payload_id:
             return {
                 'description': obj.description,
                 'casting_time': obj.casting_time,
@@ -123,7 +142,7 @@ class CharacterSpellSerializer(serializers.ModelSerializer):
         return None
 
 
-class CharacterListSerializer(serializers.ModelSerializer):
+class CharacterListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer simplificado para lista de personagens"""
     user = UserSerializer(read_only=True)
     race = RaceSerializer(read_only=True)
@@ -139,7 +158,7 @@ class CharacterListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class CharacterDetailSerializer(serializers.ModelSerializer):
+class CharacterDetailSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer completo para detalhes do personagem"""
     user = UserSerializer(read_only=True)
     race = RaceSerializer(read_only=True)
@@ -158,7 +177,7 @@ class CharacterDetailSerializer(serializers.ModelSerializer):
         model = Character
         fields = [
             'id', 'name', 'user', 'race', 'character_class', 'background',
-            'level', 'experience_points',
+            'level', 'experience_points', 'version',
             # Atributos base
             'base_strength', 'base_dexterity', 'base_constitution',
             'base_intelligence', 'base_wisdom', 'base_charisma',
@@ -179,7 +198,7 @@ class CharacterDetailSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = [
             'id', 'final_abilities', 'ability_modifiers', 'combat_stats',
-            'spell_slots_current', 'spell_slots_max', 'max_hp',
+            'spell_slots_current', 'spell_slots_max', 'max_hp', 'version',
             'created_at', 'updated_at'
         ]
     
@@ -224,23 +243,35 @@ class CharacterDetailSerializer(serializers.ModelSerializer):
     
     def get_spell_slots_current(self, obj):
         """Retorna spell slots atuais"""
+        snapshot = obj.get_spell_slot_snapshot()
         slots = {}
         for i in range(1, 10):
-            current = obj.get_current_spell_slots(i)
-            if current > 0 or obj.get_max_spell_slots(i) > 0:
+            current = snapshot.current_slots[i]
+            if current > 0 or snapshot.max_slots[i] > 0:
                 slots[str(i)] = current
         return slots
     
     def get_spell_slots_max(self, obj):
         """Retorna spell slots máximos"""
+        snapshot = obj.get_spell_slot_snapshot()
         slots = {}
         for i in range(1, 10):
-            maximum = obj.get_max_spell_slots(i)
+            maximum = snapshot.max_slots[i]
             if maximum > 0:
                 slots[str(i)] = maximum
         return slots
 
 
+class CharacterStateSerializer(CharacterDetailSerializer):
+    """Parte mutável do detalhe do personagem - base das respostas delta"""
+    
+    class Meta(CharacterDetailSerializer.Meta):
+        fields = [
+            'id', 'version', 'level', 'current_hp', 'max_hp', 'temporary_hp',
+            'combat_stats', 'spell_slots_current', 'spell_slots_max'
+        ]
+
+
 class CharacterCreateSerializer(serializers.ModelSerializer):
     """Serializer para criação de personagem com validações"""
     
@@ -327,7 +358,7 @@ class SpellSearchSerializer(serializers.Serializer):
     duration = serializers.CharField()
 
 
-class CampaignSerializer(serializers.ModelSerializer):
+class CampaignSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer para Campaign"""
     dm = UserSerializer(read_only=True)
     players = UserSerializer(many=True, read_only=True)
@@ -407,4 +438,40 @@ class UseSpellSlotSerializer(serializers.Serializer):
         if current_slots <= 0:
             raise serializers.ValidationError(f"Sem spell slots de nível {value} disponíveis")
         
-        return value    
\ No newline at end of file
+        return value    
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    """Uma operação dentro de um lote de ações de combate"""
+    ACTION_CHOICES = [
+        ('damage', 'Damage'),
+        ('heal', 'Heal'),
+        ('use_spell_slot', 'Use Spell Slot'),
+        ('rest', 'Rest')
+    ]
+    
+    character = serializers.IntegerField()
+    action = serializers.ChoiceField(choices=ACTION_CHOICES)
+    amount = serializers.IntegerField(min_value=0, required=False)
+    spell_level = serializers.IntegerField(min_value=1, max_value=9, required=False)
+    rest_type = serializers.ChoiceField(choices=RestSerializer.REST_CHOICES, required=False)
+    
+    REQUIRED_FIELDS = {
+        'damage': 'amount',
+        'heal': 'amount',
+        'use_spell_slot': 'spell_level',
+        'rest': 'rest_type',
+    }
+    
+    def validate(self, data):
+        required = self.REQUIRED_FIELDS[data['action']]
+        if required not in data:
+            raise serializers.ValidationError({
+                required: f"Obrigatório para a ação '{data['action']}'"
+            })
+        return data
+
+
+class BatchActionSerializer(serializers.Serializer):
+    """Serializer para lote de ações aplicadas em uma única transação"""
+    operations = BatchOperationSerializer(many=True, allow_empty=False, max_length=100)
@@ -0,0 +1,270 @@
+# apps/characters/spell_index.py - Índices em memória do catálogo de feitiços
+# (autocomplete por prefixo e facetas)
+
+from bisect import bisect_left
+from collections import namedtuple
+import threading
+import unicodedata
+
+from .cache import ThrottledVersion, SPELL_NAMESPACE
+
+
+# Dados mínimos de um feitiço para sugestões (sem tocar no ORM)
+SpellEntry = namedtuple('SpellEntry', ['id', 'name', 'slug', 'level', 'school', 'classes'])
+
+
+def normalize(text):
+    """Minúsculas e sem acentos, para casar 'bola' com 'Bóla'"""
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower().strip()
+
+
+class SpellNameIndex:
+    """
+    Arrays ordenados de chaves normalizadas + bisect.
+
+    `_name_keys` tem o nome completo e o slug de cada feitiço; `_word_keys`
+    tem cada palavra do nome a partir da segunda. Uma busca localiza o
+    início do prefixo com bisect e percorre só as chaves que casam -
+    O(log n + k), sem queries.
+    """
+    __slots__ = ('_entries', '_name_keys', '_name_refs', '_word_keys', '_word_refs')
+
+    def __init__(self, rows):
+        """
+        rows: iterável de (id, name, slug, level, school, class_keys)
+        """
+        entries = []
+        name_pairs = []
+        word_pairs = []
+        for spell_id, name, slug, level, school, class_keys in rows:
+            position = len(entries)
+            entries.append(SpellEntry(
+                spell_id, name, slug, level, school,
+                frozenset(key for key in (class_keys or '').split(',') if key)
+            ))
+            normalized = normalize(name)
+            name_pairs.append((normalized, position))
+            if slug and slug != normalized:
+                name_pairs.append((slug.lower(), position))
+            for word in normalized.split()[1:]:
+                word_pairs.append((word, position))
+
+        name_pairs.sort()
+        word_pairs.sort()
+        self._entries = tuple(entries)
+        self._name_keys = [key for key, _ in name_pairs]
+        self._name_refs = [ref for _, ref in name_pairs]
+        self._word_keys = [key for key, _ in word_pairs]
+        self._word_refs = [ref for _, ref in word_pairs]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def suggest(self, prefix, spell_class=None, level=None, limit=10):
+        """
+        Até `limit` feitiços cujo nome/slug (ou uma palavra do nome)
+        começa com `prefix`. Casamentos no início do nome vêm primeiro,
+        em ordem alfabética.
+        """
+        prefix = normalize(prefix)
+        if not prefix or limit <= 0:
+            return []
+        spell_class = spell_class.lower() if spell_class else None
+
+        results = []
+        seen = set()
+        for keys, refs in ((self._name_keys, self._name_refs), (self._word_keys, self._word_refs)):
+            i = bisect_left(keys, prefix)
+            while i < len(keys) and keys[i].startswith(prefix):
+                position = refs[i]
+                i += 1
+                if position in seen:
+                    continue
+                entry = self._entries[position]
+                if spell_class and spell_class not in entry.classes:
+                    continue
+                if level is not None and entry.level != level:
+                    continue
+                seen.add(position)
+                results.append(entry)
+                if len(results) >= limit:
+                    return results
+        return results
+
+
+# ========================================
+# FACETAS (BITMAPS)
+# ========================================
+
+# Feitiço no índice de facetas; `class_keys` no formato ',wizard,sorcerer,'
+FacetEntry = namedtuple('FacetEntry', [
+    'id', 'name', 'slug', 'level', 'school', 'class_keys',
+    'casting_time', 'range', 'concentration', 'ritual'
+])
+
+FACETS = ('level', 'school', 'class', 'concentration', 'ritual')
+
+
+def _facet_values(entry):
+    """Valores de cada faceta de um feitiço (classe pode ter vários)"""
+    return {
+        'level': (entry.level,),
+        'school': (entry.school.lower(),) if entry.school else (),
+        'class': tuple(key for key in entry.class_keys.split(',') if key),
+        'concentration': (bool(entry.concentration),),
+        'ritual': (bool(entry.ritual),),
+    }
+
+
+class SpellFacetIndex:
+    """
+    Bitmaps pré-computados por valor de faceta.
+
+    Cada feitiço ocupa um bit (na ordem nível, nome); cada valor de faceta
+    guarda um inteiro Python com os bits dos feitiços que o têm. Filtros
+    viram AND/OR de inteiros e contagens viram `bit_count()` - nada de
+    varrer o catálogo ou consultar o banco.
+    """
+    __slots__ = ('_entries', '_bitmaps', '_all')
+
+    def __init__(self, rows):
+        """
+        rows: iterável na ordem de FacetEntry._fields, já ordenado
+        """
+        entries = []
+        bitmaps = {facet: {} for facet in FACETS}
+        for position, row in enumerate(rows):
+            entry = FacetEntry(*row)
+            entries.append(entry)
+            bit = 1 << position
+            for facet, values in _facet_values(entry).items():
+                for value in values:
+                    bitmaps[facet][value] = bitmaps[facet].get(value, 0) | bit
+
+        self._entries = tuple(entries)
+        self._bitmaps = bitmaps
+        self._all = (1 << len(entries)) - 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _facet_mask(self, facet, values):
+        """OR dos bitmaps dos valores escolhidos para uma faceta"""
+        mask = 0
+        for value in values:
+            mask |= self._bitmaps[facet].get(value, 0)
+        return mask
+
+    def search(self, filters, offset=0, limit=50):
+        """
+        filters: {faceta: [valores]} - valores de uma faceta combinam com
+        OR, facetas diferentes com AND.
+
+        Retorna (total, feitiços da página, contagens por faceta). A
+        contagem de uma faceta ignora o filtro dela mesma, para a interface
+        mostrar quantos resultados cada alternativa traria.
+        """
+        masks = {
+            facet: self._facet_mask(facet, values)
+            for facet, values in filters.items() if values
+        }
+
+        matched = self._all
+        for mask in masks.values():
+            matched &= mask
+
+        counts = {}
+        for facet in FACETS:
+            base = self._all
+            for other, mask in masks.items():
+                if other != facet:
+                    base &= mask
+            counts[facet] = {
+                value: count
+                for value, bitmap in sorted(self._bitmaps[facet].items())
+                if (count := (bitmap & base).bit_count())
+            }
+
+        return matched.bit_count(), self._page(matched, offset, limit), counts
+
+    def _page(self, mask, offset, limit):
+        """Feitiços dos bits ligados em `mask`, na ordem do índice"""
+        page = []
+        while mask and len(page) < limit:
+            low = mask & -mask
+            position = low.bit_length() - 1
+            mask ^= low
+            if offset:
+                offset -= 1
+                continue
+            page.append(self._entries[position])
+        return page
+
+
+# ========================================
+# CARREGAMENTO
+# ========================================
+
+class _VersionedIndex:
+    """
+    Índice do processo construído sob demanda e reconstruído quando a
+    versão do catálogo de feitiços no cache muda (sync, admin ou outro
+    worker). A versão é consultada no máximo uma vez a cada
+    SPELL_INDEX_VERSION_CHECK_INTERVAL segundos; alterações no próprio
+    processo descartam o índice na hora (signals -> invalidate_spell_index).
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._index = None
+        self._version = None
+        self._catalog_version = ThrottledVersion(SPELL_NAMESPACE, 'SPELL_INDEX_VERSION_CHECK_INTERVAL')
+        self._lock = threading.Lock()
+
+    def get(self):
+        version = self._catalog_version.get()
+        index = self._index
+        if index is None or self._version != version:
+            with self._lock:
+                if self._index is None or self._version != version:
+                    self._index = self._loader()
+                    self._version = version
+                index = self._index
+        return index
+
+    def invalidate(self):
+        with self._lock:
+            self._index = None
+            self._version = None
+            self._catalog_version.reset()
+
+
+def _load_name_index():
+    # Import local para evitar import circular com models.py
+    from .models import Spell
+
+    rows = Spell.objects.values_list(
+        'id', 'name', 'slug', 'level', 'school', 'class_keys'
+    ).order_by()
+    return SpellNameIndex(rows)
+
+
+def _load_facet_index():
+    from .models import Spell
+
+    rows = Spell.objects.values_list(*FacetEntry._fields).order_by('level', 'name')
+    return SpellFacetIndex(rows)
+
+
+_name_index = _VersionedIndex(_load_name_index)
+_facet_index = _VersionedIndex(_load_facet_index)
+
+get_spell_index = _name_index.get
+get_facet_index = _facet_index.get
+
+
+def invalidate_spell_index(**kwargs):
+    """Descarta os índices locais; aceita **kwargs para uso em signals"""
+    _name_index.invalidate()
+    _facet_index.invalidate()
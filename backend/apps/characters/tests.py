@@ -1,3 +1,1011 @@
+import base64
+import io
+import json
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+try:
+    import msgpack
+except ImportError:  # msgpack é opcional
+    msgpack = None
+
+from django.contrib import messages
+from django.contrib.admin import site
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from apps.api_integration.client import CachedPayload
+from core import renderers
+from core.parsers import FastJSONParser, MessagePackParser
+from core.renderers import FastJSONRenderer, MessagePackRenderer
+from .admin import CharacterSpellAdmin
+from .cache import REFERENCE_NAMESPACE, SPELL_NAMESPACE, bump_version, get_version
+from .fast_serializers import serialize_character_detail, serialize_character_list, CHARACTER_DETAIL_FIELDS
+from .hydration import SpellHydrationQueue, hydrate_spell
+from .models import (
+    Race, CharacterClass, ClassLevelProgression, Background, Character, CharacterSpell, Campaign,
+    CampaignCharacter, Spell, SpellPayload
+)
+from .progression import get_progression_table, invalidate_progression_table
+from .serializers import CharacterDetailSerializer, CharacterListSerializer
+from .spell_index import SpellNameIndex
+
+
+class CharacterTestMixin:
+    """Cria usuário, raça, classe conjuradora e progressão mínima"""
+
+    def setUp(self):
+        invalidate_progression_table()
+
+        self.user = User.objects.create_user(username='tester', password='testpass123')
+        self.race = Race.objects.create(slug='elf', name='Elf', dexterity_bonus=2)
+        self.wizard = CharacterClass.objects.create(
+            slug='wizard', name='Wizard', hit_die=6, is_spellcaster=True,
+            spellcasting_ability='intelligence', spell_slots_type='full'
+        )
+        ClassLevelProgression.objects.create(
+            character_class=self.wizard, level=1, spell_slots_0=3, spell_slots_1=2
+        )
+        ClassLevelProgression.objects.create(
+            character_class=self.wizard, level=3, spell_slots_0=3,
+            spell_slots_1=4, spell_slots_2=2
+        )
+        self.character = Character.objects.create(
+            user=self.user, name='Elminster', race=self.race,
+            character_class=self.wizard, level=3,
+            base_intelligence=15, base_dexterity=14
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def detail_url(self, action=None):
+        url = f'/api/characters/characters/{self.character.pk}/'
+        return f'{url}{action}/' if action else url
+
+
+class ProgressionTableTests(CharacterTestMixin, TestCase):
+
+    def test_lookups_match_progression_rows(self):
+        table = get_progression_table()
+
+        self.assertEqual(table.spell_slots(self.wizard.pk, 1), (3, 2, 0, 0, 0, 0, 0, 0, 0, 0))
+        self.assertEqual(table.spell_slots(self.wizard.pk, 3)[:3], (3, 4, 2))
+        self.assertIsNone(table.spell_slots(self.wizard.pk, 2))
+        self.assertIsNone(table.spell_slots(self.wizard.pk + 1000, 1))
+        self.assertEqual(table.max_spell_slots(self.wizard.pk, 3, 2), 2)
+        self.assertEqual(table.max_spell_slots(self.wizard.pk, 3, 10), 0)
+        self.assertIn((self.wizard.pk, 3), table)
+        self.assertEqual(len(table), 2)
+
+    def test_reloads_after_progression_save_and_delete(self):
+        get_progression_table()
+
+        row = ClassLevelProgression.objects.create(
+            character_class=self.wizard, level=5, spell_slots_1=4, spell_slots_2=3, spell_slots_3=2
+        )
+        self.assertEqual(get_progression_table().spell_slots(self.wizard.pk, 5)[1:4], (4, 3, 2))
+
+        row.spell_slots_3 = 3
+        row.save()
+        self.assertEqual(get_progression_table().max_spell_slots(self.wizard.pk, 5, 3), 3)
+
+        row.delete()
+        self.assertIsNone(get_progression_table().spell_slots(self.wizard.pk, 5))
+
+    def test_cache_version_checked_at_most_once_per_interval(self):
+        get_progression_table()
+        # Outro worker alterou a progressão: só a versão no cache muda
+        ClassLevelProgression.objects.filter(character_class=self.wizard, level=1).update(spell_slots_1=9)
+        bump_version(REFERENCE_NAMESPACE)
+
+        with mock.patch('apps.characters.cache.get_version', wraps=get_version) as version:
+            for _ in range(3):
+                self.assertEqual(get_progression_table().max_spell_slots(self.wizard.pk, 1, 1), 2)
+            self.assertEqual(version.call_count, 0)
+
+            later = time.monotonic() + 60
+            with mock.patch('apps.characters.cache.time.monotonic', return_value=later):
+                self.assertEqual(get_progression_table().max_spell_slots(self.wizard.pk, 1, 1), 9)
+            self.assertEqual(version.call_count, 1)
+
+
+class SpellSlotSnapshotTests(CharacterTestMixin, TestCase):
+
+    def test_snapshot_matches_progression(self):
+        snapshot = self.character.get_spell_slot_snapshot()
+        self.assertEqual(snapshot.max_slots[1:3], (4, 2))
+        self.assertEqual(snapshot.current_slots[1:3], (4, 2))
+
+    def test_detail_query_count_is_fixed(self):
+        get_progression_table()  # tabela já carregada no processo
+
+        # Validadores do ETag (version/updated_at) + personagem (select_related)
+        # + prefetch de spells - independente do número de níveis de magia
+        with self.assertNumQueries(3):
+            response = self.client.get(self.detail_url())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['spell_slots_max'], {'1': 4, '2': 2})
+        self.assertEqual(response.data['spell_slots_current'], {'1': 4, '2': 2})
+
+    def test_use_spell_slot_refreshes_snapshot(self):
+        response = self.client.post(self.detail_url('use_spell_slot'), {'spell_level': 2})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['character']['spell_slots_current'], {'1': 4, '2': 1})
+
+
+class AtomicMutationTests(CharacterTestMixin, TestCase):
+
+    def test_take_damage_consumes_temporary_hp_first(self):
+        Character.objects.filter(pk=self.character.pk).update(temporary_hp=5)
+        self.character.refresh_from_db()
+        hp = self.character.current_hp
+
+        applied = self.character.take_damage(8)
+
+        self.assertEqual(applied, 3)
+        self.assertEqual(self.character.temporary_hp, 0)
+        self.assertEqual(self.character.current_hp, hp - 3)
+
+    def test_take_damage_uses_database_state(self):
+        # Outra requisição já causou dano; a instância carregada está desatualizada
+        Character.objects.filter(pk=self.character.pk).update(current_hp=4)
+
+        self.character.take_damage(3)
+
+        self.assertEqual(self.character.current_hp, 1)
+        self.character.take_damage(10)
+        self.assertEqual(self.character.current_hp, 0)
+
+    def test_heal_is_capped_at_max_hp(self):
+        self.character.take_damage(5)
+
+        healed = self.character.heal(50)
+
+        self.assertEqual(healed, 5)
+        self.assertEqual(self.character.current_hp, self.character.max_hp)
+
+    def test_use_spell_slot_fails_when_exhausted(self):
+        self.assertTrue(self.character.use_spell_slot(2))
+        self.assertTrue(self.character.use_spell_slot(2))
+        self.assertFalse(self.character.use_spell_slot(2))
+
+        self.character.refresh_from_db()
+        self.assertEqual(self.character.current_spell_slots_2, 0)
+
+
+class BatchActionTests(CharacterTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.player = User.objects.create_user(username='player', password='testpass123')
+        self.fighter = Character.objects.create(
+            user=self.player, name='Bruenor', race=self.race,
+            character_class=CharacterClass.objects.create(slug='fighter', name='Fighter', hit_die=10),
+            base_constitution=15
+        )
+        self.campaign = Campaign.objects.create(name='Phandelver', dm=self.user)
+        self.campaign.players.add(self.player)
+        CampaignCharacter.objects.create(campaign=self.campaign, character=self.fighter)
+        self.url = '/api/characters/characters/batch_actions/'
+
+    def test_applies_operations_and_returns_deltas(self):
+        response = self.client.post(self.url, {'operations': [
+            {'character': self.character.pk, 'action': 'damage', 'amount': 4},
+            {'character': self.fighter.pk, 'action': 'damage', 'amount': 4},
+            {'character': self.character.pk, 'action': 'use_spell_slot', 'spell_level': 1},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.character.refresh_from_db()
+        self.fighter.refresh_from_db()
+        self.assertEqual(response.data['deltas'][self.character.pk], {
+            'current_hp': self.character.current_hp, 'current_spell_slots_1': 3,
+            'version': self.character.version
+        })
+        self.assertEqual(response.data['deltas'][self.fighter.pk], {
+            'current_hp': self.fighter.max_hp - 4, 'version': self.fighter.version
+        })
+
+    def test_unknown_character_aborts_batch(self):
+        outsider = User.objects.create_user(username='outsider', password='testpass123')
+        other = Character.objects.create(
+            user=outsider, name='Drizzt', race=self.race, character_class=self.wizard
+        )
+
+        response = self.client.post(self.url, {'operations': [
+            {'character': self.character.pk, 'action': 'damage', 'amount': 4},
+            {'character': other.pk, 'action': 'damage', 'amount': 4},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.data['missing'], [other.pk])
+        self.character.refresh_from_db()
+        self.assertEqual(self.character.current_hp, self.character.max_hp)
+
+    def test_dm_cannot_touch_player_characters_outside_campaign(self):
+        # Mesmo jogador da campanha, mas personagem não vinculado a ela
+        other = Character.objects.create(
+            user=self.player, name='Wulfgar', race=self.race, character_class=self.fighter.character_class
+        )
+        inactive = Character.objects.create(
+            user=self.player, name='Regis', race=self.race, character_class=self.fighter.character_class
+        )
+        CampaignCharacter.objects.create(campaign=self.campaign, character=inactive, is_active=False)
+
+        response = self.client.post(self.url, {'operations': [
+            {'character': other.pk, 'action': 'damage', 'amount': 4},
+            {'character': inactive.pk, 'action': 'damage', 'amount': 4},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.data['missing'], sorted([other.pk, inactive.pk]))
+        other.refresh_from_db()
+        self.assertEqual(other.current_hp, other.max_hp)
+
+
+class DeltaResponseTests(CharacterTestMixin, TestCase):
+
+    def test_take_damage_delta_returns_only_changed_fields(self):
+        version = self.character.version
+
+        response = self.client.post(
+            self.detail_url('take_damage') + '?response=delta', {'damage': 3}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['character'], {
+            'id': self.character.pk,
+            'version': version + 1,
+            'current_hp': self.character.max_hp - 3,
+        })
+
+    def test_delta_via_accept_header(self):
+        response = self.client.post(
+            self.detail_url('use_spell_slot'), {'spell_level': 1},
+            HTTP_ACCEPT='application/json; view=delta'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['character']), {'id', 'version', 'spell_slots_current'})
+
+    def test_full_payload_by_default(self):
+        response = self.client.post(self.detail_url('heal'), {'healing': 1})
+
+        self.assertEqual(response.status_code, 400)  # HP já no máximo
+        response = self.client.post(self.detail_url('take_damage'), {'damage': 1})
+        self.assertIn('spells', response.data['character'])
+
+
+class ReferenceCacheTests(CharacterTestMixin, TestCase):
+
+    def test_cache_hit_skips_database(self):
+        url = '/api/characters/races/'
+        first = self.client.get(url)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+
+        self.assertEqual(first.data, second.data)
+
+    def test_model_save_invalidates_cache(self):
+        url = f'/api/characters/races/{self.race.pk}/'
+        self.client.get(url)
+
+        self.race.name = 'High Elf'
+        self.race.save()
+
+        self.assertEqual(self.client.get(url).data['name'], 'High Elf')
+
+    def test_creation_data_is_cached(self):
+        self.client.get('/api/characters/creation-data/')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/characters/creation-data/')
+
+        self.assertEqual([race['slug'] for race in response.data['races']], ['elf'])
+
+
+class ConditionalGetTests(CharacterTestMixin, TestCase):
+
+    def test_detail_returns_304_when_unchanged(self):
+        response = self.client.get(self.detail_url())
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(1):
+            cached = self.client.get(self.detail_url(), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], etag)
+
+    def test_detail_etag_changes_after_mutation(self):
+        etag = self.client.get(self.detail_url())['ETag']
+
+        self.client.post(self.detail_url('take_damage'), {'damage': 1})
+
+        response = self.client.get(self.detail_url(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_etag_changes_when_character_added(self):
+        url = '/api/characters/characters/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Character.objects.create(
+            user=self.user, name='Mordenkainen', race=self.race, character_class=self.wizard
+        )
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_reference_list_uses_cache_version(self):
+        url = '/api/characters/classes/'
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.wizard.hit_die = 8
+        self.wizard.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_reference_detail_etag_is_per_object(self):
+        other = CharacterClass.objects.create(slug='fighter', name='Fighter', hit_die=10)
+        url = '/api/characters/classes/{}/'
+        etag = self.client.get(url.format(self.wizard.pk))['ETag']
+
+        self.assertEqual(self.client.get(url.format(self.wizard.pk), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertNotEqual(self.client.get(url.format(other.pk))['ETag'], etag)
+
+    def test_reference_detail_missing_returns_404(self):
+        etag = self.client.get(f'/api/characters/races/{self.race.pk}/')['ETag']
+
+        response = self.client.get('/api/characters/races/999999/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response)
+
+
+SHIELD_API_DATA = {'key': 'shield', 'name': 'Shield', 'level': 1, 'desc': 'An invisible barrier.'}
+
+
+class SpellHydrationTests(CharacterTestMixin, TestCase):
+
+    def test_add_spell_uses_local_catalog(self):
+        Spell.upsert_from_api_data(SHIELD_API_DATA)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(self.detail_url('add_spell'), {'spell_slug': 'shield'})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['spell']['spell_name'], 'Shield')
+        self.assertIsNotNone(response.data['spell']['spell_details'])
+        self.assertFalse(response.data['hydrating'])
+        self.assertEqual(callbacks, [])
+
+    @mock.patch('apps.characters.hydration.spell_hydration_queue')
+    def test_add_spell_outside_catalog_is_hydrated_after_commit(self, queue):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.detail_url('add_spell'), {
+                'spell_slug': 'shield', 'spell_name': 'Shield', 'spell_level': 1
+            })
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.data['hydrating'])
+        queue.enqueue.assert_called_once_with('shield')
+
+    def test_add_spell_outside_catalog_requires_name_and_level(self):
+        response = self.client.post(self.detail_url('add_spell'), {'spell_slug': 'shield'})
+
+        self.assertEqual(response.status_code, 400)
+
+    @mock.patch('apps.characters.hydration.get_client')
+    def test_hydrate_spell_updates_every_character_once(self, get_client):
+        get_client.return_value.get_cached.return_value = CachedPayload(SHIELD_API_DATA, False)
+        other = Character.objects.create(
+            user=self.user, name='Mordenkainen', race=self.race, character_class=self.wizard
+        )
+        for character in (self.character, other):
+            CharacterSpell.objects.create(
+                character=character, spell_slug='shield', spell_name='shield', spell_level=1
+            )
+        version = Character.objects.get(pk=other.pk).version
+
+        self.assertEqual(hydrate_spell('shield'), 2)
+
+        get_client.return_value.get_cached.assert_called_once_with('v2/spells/shield/')
+        self.assertFalse(CharacterSpell.objects.filter(payload__isnull=True).exists())
+        self.assertEqual(set(CharacterSpell.objects.values_list('spell_name', flat=True)), {'Shield'})
+        self.assertEqual(Character.objects.get(pk=other.pk).version, version + 1)
+        self.assertTrue(Spell.objects.filter(slug='shield').exists())
+
+    def test_queue_deduplicates_pending_slugs(self):
+        release = threading.Event()
+        queue = SpellHydrationQueue(max_workers=1)
+        self.addCleanup(release.set)
+
+        with mock.patch('apps.characters.hydration.hydrate_spell', side_effect=lambda slug: release.wait(5)):
+            blocker = queue.enqueue('fireball')   # ocupa o único worker
+            first = queue.enqueue('shield')
+            second = queue.enqueue('shield')
+            self.assertIs(first, second)
+            release.set()
+            for future in (blocker, first):
+                future.result(timeout=5)
+
+    def test_failed_hydration_is_logged_and_retried(self):
+        now = [0.0]
+        queue = SpellHydrationQueue(max_workers=1, retry_interval=60, clock=lambda: now[0])
+
+        with mock.patch('apps.characters.hydration.hydrate_spell', side_effect=[RuntimeError('db'), 1]):
+            with self.assertLogs('apps.characters.hydration', 'ERROR'):
+                self.assertEqual(queue.enqueue('shield').result(timeout=5), 0)
+
+            self.assertIsNone(queue.enqueue('shield'))  # ainda no intervalo
+            now[0] = 61
+            self.assertEqual(queue.enqueue('shield').result(timeout=5), 1)
+
+    @mock.patch('apps.characters.hydration.spell_hydration_queue')
+    def test_reading_unhydrated_spells_requeues_them(self, queue):
+        queue.pending.return_value = set()
+        CharacterSpell.objects.create(
+            character=self.character, spell_slug='shield', spell_name='Shield', spell_level=1
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(self.detail_url())
+        queue.enqueue.assert_called_once_with('shield')
+
+        queue.enqueue.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(self.detail_url('spells'))
+        queue.enqueue.assert_called_once_with('shield')
+
+
+class SpellPayloadTests(CharacterTestMixin, TestCase):
+
+    @mock.patch('apps.characters.models.get_client')
+    def test_admin_fetch_reports_stale_payloads(self, get_client):
+        get_client.return_value.get_cached.return_value = CachedPayload(SHIELD_API_DATA, True)
+        CharacterSpell.objects.create(
+            character=self.character, spell_slug='shield', spell_name='shield', spell_level=1
+        )
+        model_admin = CharacterSpellAdmin(CharacterSpell, site)
+
+        with mock.patch.object(model_admin, 'message_user') as message_user:
+            model_admin.fetch_spell_data(None, CharacterSpell.objects.all())
+
+        message_user.assert_called_once_with(
+            None, '1 spells updated from API (1 from stale cache, Open5e unavailable)', messages.WARNING
+        )
+
+    def test_identical_payloads_are_stored_once(self):
+        reordered = dict(reversed(list(SHIELD_API_DATA.items())))
+
+        first = SpellPayload.for_data(SHIELD_API_DATA)
+        second = SpellPayload.for_data(reordered)
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(first.slug, 'shield')
+        self.assertIsNone(SpellPayload.for_data(None))
+
+    def test_spell_properties_read_shared_payload(self):
+        spell = CharacterSpell.objects.create(
+            character=self.character, spell_slug='shield', spell_name='Shield', spell_level=1,
+            payload=SpellPayload.for_data(SHIELD_API_DATA)
+        )
+
+        self.assertEqual(spell.description, 'An invisible barrier.')
+        self.assertEqual(spell.casting_time, '')
+        self.assertEqual(spell.api_data, SHIELD_API_DATA)
+
+
+class SpellSearchTests(CharacterTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        for key, name, level, school, classes, desc in (
+            ('fireball', 'Fireball', 3, 'Evocation', ['Wizard', 'Sorcerer'], 'A bright streak flashes.'),
+            ('fire-bolt', 'Fire Bolt', 0, 'Evocation', ['Wizard'], 'You hurl a mote of fire.'),
+            ('shield', 'Shield', 1, 'Abjuration', ['Wizard'], 'An invisible barrier of force.'),
+            ('cure-wounds', 'Cure Wounds', 1, 'Evocation', ['Cleric'], 'A creature you touch regains hit points.'),
+        ):
+            Spell.upsert_from_api_data({
+                'key': key, 'name': name, 'level': level, 'school': school,
+                'classes': classes, 'desc': desc
+            })
+        self.url = '/api/characters/spells/search/'
+
+    def test_prefix_match_ranks_name_hits_first(self):
+        response = self.client.get(self.url, {'q': 'fir'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual({r['slug'] for r in response.data['results']}, {'fireball', 'fire-bolt'})
+        self.assertIn('<mark>', response.data['results'][0]['highlight']['name'])
+
+    def test_description_and_filters(self):
+        response = self.client.get(self.url, {'q': 'force', 'class': 'wizard', 'level': 1})
+
+        self.assertEqual([r['slug'] for r in response.data['results']], ['shield'])
+
+    def test_typo_falls_back_to_similar_names(self):
+        response = self.client.get(self.url, {'q': 'fireblal'})
+
+        self.assertEqual(response.data['results'][0]['slug'], 'fireball')
+
+    def test_index_follows_catalog_updates(self):
+        Spell.objects.filter(slug='shield').delete()
+
+        response = self.client.get(self.url, {'q': 'shield'})
+
+        self.assertEqual(response.data['count'], 0)
+
+    def test_autocomplete_uses_in_memory_index(self):
+        url = '/api/characters/spells/autocomplete/'
+        self.client.get(url, {'q': 'f'})  # carrega o índice
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'q': 'FIR', 'class': 'sorcerer'})
+
+        self.assertEqual([r['slug'] for r in response.data['results']], ['fireball'])
+
+        Spell.upsert_from_api_data({'key': 'fire-shield', 'name': 'Fire Shield', 'level': 4})
+        response = self.client.get(url, {'q': 'fire s'})
+        self.assertEqual([r['slug'] for r in response.data['results']], ['fire-shield'])
+
+    def test_index_version_checked_at_most_once_per_interval(self):
+        url = '/api/characters/spells/autocomplete/'
+        self.client.get(url, {'q': 'f'})  # carrega o índice
+        # Outro worker alterou o catálogo: só a versão no cache muda
+        Spell.objects.filter(slug='shield').update(name='Barrier')
+        bump_version(SPELL_NAMESPACE)
+
+        with mock.patch('apps.characters.cache.get_version', wraps=get_version) as version:
+            for _ in range(3):
+                response = self.client.get(url, {'q': 'shi'})
+                self.assertEqual([r['slug'] for r in response.data['results']], ['shield'])
+            self.assertEqual(version.call_count, 0)
+
+            later = time.monotonic() + 60
+            with mock.patch('apps.characters.cache.time.monotonic', return_value=later):
+                response = self.client.get(url, {'q': 'barr'})
+            self.assertEqual([r['slug'] for r in response.data['results']], ['shield'])
+            self.assertEqual(version.call_count, 1)
+
+    def test_facets_return_counts_without_queries(self):
+        url = '/api/characters/spells/facets/'
+        self.client.get(url)  # carrega o índice
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'class': 'wizard', 'school': 'evocation'})
+
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([r['slug'] for r in response.data['results']], ['fire-bolt', 'fireball'])
+        # A faceta escola ignora o próprio filtro: mostra as alternativas
+        self.assertEqual(response.data['facets']['school'], {'abjuration': 1, 'evocation': 2})
+        self.assertEqual(response.data['facets']['class'], {'cleric': 1, 'sorcerer': 1, 'wizard': 2})
+        self.assertEqual(response.data['facets']['level'], {'0': 1, '3': 1})
+
+    def test_facet_values_combine_with_or(self):
+        response = self.client.get('/api/characters/spells/facets/', {'level': [0, 1], 'limit': 1, 'offset': 1})
+
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual([r['slug'] for r in response.data['results']], ['cure-wounds'])
+
+    def test_for_class_reports_counts_by_level(self):
+        response = self.client.get('/api/characters/spells/for_class/', {'class': 'wizard', 'level': 3})
+
+        self.assertEqual(response.data['total_count'], 1)
+        self.assertEqual(response.data['count_by_level'], {0: 1, 1: 1, 3: 1})
+        self.assertEqual(list(response.data['spells_by_level']), [3])
+
+    def test_filters_without_query_read_local_catalog(self):
+        response = self.client.get(self.url, {'class': 'wizard', 'school': 'evocation'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['slug'] for r in response.data['results']], ['fire-bolt', 'fireball'])
+
+        response = self.client.get(self.url, {'level': 1})
+        self.assertEqual([r['slug'] for r in response.data['results']], ['cure-wounds', 'shield'])
+
+    def test_limit_is_clamped(self):
+        for params in ({'limit': -5}, {'limit': 0}, {'limit': 'abc'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 200, params)
+
+        self.assertEqual(len(self.client.get(self.url, {'limit': -5}).data['results']), 1)
+        self.assertEqual(len(self.client.get(self.url, {'q': 'fir', 'limit': -5}).data['results']), 1)
+        self.assertEqual(len(self.client.get(self.url, {'limit': 'abc'}).data['results']), 4)
+
+    def test_detail_by_slug(self):
+        url = '/api/characters/spells/detail/'
+
+        response = self.client.get(url, {'slug': 'shield'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Shield')
+        self.assertEqual(response.data['level'], 1)
+
+        self.assertEqual(self.client.get(url, {'slug': 'wish'}).status_code, 404)
+        self.assertEqual(self.client.get(url).status_code, 400)
+
+    def test_for_class_groups_by_level(self):
+        url = '/api/characters/spells/for_class/'
+
+        response = self.client.get(url, {'class': 'Wizard'})
+        self.assertEqual(response.data['total_count'], 3)
+        self.assertEqual(
+            {level: [s['slug'] for s in spells] for level, spells in response.data['spells_by_level'].items()},
+            {0: ['fire-bolt'], 1: ['shield'], 3: ['fireball']}
+        )
+
+        self.assertEqual(self.client.get(url, {'class': 'bard'}).data['total_count'], 0)
+        self.assertEqual(self.client.get(url).status_code, 400)
+
+    def test_name_index_matches_inner_words_after_prefixes(self):
+        index = SpellNameIndex([
+            (1, 'Cure Wounds', 'cure-wounds', 1, 'Evocation', ',cleric,'),
+            (2, 'Mass Cure Wounds', 'mass-cure-wounds', 5, 'Evocation', ',cleric,'),
+            (3, 'Curse', 'curse', 0, 'Necromancy', ',warlock,'),
+        ])
+
+        self.assertEqual([e.id for e in index.suggest('cur')], [1, 3, 2])
+        self.assertEqual([e.id for e in index.suggest('cur', level=5)], [2])
+        self.assertEqual([e.id for e in index.suggest('cur', limit=1)], [1])
+
+
+class KeysetPaginationTests(CharacterTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        for number in range(4):
+            Character.objects.create(
+                user=self.user, name=f'Hero {number}', race=self.race, character_class=self.wizard
+            )
+        # Mesmo created_at: o desempate por id mantém a ordem estável
+        Character.objects.filter(name__in=['Hero 1', 'Hero 2']).update(
+            created_at=Character.objects.get(name='Hero 1').created_at
+        )
+        self.url = '/api/characters/characters/'
+
+    def walk(self, url, params=None):
+        pages = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            if not response.data['next']:
+                return pages
+            response = self.client.get(response.data['next'])
+
+    def test_cursor_walk_matches_full_ordering(self):
+        pages = self.walk(self.url, {'page_size': 2})
+
+        ids = [row['id'] for page in pages for row in page['results']]
+        expected = list(Character.objects.filter(user=self.user).order_by('-created_at', '-id')
+                        .values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual([len(page['results']) for page in pages], [2, 2, 1])
+        self.assertEqual(pages[0]['count'], 5)
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get(self.url, {'page_size': 2}).data
+        second = self.client.get(first['next']).data
+
+        back = self.client.get(second['previous']).data
+
+        self.assertEqual([r['id'] for r in back['results']], [r['id'] for r in first['results']])
+        self.assertIsNone(back['previous'])
+
+    def test_ordering_param_and_count_opt_out(self):
+        pages = self.walk(self.url, {'page_size': 2, 'ordering': 'name', 'count': 'false'})
+
+        names = [row['name'] for page in pages for row in page['results']]
+        self.assertEqual(names, sorted(names))
+        self.assertIsNone(pages[0]['count'])
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursor_values_are_404(self):
+        for position in (['garbage', 1], [None, 1], ['2024-01-01T00:00:00Z', 'x']):
+            cursor = base64.urlsafe_b64encode(json.dumps({'r': 0, 'p': position}).encode()).decode()
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, position)
+
+    def test_spell_search_without_query_uses_cursor(self):
+        for level in range(3):
+            Spell.upsert_from_api_data({'key': f'spell-{level}', 'name': f'Spell {level}', 'level': level})
+
+        pages = self.walk('/api/characters/spells/search/', {'limit': 2})
+
+        self.assertEqual(
+            [row['slug'] for page in pages for row in page['results']],
+            ['spell-0', 'spell-1', 'spell-2']
+        )
+
+
+class SparseFieldsetTests(CharacterTestMixin, TestCase):
+
+    url = '/api/characters/characters/'
+
+    def test_default_representation_is_unchanged(self):
+        row = self.client.get(self.url).data['results'][0]
+
+        self.assertEqual(row['race']['name'], 'Elf')
+        self.assertEqual(row['user']['username'], 'tester')
+
+    def test_fields_skip_unrequested_relations(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'fields': 'id,name,level,current_hp,max_hp'})
+
+        row = response.data['results'][0]
+        self.assertEqual(set(row), {'id', 'name', 'level', 'current_hp', 'max_hp'})
+        self.assertFalse(any('characters_race' in query['sql'] for query in queries.captured_queries))
+
+    def test_expand_and_dotted_fields(self):
+        row = self.client.get(self.url, {
+            'fields': 'id,race,character_class.name,background', 'expand': 'race'
+        }).data['results'][0]
+
+        self.assertEqual(row['race']['slug'], 'elf')
+        self.assertEqual(row['character_class'], {'name': 'Wizard'})
+        self.assertIsNone(row['background'])
+
+    def test_unexpanded_relations_collapse_to_ids(self):
+        row = self.client.get(self.detail_url(), {'expand': 'character_class'}).data
+
+        self.assertEqual(row['race'], self.race.pk)
+        self.assertEqual(row['user'], self.user.pk)
+        self.assertEqual(row['character_class']['slug'], 'wizard')
+        self.assertIn('combat_stats', row)
+
+    def test_list_payload_shrinks(self):
+        full = self.client.get(self.url)
+        sparse = self.client.get(self.url, {'fields': 'id,name,level,current_hp,max_hp,race.name,character_class.name'})
+
+        self.assertLess(len(sparse.content) * 4, len(full.content))
+
+    def test_reference_and_campaign_serializers(self):
+        race = self.client.get('/api/characters/races/', {'fields': 'id,name'}).data['results'][0]
+        self.assertEqual(set(race), {'id', 'name'})
+
+        Campaign.objects.create(name='Phandelver', dm=self.user)
+        campaign = self.client.get('/api/characters/campaigns/', {'fields': 'name,dm,players'}).data['results'][0]
+        self.assertEqual(campaign, {'name': 'Phandelver', 'dm': self.user.pk, 'players': []})
+
+
+class FastJSONTests(CharacterTestMixin, TestCase):
+
+    def payload(self):
+        data = self.client.get(self.detail_url()).data
+        data['extra'] = {
+            'updated': datetime(2024, 5, 1, 12, 30, tzinfo=dt_timezone.utc),
+            'weight': Decimal('2.50'),
+            'count_by_level': {1: 3, 2: 1},
+            'name': 'Mão Mágica',
+        }
+        return data
+
+    def test_renderer_matches_drf_output(self):
+        data = self.payload()
+        expected = JSONRenderer().render(data)
+
+        self.assertEqual(FastJSONRenderer().render(data), expected)
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(FastJSONRenderer().render(data), expected)
+
+    def test_line_separators_and_non_finite_floats(self):
+        data = {'desc': 'linha\u2028parágrafo\u2029fim'}
+        expected = JSONRenderer().render(data)
+        self.assertIn(b'\\u2028', expected)
+
+        self.assertEqual(FastJSONRenderer().render(data), expected)
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(FastJSONRenderer().render(data), expected)
+
+        # Diferença documentada: o DRF levanta, o orjson escreve null
+        with self.assertRaises(ValueError):
+            JSONRenderer().render({'value': float('nan')})
+        with mock.patch.object(renderers, 'orjson', None), self.assertRaises(ValueError):
+            FastJSONRenderer().render({'value': float('nan')})
+        if renderers.orjson is not None:
+            self.assertEqual(FastJSONRenderer().render({'value': float('inf')}), b'{"value":null}')
+
+    def test_parser_round_trip_and_errors(self):
+        body = FastJSONRenderer().render({'name': 'Mão Mágica', 'level': 3})
+
+        self.assertEqual(FastJSONParser().parse(io.BytesIO(body)), {'name': 'Mão Mágica', 'level': 3})
+        with mock.patch('core.parsers.orjson', None):
+            self.assertEqual(FastJSONParser().parse(io.BytesIO(body))['level'], 3)
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"broken":'))
+
+
+@skipUnless(msgpack, 'msgpack não instalado')
+class MessagePackTests(CharacterTestMixin, TestCase):
+
+    def test_detail_msgpack_matches_json(self):
+        expected = self.client.get(self.detail_url()).json()
+        response = self.client.get(self.detail_url(), HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content, raw=False), expected)
+        self.assertLess(len(response.content), len(self.client.get(self.detail_url()).content))
+
+    def test_msgpack_request_body(self):
+        response = self.client.post(
+            self.detail_url('take_damage'), msgpack.packb({'damage': 3}),
+            content_type='application/msgpack', HTTP_ACCEPT='application/msgpack; view=delta'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = msgpack.unpackb(response.content, raw=False)
+        self.character.refresh_from_db()
+        self.assertEqual(data['character'], {
+            'id': self.character.pk,
+            'version': self.character.version,
+            'current_hp': self.character.max_hp - 3,
+        })
+
+    def test_etag_depends_on_format(self):
+        json_etag = self.client.get(self.detail_url())['ETag']
+        response = self.client.get(
+            self.detail_url(), HTTP_ACCEPT='application/msgpack', HTTP_IF_NONE_MATCH=json_etag
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], json_etag)
+
+    def test_renderer_and_parser_round_trip(self):
+        data = {'updated': datetime(2024, 5, 1, 12, 30, tzinfo=dt_timezone.utc), 'weight': Decimal('2.50')}
+        body = MessagePackRenderer().render(data)
+
+        self.assertEqual(
+            MessagePackParser().parse(io.BytesIO(body)),
+            {'updated': '2024-05-01T12:30:00Z', 'weight': 2.5}
+        )
+        with self.assertRaises(ParseError):
+            MessagePackParser().parse(io.BytesIO(b'\xc1'))
+
+
+class FastSerializerParityTests(CharacterTestMixin, TestCase):
+    """fast_serializers precisa gerar exatamente o JSON dos serializers do DRF"""
+
+    def setUp(self):
+        super().setUp()
+        self.race.api_data = {'traits': [{'name': 'Darkvision'}], 'desc': 'Elves'}
+        self.race.save()
+        self.background = Background.objects.create(
+            slug='sage', name='Sábio', skill_proficiencies=['arcana', 'history'], languages=['elvish']
+        )
+        self.character.background = self.background
+        self.character.temporary_hp = 4
+        self.character.custom_skill_proficiencies = ['investigation']
+        self.character.save()
+
+        payload = SpellPayload.for_data({'desc': 'Boom', 'range': '150 feet', 'school': 'Evocation'}, 'fireball')
+        CharacterSpell.objects.create(
+            character=self.character, spell_slug='fireball', spell_name='Fireball', spell_level=3,
+            payload=payload
+        )
+        CharacterSpell.objects.create(
+            character=self.character, spell_slug='homebrew', spell_name='Homebrew', spell_level=1,
+            is_prepared=False
+        )
+
+        fighter = CharacterClass.objects.create(slug='fighter', name='Fighter', hit_die=10)
+        Character.objects.create(
+            user=self.user, name='Conan', race=self.race, character_class=fighter,
+            base_strength=15, base_dexterity=8
+        )
+
+    def drf_response(self, url):
+        with mock.patch('apps.characters.views.CharacterViewSet.fast_read', False):
+            return self.client.get(url)
+
+    def test_detail_is_byte_identical(self):
+        for character in Character.objects.all():
+            self.character = character
+            fast = self.client.get(self.detail_url())
+            drf = self.drf_response(self.detail_url())
+
+            self.assertEqual(fast.status_code, 200)
+            self.assertEqual(fast.content, drf.content)
+
+    def test_list_is_byte_identical(self):
+        for query in ('', '?page_size=1', '?ordering=name', '?ordering=-armor_class&page_size=1', '?search=conan'):
+            url = f'/api/characters/characters/{query}'
+            fast = self.client.get(url)
+
+            self.assertEqual(fast.content, self.drf_response(url).content, query)
+            next_url = fast.json()['next']
+            if next_url:
+                self.assertEqual(self.client.get(next_url).content, self.drf_response(next_url).content)
+
+    def test_functions_match_serializers(self):
+        character = Character.objects.select_related('race', 'character_class', 'background').get(
+            pk=self.character.pk
+        )
+        row = Character.objects.values(*CHARACTER_DETAIL_FIELDS).get(pk=character.pk)
+
+        self.assertEqual(
+            JSONRenderer().render(serialize_character_detail(row)),
+            JSONRenderer().render(CharacterDetailSerializer(character).data)
+        )
+        self.assertEqual(
+            JSONRenderer().render(serialize_character_list([row])),
+            JSONRenderer().render(CharacterListSerializer([character], many=True).data)
+        )
+
+    def test_fieldsets_and_missing_character_use_drf_path(self):
+        url = self.detail_url() + '?fields=id,name'
+        self.assertEqual(self.client.get(url).json(), {'id': self.character.pk, 'name': 'Elminster'})
+
+        response = self.client.get('/api/characters/characters/999999/')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.content, self.drf_response('/api/characters/characters/999999/').content)
+
+
+
+class DerivedStatsTests(CharacterTestMixin, TestCase):
+
+    def stored(self, *fields):
+        return Character.objects.values_list(*fields).get(pk=self.character.pk)
+
+    def test_columns_filled_on_create(self):
+        # DEX 14+2 -> +3, INT 15 -> +2, nível 3 -> proficiência +2
+        self.assertEqual(
+            self.stored('dexterity', 'dexterity_modifier', 'armor_class', 'proficiency_bonus',
+                        'spell_save_dc', 'spell_attack_bonus'),
+            (16, 3, 13, 2, 12, 4)
+        )
+
+    def test_level_up_recomputes(self):
+        self.character.level_up()
+        self.character.level_up()
+
+        self.assertEqual(self.character.proficiency_bonus, 3)
+        self.assertEqual(self.stored('proficiency_bonus', 'spell_save_dc'), (3, 13))
+
+    def test_race_and_class_changes_refresh_characters(self):
+        self.race.dexterity_bonus = 4
+        self.race.save()
+        self.assertEqual(self.stored('dexterity', 'armor_class', 'initiative_bonus'), (18, 14, 4))
+
+        self.wizard.is_spellcaster = False
+        self.wizard.save()
+        self.assertEqual(self.stored('spell_save_dc', 'spell_attack_bonus'), (None, None))
+
+    def test_save_without_stat_changes_skips_relations(self):
+        character = Character.objects.get(pk=self.character.pk)
+        character.current_hp = 1
+
+        with self.assertNumQueries(1):
+            character.save()
+
+    def test_list_filters_and_orders_by_derived_stats(self):
+        fighter = CharacterClass.objects.create(slug='fighter', name='Fighter', hit_die=10)
+        Character.objects.create(
+            user=self.user, name='Conan', race=self.race, character_class=fighter, base_dexterity=8
+        )
+        url = '/api/characters/characters/'
 
-# Create your tests here.
+        names = [c['name'] for c in self.client.get(url, {'armor_class__gte': 13}).json()['results']]
+        self.assertEqual(names, ['Elminster'])
+        names = [c['name'] for c in self.client.get(url, {'spell_save_dc__gte': 1}).json()['results']]
+        self.assertEqual(names, ['Elminster'])
+        names = [c['name'] for c in self.client.get(url, {'ordering': 'armor_class'}).json()['results']]
+        self.assertEqual(names, ['Conan', 'Elminster'])
@@ -80,31 +80,71 @@ POST   /api/characters/characters/{id}/rest/          # Descanso
 POST   /api/characters/characters/{id}/take_damage/   # Aplicar dano
 POST   /api/characters/characters/{id}/heal/          # Curar
 POST   /api/characters/characters/{id}/use_spell_slot/ # Usar spell slot
+POST   /api/characters/characters/batch_actions/      # Várias ações em uma transação
+
+# Respostas delta (level_up, rest, take_damage, heal, use_spell_slot):
+# ?response=delta  ou  Accept: application/json; view=delta
+# -> "character" traz apenas id, version e os campos alterados
+
+# Conditional GET (list/retrieve de personagens e dados de referência):
+# respostas trazem ETag e Last-Modified; reenviar com
+# If-None-Match / If-Modified-Since -> 304 Not Modified sem corpo
 
 # Gestão de feitiços:
 GET    /api/characters/characters/{id}/spells/        # Listar feitiços
 POST   /api/characters/characters/{id}/add_spell/     # Adicionar feitiço
 DELETE /api/characters/characters/{id}/remove_spell/  # Remover feitiço
+# add_spell usa nome/nível/dados do catálogo local; feitiços fora do
+# catálogo têm api_data hidratado em background ("hydrating": true); o que
+# falhar volta para a fila ao ler os feitiços (ou: manage.py hydrate_spells)
 
 # Filtros de personagens:
 # ?race=1
 # ?character_class=2
-# ?level=5
+# ?level=5  (também ?level__gte= / ?level__lte=)
+# ?armor_class__gte=15, ?spell_save_dc__gte=14, ?proficiency_bonus__gte=3
+# ?ordering=-armor_class  (estatísticas derivadas são colunas indexadas)
 # ?search=gandalf
 
+# Campos esparsos (personagens, campanhas e dados de referência):
+# ?fields=id,name,level          # só esses campos
+# ?expand=race,character_class   # relações aninhadas; as demais vêm só como id
+# ?fields=id,race.name           # ponto = expande trazendo só os subcampos
+# (sem ?fields/?expand a resposta é a completa)
+
+# Paginação por cursor (personagens e campanhas; busca de feitiços sem ?q):
+# siga os links "next"/"previous" (?cursor=...); ?page_size=50 (máx. 100);
+# ?count=false omite o total ("count": null)
+
+# MessagePack (endpoints de personagem, se o pacote msgpack estiver instalado):
+# Accept: application/msgpack          # resposta em msgpack (ou ?format=msgpack)
+# Content-Type: application/msgpack    # corpo das ações (take_damage, heal, ...)
+# Accept: application/msgpack; view=delta  # combina com a resposta delta
+
 # ========================================
-# FEITIÇOS (Open5e API)
+# FEITIÇOS (catálogo local, sincronizado da Open5e API)
 # ========================================
+# Popular/atualizar catálogo: python manage.py sync_open5e --spells
+# Índice de busca (tsvector+pg_trgm / FTS5): python manage.py rebuild_spell_search
+
 GET    /api/characters/spells/search/              # Buscar feitiços
+GET    /api/characters/spells/autocomplete/?q=fir  # Sugestões por prefixo (?class, ?level, ?limit)
 GET    /api/characters/spells/detail/?slug=fireball # Detalhes de feitiço
 GET    /api/characters/spells/for_class/?class=wizard # Feitiços por classe
+GET    /api/characters/spells/facets/              # Busca por facetas com contagens
+
+# Facetas: ?level=1&level=2&school=evocation&class=wizard&concentration=true&ritual=false
+# (valores repetidos = OU; facetas diferentes = E; ?limit / ?offset para paginar)
+# -> "facets" traz contagens por nível, escola, classe, concentração e ritual
 
 # Parâmetros de busca:
-# ?q=fire               # Busca por nome
+# ?q=fire bal           # Busca textual ranqueada (nome, descrição, escola,
+#                       # classes) com prefixo e tolerância a erros de digitação;
+#                       # resultados trazem "rank" e "highlight"
 # ?class=wizard         # Filtrar por classe
 # ?level=3              # Filtrar por nível
 # ?school=evocation     # Filtrar por escola
-# ?limit=50             # Limite de resultados
+# ?limit=50             # Limite de resultados (tamanho da página sem ?q)
 
 # ========================================
 # CAMPANHAS
@@ -164,10 +204,20 @@ POST /api/characters/characters/1/take_damage/
   "damage_type": "slashing"
 }
 
-# 5. Buscar feitiços:
+# 5. Ações em lote (ex.: DM resolvendo uma Fireball):
+POST /api/characters/characters/batch_actions/
+{
+  "operations": [
+    {"character": 1, "action": "damage", "amount": 24},
+    {"character": 2, "action": "damage", "amount": 12},
+    {"character": 3, "action": "use_spell_slot", "spell_level": 3}
+  ]
+}
+
+# 6. Buscar feitiços:
 GET /api/characters/spells/search/?class=wizard&level=1&limit=20
 
-# 6. Adicionar feitiço:
+# 7. Adicionar feitiço:
 POST /api/characters/characters/1/add_spell/
 {
   "spell_slug": "magic-missile",
@@ -4,24 +4,38 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.settings import api_settings
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
-import requests
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.http import parse_header_parameters
+from core.parsers import msgpack_parsers
+from core.renderers import msgpack_renderers
 from .models import (
     Race, CharacterClass, ClassLevelProgression, Background,
-    Character, CharacterSpell, Campaign
+    Character, CharacterSpell, Campaign, CampaignCharacter, Spell
 )
+from .cache import ReferenceCacheMixin, REFERENCE_NAMESPACE, get_or_build
+from .conditional import ReferenceConditionalGetMixin, CharacterConditionalGetMixin
+from .fast_serializers import FastCharacterReadMixin
+from .fieldsets import expanded_relations
+from .hydration import requeue_unhydrated, schedule_spell_hydration
+from .pagination import KeysetPagination, SpellKeysetPagination
+from .search import get_search_backend
+from .spell_index import get_spell_index, get_facet_index
 from .serializers import (
     RaceSerializer, CharacterClassSerializer, ClassLevelProgressionSerializer,
     BackgroundSerializer, CharacterListSerializer, CharacterDetailSerializer,
     CharacterCreateSerializer, CharacterUpdateSerializer, CharacterSpellSerializer,
+    CharacterStateSerializer,
     CampaignSerializer, LevelUpSerializer, RestSerializer, TakeDamageSerializer,
-    HealSerializer, UseSpellSlotSerializer, SpellSearchSerializer
+    HealSerializer, UseSpellSlotSerializer, SpellSearchSerializer,
+    BatchActionSerializer
 )
 
 
-class RaceViewSet(viewsets.ReadOnlyModelViewSet):
+class RaceViewSet(ReferenceConditionalGetMixin, ReferenceCacheMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet para Raças
     Apenas leitura - dados gerenciados via admin
@@ -52,7 +66,7 @@ class RaceViewSet(viewsets.ReadOnlyModelViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
 
 
-class CharacterClassViewSet(viewsets.ReadOnlyModelViewSet):
+class CharacterClassViewSet(ReferenceConditionalGetMixin, ReferenceCacheMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet para Classes de Personagem
     """
@@ -66,14 +80,17 @@ class CharacterClassViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=True, methods=['get'])
     def level_progression(self, request, pk=None):
-        """Retorna progressão de todos os níveis da classe"""
-        character_class = self.get_object()
-        progressions = ClassLevelProgression.objects.filter(
-            character_class=character_class
-        ).order_by('level')
+        """Retorna progressão de todos os níveis da classe (cacheada)"""
+        def build():
+            character_class = self.get_object()
+            progressions = ClassLevelProgression.objects.filter(
+                character_class=character_class
+            ).select_related('character_class').order_by('level')
+            
+            serializer = ClassLevelProgressionSerializer(progressions, many=True)
+            return serializer.data
         
-        serializer = ClassLevelProgressionSerializer(progressions, many=True)
-        return Response(serializer.data)
+        return Response(get_or_build(REFERENCE_NAMESPACE, f'level_progression:{pk}', build))
     
     @action(detail=True, methods=['get'])
     def progression_by_level(self, request, pk=None):
@@ -129,8 +146,9 @@ class CharacterClassViewSet(viewsets.ReadOnlyModelViewSet):
             success = character.use_spell_slot(spell_level)
             
             if success:
-                current_slots = character.get_current_spell_slots(spell_level)
-                max_slots = character.get_max_spell_slots(spell_level)
+                snapshot = character.get_spell_slot_snapshot()
+                current_slots = snapshot.current_slots[spell_level]
+                max_slots = snapshot.max_slots[spell_level]
                 
                 char_serializer = CharacterDetailSerializer(character)
                 return Response({
@@ -147,7 +165,7 @@ class CharacterClassViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class BackgroundViewSet(viewsets.ReadOnlyModelViewSet):
+class BackgroundViewSet(ReferenceConditionalGetMixin, ReferenceCacheMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet para Backgrounds
     """
@@ -159,22 +177,50 @@ class BackgroundViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['name']
 
 
-class CharacterViewSet(viewsets.ModelViewSet):
+class CharacterViewSet(CharacterConditionalGetMixin, FastCharacterReadMixin, viewsets.ModelViewSet):
     """
     ViewSet principal para Personagens
     """
     filter_backends = [SearchFilter, OrderingFilter, DjangoFilterBackend]
     search_fields = ['name', 'race__name', 'character_class__name']
-    filterset_fields = ['race', 'character_class', 'background', 'level']
-    ordering_fields = ['name', 'level', 'created_at']
+    # Estatísticas derivadas são colunas indexadas: ?armor_class__gte=15
+    filterset_fields = {
+        'race': ['exact'],
+        'character_class': ['exact'],
+        'background': ['exact'],
+        'level': ['exact', 'gte', 'lte'],
+        'armor_class': ['exact', 'gte', 'lte'],
+        'spell_save_dc': ['exact', 'gte', 'lte'],
+        'proficiency_bonus': ['exact', 'gte', 'lte'],
+    }
+    ordering_fields = ['name', 'level', 'created_at', 'armor_class', 'proficiency_bonus']
     ordering = ['-created_at']
+    pagination_class = KeysetPagination
     permission_classes = [permissions.IsAuthenticated]
+    # Accept / Content-Type: application/msgpack (opcional, além do JSON)
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + msgpack_renderers()
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES + msgpack_parsers()
+    # list/retrieve completos por fast_serializers (False: serializers do DRF)
+    fast_read = True
     
     def get_queryset(self):
-        """Retorna apenas personagens do usuário atual"""
-        return Character.objects.filter(user=self.request.user).select_related(
-            'user', 'race', 'character_class', 'background'
-        ).prefetch_related('spells')
+        """
+        Retorna apenas personagens do usuário atual, com JOINs/prefetch só
+        das relações que a resposta vai aninhar (?fields= / ?expand=)
+        """
+        queryset = Character.objects.filter(user=self.request.user)
+        relations = expanded_relations(
+            self.request, ('user', 'race', 'character_class', 'background', 'spells')
+        )
+        related = [name for name in ('user', 'race', 'character_class', 'background') if name in relations]
+        if related:
+            queryset = queryset.select_related(*related)
+        # A listagem não tem feitiços
+        if 'spells' in relations and self.action != 'list':
+            queryset = queryset.prefetch_related(
+                models.Prefetch('spells', queryset=CharacterSpell.objects.select_related('payload'))
+            )
+        return queryset
     
     def get_serializer_class(self):
         """Retorna serializer adequado para cada action"""
@@ -191,6 +237,16 @@ class CharacterViewSet(viewsets.ModelViewSet):
         """Adiciona usuário atual ao criar personagem"""
         serializer.save(user=self.request.user)
     
+    def retrieve(self, request, *args, **kwargs):
+        """Detalhe do personagem; feitiços ainda sem dados voltam para a hidratação"""
+        response = super().retrieve(request, *args, **kwargs)
+        if response.status_code == 200:
+            requeue_unhydrated(
+                spell['spell_slug'] for spell in response.data.get('spells') or ()
+                if spell.get('spell_details') is None and 'spell_slug' in spell
+            )
+        return response
+    
     # ========================================
     # ACTIONS PARA GESTÃO DE PERSONAGEM
     # ========================================
@@ -199,6 +255,7 @@ class CharacterViewSet(viewsets.ModelViewSet):
     def level_up(self, request, pk=None):
         """Sobe nível do personagem"""
         character = self.get_object()
+        before = self._capture_state(character)
         serializer = LevelUpSerializer(
             data=request.data,
             context={'character': character}
@@ -209,12 +266,9 @@ class CharacterViewSet(viewsets.ModelViewSet):
             success = character.level_up()
             
             if success:
-                # Retornar dados atualizados
-                char_serializer = CharacterDetailSerializer(character)
-                return Response({
+                return self._character_response(character, before, {
                     'success': True,
-                    'message': f'Personagem subiu do nível {old_level} para {character.level}!',
-                    'character': char_serializer.data
+                    'message': f'Personagem subiu do nível {old_level} para {character.level}!'
                 })
             else:
                 return Response({
@@ -228,6 +282,7 @@ class CharacterViewSet(viewsets.ModelViewSet):
     def rest(self, request, pk=None):
         """Descanso (curto ou longo)"""
         character = self.get_object()
+        before = self._capture_state(character)
         serializer = RestSerializer(data=request.data)
         
         if serializer.is_valid():
@@ -240,11 +295,9 @@ class CharacterViewSet(viewsets.ModelViewSet):
                 character.rest_short()
                 message = 'Descanso curto realizado! Alguns recursos restaurados.'
             
-            char_serializer = CharacterDetailSerializer(character)
-            return Response({
+            return self._character_response(character, before, {
                 'success': True,
-                'message': message,
-                'character': char_serializer.data
+                'message': message
             })
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -253,17 +306,16 @@ class CharacterViewSet(viewsets.ModelViewSet):
     def take_damage(self, request, pk=None):
         """Aplica dano ao personagem"""
         character = self.get_object()
+        before = self._capture_state(character)
         serializer = TakeDamageSerializer(data=request.data)
         
         if serializer.is_valid():
             damage = serializer.validated_data['damage']
             damage_applied = character.take_damage(damage)
             
-            char_serializer = CharacterDetailSerializer(character)
-            return Response({
+            return self._character_response(character, before, {
                 'success': True,
-                'message': f'{damage_applied} de dano aplicado. HP atual: {character.current_hp}',
-                'character': char_serializer.data
+                'message': f'{damage_applied} de dano aplicado. HP atual: {character.current_hp}'
             })
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -272,6 +324,7 @@ class CharacterViewSet(viewsets.ModelViewSet):
     def heal(self, request, pk=None):
         """Cura o personagem"""
         character = self.get_object()
+        before = self._capture_state(character)
         serializer = HealSerializer(
             data=request.data,
             context={'character': character}
@@ -281,11 +334,9 @@ class CharacterViewSet(viewsets.ModelViewSet):
             healing = serializer.validated_data['healing']
             healing_applied = character.heal(healing)
             
-            char_serializer = CharacterDetailSerializer(character)
-            return Response({
+            return self._character_response(character, before, {
                 'success': True,
-                'message': f'{healing_applied} HP curado. HP atual: {character.current_hp}',
-                'character': char_serializer.data
+                'message': f'{healing_applied} HP curado. HP atual: {character.current_hp}'
             })
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -294,6 +345,7 @@ class CharacterViewSet(viewsets.ModelViewSet):
     def use_spell_slot(self, request, pk=None):
         """Usa um spell slot"""
         character = self.get_object()
+        before = self._capture_state(character)
         serializer = UseSpellSlotSerializer(
             data=request.data,
             context={'character': character}
@@ -304,14 +356,13 @@ class CharacterViewSet(viewsets.ModelViewSet):
             success = character.use_spell_slot(spell_level)
             
             if success:
-                current_slots = character.get_current_spell_slots(spell_level)
-                max_slots = character.get_max_spell_slots(spell_level)
+                snapshot = character.get_spell_slot_snapshot()
+                current_slots = snapshot.current_slots[spell_level]
+                max_slots = snapshot.max_slots[spell_level]
                 
-                char_serializer = CharacterDetailSerializer(character)
-                return Response({
+                return self._character_response(character, before, {
                     'success': True,
-                    'message': f'Spell slot de nível {spell_level} usado. Restam: {current_slots}/{max_slots}',
-                    'character': char_serializer.data
+                    'message': f'Spell slot de nível {spell_level} usado. Restam: {current_slots}/{max_slots}'
                 })
             else:
                 return Response({
@@ -321,6 +372,136 @@ class CharacterViewSet(viewsets.ModelViewSet):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    # ========================================
+    # RESPOSTAS DAS ACTIONS (COMPLETA OU DELTA)
+    # ========================================
+    
+    def _wants_delta_response(self):
+        """
+        Modo delta opcional: `?response=delta` ou
+        `Accept: application/json; view=delta`
+        """
+        if self.request.query_params.get('response') == 'delta':
+            return True
+        _, params = parse_header_parameters(self.request.accepted_media_type or '')
+        return params.get('view') == 'delta'
+    
+    def _capture_state(self, character):
+        """Estado mutável antes da ação - só necessário no modo delta"""
+        if not self._wants_delta_response():
+            return None
+        return CharacterStateSerializer(character).data
+    
+    def _character_response(self, character, before, payload):
+        """
+        Completa a resposta da action com o personagem: detalhe completo
+        por padrão, ou só id, versão e campos alterados no modo delta
+        """
+        if before is None:
+            payload['character'] = CharacterDetailSerializer(character).data
+        else:
+            after = CharacterStateSerializer(character).data
+            payload['character'] = {
+                key: value for key, value in after.items()
+                if key in ('id', 'version') or before.get(key) != value
+            }
+        return Response(payload)
+    
+    @action(detail=False, methods=['post'])
+    def batch_actions(self, request):
+        """
+        Aplica várias ações (dano, cura, spell slot, descanso) em vários
+        personagens numa única transação e retorna apenas os deltas
+        """
+        serializer = BatchActionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        operations = serializer.validated_data['operations']
+        character_ids = {operation['character'] for operation in operations}
+        
+        with transaction.atomic():
+            characters = {
+                character.pk: character
+                for character in self._get_batch_queryset(character_ids)
+            }
+            missing = sorted(character_ids - characters.keys())
+            if missing:
+                return Response({
+                    'success': False,
+                    'error': 'Personagens não encontrados',
+                    'missing': missing
+                }, status=status.HTTP_404_NOT_FOUND)
+            
+            before = {
+                pk: [getattr(character, field) for field in Character.STATE_FIELDS]
+                for pk, character in characters.items()
+            }
+            
+            # Aplica as operações em memória - as linhas já estão travadas
+            results = []
+            for operation in operations:
+                character = characters[operation['character']]
+                result = {'character': character.pk, 'action': operation['action']}
+                
+                if operation['action'] == 'damage':
+                    result['applied'] = character.take_damage(operation['amount'], commit=False)
+                elif operation['action'] == 'heal':
+                    result['applied'] = character.heal(operation['amount'], commit=False)
+                elif operation['action'] == 'use_spell_slot':
+                    result['success'] = character.use_spell_slot(operation['spell_level'], commit=False)
+                elif operation['rest_type'] == 'long':
+                    character.rest_long(commit=False)
+                    result['success'] = True
+                else:
+                    result['success'] = character.rest_short(commit=False)
+                
+                results.append(result)
+            
+            # Calcula deltas e grava tudo com um único bulk_update
+            deltas = {}
+            changed_fields = set()
+            now = timezone.now()
+            for pk, character in characters.items():
+                delta = {
+                    field: getattr(character, field)
+                    for field, old_value in zip(Character.STATE_FIELDS, before[pk])
+                    if getattr(character, field) != old_value
+                }
+                if delta:
+                    character.updated_at = now
+                    character.version += 1
+                    changed_fields.update(delta)
+                    deltas[pk] = dict(delta, version=character.version)
+            
+            if deltas:
+                Character.objects.bulk_update(
+                    [characters[pk] for pk in deltas],
+                    sorted(changed_fields) + ['version', 'updated_at']
+                )
+        
+        return Response({
+            'success': True,
+            'results': results,
+            'deltas': deltas
+        })
+    
+    def _get_batch_queryset(self, character_ids):
+        """
+        Personagens do usuário ou ativos nas campanhas em que ele é DM
+        (só os vinculados à campanha, não todos os dos jogadores),
+        travados para escrita em ordem de pk (evita deadlock entre lotes)
+        """
+        user = self.request.user
+        party_character_ids = CampaignCharacter.objects.filter(
+            campaign__dm=user, is_active=True
+        ).values('character_id')
+        
+        return Character.objects.select_for_update(of=('self',)).filter(
+            models.Q(user=user) | models.Q(pk__in=party_character_ids),
+            pk__in=character_ids
+        ).select_related('character_class').order_by('pk')
+    
     # ========================================
     # ACTIONS PARA FEITIÇOS
     # ========================================
@@ -329,7 +510,7 @@ class CharacterViewSet(viewsets.ModelViewSet):
     def spells(self, request, pk=None):
         """Lista feitiços do personagem"""
         character = self.get_object()
-        spells = character.spells.all().order_by('spell_level', 'spell_name')
+        spells = character.spells.select_related('payload').order_by('spell_level', 'spell_name')
         
         # Filtros opcionais
         spell_level = request.query_params.get('level')
@@ -347,7 +528,9 @@ class CharacterViewSet(viewsets.ModelViewSet):
             spells = spells.filter(is_prepared=is_prepared)
         
         serializer = CharacterSpellSerializer(spells, many=True)
-        return Response(serializer.data)
+        data = serializer.data
+        requeue_unhydrated(spell.spell_slug for spell in spells if not spell.payload_id)
+        return Response(data)
     
     @action(detail=True, methods=['post'])
     def add_spell(self, request, pk=None):
@@ -368,17 +551,19 @@ class CharacterViewSet(viewsets.ModelViewSet):
                     'error': 'Personagem já conhece este feitiço'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Criar feitiço
+            # Criar feitiço (já com os dados do catálogo local, se houver)
             spell = serializer.save(character=character)
             
-            # Tentar buscar dados da API
-            spell.fetch_spell_data()
+            # Sem dados: hidratação em background (deduplicada por slug)
+            if not spell.payload_id:
+                schedule_spell_hydration(spell_slug)
             
             spell_serializer = CharacterSpellSerializer(spell)
             return Response({
                 'success': True,
                 'message': f'Feitiço {spell.spell_name} adicionado',
-                'spell': spell_serializer.data
+                'spell': spell_serializer.data,
+                'hydrating': not spell.payload_id
             }, status=status.HTTP_201_CREATED)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -411,89 +596,108 @@ class CharacterViewSet(viewsets.ModelViewSet):
 
 class SpellSearchView(viewsets.ViewSet):
     """
-    ViewSet para busca de feitiços na Open5e API
+    ViewSet para busca de feitiços no catálogo local
+    (alimentado por `python manage.py sync_open5e --spells`)
     """
     permission_classes = [permissions.IsAuthenticated]
     
+    @staticmethod
+    def _parse_level(level):
+        """Converte o parâmetro level, ignorando valores inválidos"""
+        try:
+            level = int(level)
+        except (TypeError, ValueError):
+            return None
+        return level if 0 <= level <= 9 else None
+    
+    @staticmethod
+    def _parse_limit(limit, default, maximum):
+        """Converte o parâmetro limit para 1..maximum (inválido -> default)"""
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            return default
+        return max(1, min(limit, maximum))
+    
+    @staticmethod
+    def _search_result(spell):
+        """Campos de um feitiço na listagem de busca"""
+        spell_dict = spell.to_dict()
+        for key in ('concentration', 'ritual', 'higher_level'):
+            spell_dict.pop(key)
+        return spell_dict
+    
     @action(detail=False, methods=['get'])
     def search(self, request):
-        """Busca feitiços na Open5e API"""
+        """Busca feitiços no catálogo local"""
         # Parâmetros de busca
         query = request.query_params.get('q', '')
         spell_class = request.query_params.get('class', '')
-        level = request.query_params.get('level', '')
+        level = self._parse_level(request.query_params.get('level', ''))
         school = request.query_params.get('school', '')
-        limit = request.query_params.get('limit', 20)
+        limit = self._parse_limit(request.query_params.get('limit'), 20, 100)  # Máximo 100 resultados
         
-        try:
-            limit = min(int(limit), 100)  # Máximo 100 resultados
-        except ValueError:
-            limit = 20
+        # Busca textual ranqueada (tsvector/pg_trgm ou FTS5) quando há índice
+        backend = get_search_backend() if query else None
+        if backend is not None:
+            hits, total = backend.search(
+                query, spell_class=spell_class, level=level, school=school, limit=limit
+            )
+            spells = Spell.objects.in_bulk([hit.spell_id for hit in hits])
+            results = []
+            for hit in hits:
+                spell_dict = self._search_result(spells[hit.spell_id])
+                spell_dict['rank'] = round(hit.rank, 4)
+                spell_dict['highlight'] = hit.highlight
+                results.append(spell_dict)
+            
+            return Response({
+                'count': total,
+                'next': None,
+                'previous': None,
+                'results': results
+            })
         
-        # Construir URL da API
-        api_url = "https://api.open5e.com/v2/spells/"
-        params = {'limit': limit}
+        spells = Spell.objects.all()
         
         if query:
-            params['search'] = query
+            spells = spells.filter(
+                models.Q(name__icontains=query) | models.Q(description__icontains=query)
+            )
         if spell_class:
-            params['dnd_class'] = spell_class
-        if level:
-            try:
-                level = int(level)
-                if 0 <= level <= 9:
-                    params['level'] = level
-            except ValueError:
-                pass
+            spells = spells.filter(class_keys__contains=f',{spell_class.lower()},')
+        if level is not None:
+            spells = spells.filter(level=level)
         if school:
-            params['school'] = school
+            spells = spells.filter(school__iexact=school)
         
-        try:
-            response = requests.get(api_url, params=params, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Processar resultados
-                spells = []
-                for spell_data in data.get('results', []):
-                    # Extrair classes do feitiço
-                    spell_classes = []
-                    if 'dnd_class' in spell_data:
-                        spell_classes = [cls.get('name', '') for cls in spell_data['dnd_class']]
-                    
-                    spell = {
-                        'name': spell_data.get('name', ''),
-                        'slug': spell_data.get('slug', ''),
-                        'level': spell_data.get('level', 0),
-                        'school': spell_data.get('school', ''),
-                        'classes': spell_classes,
-                        'description': spell_data.get('desc', ''),
-                        'casting_time': spell_data.get('casting_time', ''),
-                        'range': spell_data.get('range', ''),
-                        'components': spell_data.get('components', ''),
-                        'duration': spell_data.get('duration', ''),
-                    }
-                    spells.append(spell)
-                
-                return Response({
-                    'count': data.get('count', 0),
-                    'next': data.get('next'),
-                    'previous': data.get('previous'),
-                    'results': spells
-                })
-            else:
-                return Response({
-                    'error': 'Erro ao buscar feitiços na API'
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-                
-        except requests.RequestException as e:
-            return Response({
-                'error': f'Erro de conexão com a API: {str(e)}'
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        # Sem ranking: paginação por cursor em (level, name, id)
+        paginator = SpellKeysetPagination()
+        paginator.page_size = limit
+        page = paginator.paginate_queryset(spells, request, view=self)
+        return paginator.get_paginated_response([self._search_result(spell) for spell in page])
     
     @action(detail=False, methods=['get'])
-    def detail(self, request):
+    def autocomplete(self, request):
+        """Sugestões por prefixo de nome/slug (índice em memória, sem queries)"""
+        query = request.query_params.get('q', '')
+        spell_class = request.query_params.get('class', '')
+        level = self._parse_level(request.query_params.get('level', ''))
+        limit = self._parse_limit(request.query_params.get('limit'), 10, 50)
+        
+        entries = get_spell_index().suggest(query, spell_class=spell_class, level=level, limit=limit)
+        return Response({
+            'query': query,
+            'results': [
+                {'name': entry.name, 'slug': entry.slug, 'level': entry.level, 'school': entry.school}
+                for entry in entries
+            ]
+        })
+    
+    @action(detail=False, methods=['get'], url_path='detail', url_name='detail')
+    def spell_detail(self, request):
         """Busca detalhes de um feitiço específico"""
+        # Nome do método difere da rota: `detail` é atributo reservado do ViewSet
         spell_slug = request.query_params.get('slug')
         
         if not spell_slug:
@@ -502,121 +706,93 @@ class SpellSearchView(viewsets.ViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            response = requests.get(
-                f"https://api.open5e.com/v2/spells/{spell_slug}/",
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                spell_data = response.json()
-                
-                # Extrair classes do feitiço
-                spell_classes = []
-                if 'dnd_class' in spell_data:
-                    spell_classes = [cls.get('name', '') for cls in spell_data['dnd_class']]
-                
-                spell = {
-                    'name': spell_data.get('name', ''),
-                    'slug': spell_data.get('slug', ''),
-                    'level': spell_data.get('level', 0),
-                    'school': spell_data.get('school', ''),
-                    'classes': spell_classes,
-                    'description': spell_data.get('desc', ''),
-                    'casting_time': spell_data.get('casting_time', ''),
-                    'range': spell_data.get('range', ''),
-                    'components': spell_data.get('components', ''),
-                    'duration': spell_data.get('duration', ''),
-                    'concentration': spell_data.get('concentration', False),
-                    'ritual': spell_data.get('ritual', False),
-                    'higher_level': spell_data.get('higher_level', ''),
-                }
-                
-                return Response(spell)
-            elif response.status_code == 404:
-                return Response({
-                    'error': 'Feitiço não encontrado'
-                }, status=status.HTTP_404_NOT_FOUND)
-            else:
-                return Response({
-                    'error': 'Erro ao buscar feitiço na API'
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-                
-        except requests.RequestException as e:
+            spell = Spell.objects.get(slug=spell_slug)
+        except Spell.DoesNotExist:
             return Response({
-                'error': f'Erro de conexão com a API: {str(e)}'
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                'error': 'Feitiço não encontrado'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response(spell.to_dict())
+    
+    @staticmethod
+    def _facet_filters(params):
+        """Lê filtros de faceta (parâmetros repetidos combinam com OR)"""
+        booleans = {'true': True, 'false': False}
+        filters = {
+            'level': [level for level in map(SpellSearchView._parse_level, params.getlist('level'))
+                      if level is not None],
+            'school': [school.lower() for school in params.getlist('school') if school],
+            'class': [spell_class.lower() for spell_class in params.getlist('class') if spell_class],
+        }
+        for facet in ('concentration', 'ritual'):
+            filters[facet] = [
+                booleans[value.lower()] for value in params.getlist(facet) if value.lower() in booleans
+            ]
+        return filters
+    
+    @staticmethod
+    def _facet_entry_dict(entry):
+        return {
+            'name': entry.name,
+            'slug': entry.slug,
+            'level': entry.level,
+            'school': entry.school,
+            'casting_time': entry.casting_time,
+            'range': entry.range,
+            'concentration': entry.concentration,
+            'ritual': entry.ritual,
+        }
+    
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Feitiços filtrados por facetas + contagens de cada faceta"""
+        limit = self._parse_limit(request.query_params.get('limit'), 50, 200)
+        try:
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+        except ValueError:
+            offset = 0
+        
+        filters = self._facet_filters(request.query_params)
+        total, entries, counts = get_facet_index().search(filters, offset=offset, limit=limit)
+        
+        return Response({
+            'count': total,
+            'offset': offset,
+            'results': [self._facet_entry_dict(entry) for entry in entries],
+            'facets': {
+                facet: {str(value).lower(): count for value, count in values.items()}
+                for facet, values in counts.items()
+            }
+        })
     
     @action(detail=False, methods=['get'])
     def for_class(self, request):
         """Lista feitiços disponíveis para uma classe específica"""
         character_class = request.query_params.get('class')
-        level = request.query_params.get('level', '')
-        limit = request.query_params.get('limit', 50)
+        level = self._parse_level(request.query_params.get('level', ''))
+        limit = self._parse_limit(request.query_params.get('limit'), 50, 100)
         
         if not character_class:
             return Response({
                 'error': 'Parâmetro class é obrigatório'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            limit = min(int(limit), 100)
-        except ValueError:
-            limit = 50
-        
-        # Buscar na API
-        api_url = "https://api.open5e.com/v2/spells/"
-        params = {
-            'dnd_class': character_class,
-            'limit': limit
-        }
+        filters = {'class': [character_class.lower()]}
+        if level is not None:
+            filters['level'] = [level]
+        total, entries, counts = get_facet_index().search(filters, limit=limit)
         
-        if level:
-            try:
-                level = int(level)
-                if 0 <= level <= 9:
-                    params['level'] = level
-            except ValueError:
-                pass
+        # Agrupar por nível
+        spells_by_level = {}
+        for entry in entries:
+            spells_by_level.setdefault(entry.level, []).append(self._facet_entry_dict(entry))
         
-        try:
-            response = requests.get(api_url, params=params, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Processar e agrupar por nível
-                spells_by_level = {}
-                for spell_data in data.get('results', []):
-                    spell_level = spell_data.get('level', 0)
-                    
-                    if spell_level not in spells_by_level:
-                        spells_by_level[spell_level] = []
-                    
-                    spell = {
-                        'name': spell_data.get('name', ''),
-                        'slug': spell_data.get('slug', ''),
-                        'level': spell_level,
-                        'school': spell_data.get('school', ''),
-                        'casting_time': spell_data.get('casting_time', ''),
-                        'range': spell_data.get('range', ''),
-                        'concentration': spell_data.get('concentration', False),
-                        'ritual': spell_data.get('ritual', False),
-                    }
-                    spells_by_level[spell_level].append(spell)
-                
-                return Response({
-                    'class': character_class,
-                    'total_count': data.get('count', 0),
-                    'spells_by_level': spells_by_level
-                })
-            else:
-                return Response({
-                    'error': 'Erro ao buscar feitiços na API'
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-                
-        except requests.RequestException as e:
-            return Response({
-                'error': f'Erro de conexão com a API: {str(e)}'
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response({
+            'class': character_class,
+            'total_count': total,
+            'count_by_level': counts['level'],
+            'spells_by_level': spells_by_level
+        })
 
 
 class CampaignViewSet(viewsets.ModelViewSet):
@@ -629,13 +805,19 @@ class CampaignViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'created_at']
     ordering = ['-created_at']
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         """Retorna campanhas onde o usuário é DM ou jogador"""
         user = self.request.user
-        return Campaign.objects.filter(
+        queryset = Campaign.objects.filter(
             models.Q(dm=user) | models.Q(players=user)
-        ).distinct().select_related('dm').prefetch_related('players')
+        ).distinct()
+        relations = expanded_relations(self.request, ('dm', 'players'))
+        if 'dm' in relations:
+            queryset = queryset.select_related('dm')
+        # player_count e os ids dos jogadores também usam o prefetch
+        return queryset.prefetch_related('players')
     
     @action(detail=True, methods=['post'])
     def join(self, request, pk=None):
@@ -713,20 +895,23 @@ def character_creation_data(request):
     """
     Endpoint para obter todos os dados necessários para criação de personagem
     """
-    races = Race.objects.all()
-    classes = CharacterClass.objects.all()
-    backgrounds = Background.objects.all()
-    
-    return Response({
-        'races': RaceSerializer(races, many=True).data,
-        'classes': CharacterClassSerializer(classes, many=True).data,
-        'backgrounds': BackgroundSerializer(backgrounds, many=True).data,
-        'point_buy_limit': 27,
-        'attribute_limits': {
-            'min': 8,
-            'max': 15
+    def build():
+        races = Race.objects.all()
+        classes = CharacterClass.objects.all()
+        backgrounds = Background.objects.all()
+        
+        return {
+            'races': RaceSerializer(races, many=True).data,
+            'classes': CharacterClassSerializer(classes, many=True).data,
+            'backgrounds': BackgroundSerializer(backgrounds, many=True).data,
+            'point_buy_limit': 27,
+            'attribute_limits': {
+                'min': 8,
+                'max': 15
+            }
         }
-    })
+    
+    return Response(get_or_build(REFERENCE_NAMESPACE, 'character_creation_data', build))
 
 
 @api_view(['POST'])
@@ -0,0 +1,47 @@
+# core/parsers.py - Parsers rápidos: JSON (orjson, com fallback para a
+# stdlib) e MessagePack
+
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+
+
+def loads(data, encoding='utf-8'):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data.decode(encoding))
+
+
+class FastJSONParser(BaseParser):
+    """Substituto do JSONParser do DRF, decodificado pelo orjson quando instalado"""
+    media_type = 'application/json'
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            return loads(stream.read(), encoding)
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class MessagePackParser(BaseParser):
+    """Corpo `application/msgpack` (mesma estrutura do JSON)"""
+    media_type = 'application/msgpack'
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False, strict_map_key=False)
+        except (ValueError, TypeError, msgpack.UnpackException) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
+
+
+def msgpack_parsers():
+    """[MessagePackParser] se o msgpack estiver instalado"""
+    return [MessagePackParser] if msgpack is not None else []
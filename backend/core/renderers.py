@@ -0,0 +1,106 @@
+# core/renderers.py - Renderers rápidos: JSON (orjson, com fallback para a
+# stdlib) e MessagePack
+
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack é opcional
+    msgpack = None
+
+
+_encoder = encoders.JSONEncoder()
+
+
+def _default(obj):
+    """
+    Tipos que o orjson não serializa sozinho (Decimal, lazy strings,
+    QuerySet...) e datetimes, formatados como o JSONEncoder do DRF
+    ('Z' em UTC) para a saída ser idêntica à do renderer padrão
+    """
+    return _encoder.default(obj)
+
+
+def _escape_separators(content):
+    # U+2028/U+2029 são JSON válido mas quebram JavaScript embutido:
+    # escapados como no JSONRenderer do DRF
+    if b'\xe2\x80' in content:
+        content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return content
+
+
+def dumps(data, indent=None):
+    """
+    Serializa para bytes UTF-8.
+
+    Diferença em relação ao JSONRenderer do DRF: com orjson, NaN e
+    Infinity saem como `null` em vez de levantar ValueError (o fallback
+    da stdlib levanta, como o DRF). Os models não produzem esses valores.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return _escape_separators(orjson.dumps(data, default=_default, option=option))
+    return _escape_separators(json.dumps(
+        data, cls=encoders.JSONEncoder, indent=indent, ensure_ascii=False,
+        allow_nan=False, separators=None if indent else (',', ':')
+    ).encode('utf-8'))
+
+
+class FastJSONRenderer(BaseRenderer):
+    """
+    Substituto do JSONRenderer do DRF: mesma saída, codificada pelo orjson
+    quando instalado (exceto NaN/Infinity, ver `dumps`). Ativado por
+    API_FAST_JSON nos settings.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return dumps(data, indent=self._indent(accepted_media_type))
+
+    @staticmethod
+    def _indent(accepted_media_type):
+        # "application/json; indent=4", como no JSONRenderer
+        for param in (accepted_media_type or '').split(';')[1:]:
+            key, _, value = param.strip().partition('=')
+            if key == 'indent':
+                try:
+                    return max(min(int(value), 8), 0)
+                except ValueError:
+                    return None
+        return None
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    `application/msgpack` por negociação de conteúdo (Accept ou
+    ?format=msgpack). Datas e Decimals seguem as regras do JSONEncoder do
+    DRF, então o cliente decodifica os mesmos valores que receberia em JSON.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_default, use_bin_type=True, datetime=False)
+
+
+def msgpack_renderers():
+    """[MessagePackRenderer] se o msgpack estiver instalado"""
+    return [MessagePackRenderer] if msgpack is not None else []
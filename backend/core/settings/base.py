@@ -96,6 +96,49 @@ else:
         }
     }
 
+# Cache - Redis (docker-compose) com fallback para memória local
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'dnd',
+            'TIMEOUT': 60 * 60 * 24,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'dnd-creator',
+            'TIMEOUT': 60 * 60 * 24,
+        }
+    }
+
+# Open5e API - cliente HTTP compartilhado (apps.api_integration.client)
+OPEN5E_BASE_URL = config('OPEN5E_BASE_URL', default='https://api.open5e.com/')
+OPEN5E_TIMEOUT = config('OPEN5E_TIMEOUT', default=10, cast=int)
+OPEN5E_MAX_RETRIES = config('OPEN5E_MAX_RETRIES', default=3, cast=int)
+OPEN5E_POOL_SIZE = config('OPEN5E_POOL_SIZE', default=10, cast=int)
+OPEN5E_MAX_CONCURRENCY = config('OPEN5E_MAX_CONCURRENCY', default=4, cast=int)
+# Circuit breaker (falhas seguidas / segundos aberto) e frescor do cache
+OPEN5E_FAILURE_THRESHOLD = config('OPEN5E_FAILURE_THRESHOLD', default=5, cast=int)
+OPEN5E_RESET_TIMEOUT = config('OPEN5E_RESET_TIMEOUT', default=30, cast=int)
+OPEN5E_CACHE_TTL = config('OPEN5E_CACHE_TTL', default=60 * 60, cast=int)
+# sync_open5e: requisições simultâneas e limite de requisições por segundo
+OPEN5E_SYNC_WORKERS = config('OPEN5E_SYNC_WORKERS', default=4, cast=int)
+OPEN5E_SYNC_RATE = config('OPEN5E_SYNC_RATE', default=5.0, cast=float)
+# Snapshot offline do catálogo (export_open5e_snapshot / load_open5e_snapshot)
+OPEN5E_SNAPSHOT_PATH = config('OPEN5E_SNAPSHOT_PATH', default=str(BASE_DIR / 'data' / 'open5e-snapshot.ndjson.gz'))
+
+# Tabela de progressão em memória: intervalo (s) entre consultas à versão
+# dos dados de referência no cache (alterações feitas por outros workers)
+PROGRESSION_VERSION_CHECK_INTERVAL = config('PROGRESSION_VERSION_CHECK_INTERVAL', default=5, cast=float)
+# Idem para os índices de autocomplete/facetas de feitiços
+SPELL_INDEX_VERSION_CHECK_INTERVAL = config('SPELL_INDEX_VERSION_CHECK_INTERVAL', default=5, cast=float)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -172,6 +215,22 @@ REST_FRAMEWORK = {
     ],
 }
 
+# JSON via orjson (core.renderers / core.parsers); sem orjson instalado
+# a saída é a mesma, codificada pela stdlib
+API_FAST_JSON = config('API_FAST_JSON', default=False, cast=bool)
+# Interface navegável do DRF só em desenvolvimento
+API_BROWSABLE = config('API_BROWSABLE', default=DEBUG, cast=bool)
+
+if API_FAST_JSON:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'][0] = 'core.renderers.FastJSONRenderer'
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'] = [
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ]
+if not API_BROWSABLE:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].remove('rest_framework.renderers.BrowsableAPIRenderer')
+
 # JWT Settings
 from datetime import timedelta
 SIMPLE_JWT = {
@@ -1,11 +1,46 @@
 // src/services/api.js - CORRIGIDO COM URLs COMPLETAS
 import axios from 'axios';
+import { decode, encode } from '@msgpack/msgpack';
 
 // A base URL já inclui /api, então não precisamos adicionar novamente
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api';
 
 console.log('🌐 API_BASE_URL configurada como:', API_BASE_URL);
 
+// MessagePack nos endpoints de personagem (opt-in: VITE_API_MSGPACK=true).
+// Payloads menores que JSON; o restante da API continua em JSON.
+const MSGPACK = 'application/msgpack';
+const USE_MSGPACK = import.meta.env.VITE_API_MSGPACK === 'true';
+const isMsgpackUrl = (url = '') => url.startsWith('/characters/');
+
+const useMsgpack = (config) => {
+  if (!USE_MSGPACK || !isMsgpackUrl(config.url)) return;
+
+  config.headers.Accept = MSGPACK;
+  config.responseType = 'arraybuffer';
+  // Requisição reenviada (ex: após refresh do token): corpo já codificado
+  const encoded = config.data instanceof Uint8Array || config.data instanceof ArrayBuffer;
+  if (config.data !== undefined && !encoded && !(config.data instanceof FormData)) {
+    config.headers['Content-Type'] = MSGPACK;
+    config.data = encode(config.data);
+    config.transformRequest = [(data) => data];
+  }
+};
+
+// Converte respostas msgpack (ou JSON em arraybuffer) de volta para objetos
+const decodeBody = (response) => {
+  if (!response || !(response.data instanceof ArrayBuffer)) return;
+
+  const contentType = response.headers?.['content-type'] || '';
+  if (response.data.byteLength === 0) {
+    response.data = null;
+  } else if (contentType.startsWith(MSGPACK)) {
+    response.data = decode(new Uint8Array(response.data));
+  } else if (contentType.includes('json')) {
+    response.data = JSON.parse(new TextDecoder().decode(response.data));
+  }
+};
+
 // Criar instância do axios
 const api = axios.create({
   baseURL: API_BASE_URL,
@@ -22,6 +57,7 @@ api.interceptors.request.use(
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
+    useMsgpack(config);
     
     console.log('📤 Request:', {
       method: config.method?.toUpperCase(),
@@ -42,6 +78,7 @@ api.interceptors.request.use(
 // Interceptor para lidar com refresh de token
 api.interceptors.response.use(
   (response) => {
+    decodeBody(response);
     console.log('📥 Response SUCCESS:', {
       status: response.status,
       url: response.config.url,
@@ -50,6 +87,7 @@ api.interceptors.response.use(
     return response;
   },
   async (error) => {
+    decodeBody(error.response);
     console.error('❌ Response ERROR:', {
       status: error.response?.status,
       url: error.config?.url,
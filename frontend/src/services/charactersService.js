@@ -4,7 +4,10 @@ import api from './api';
 
 const charactersService = {
   // --- GERENCIAMENTO BÁSICO DE PERSONAGEM ---
-  getCharacters: () => api.get('/characters/'),
+  // Listagem só com o que os cards mostram (?fields= no backend)
+  getCharacters: () => api.get('/characters/', {
+    params: { fields: 'id,name,level,current_hp,max_hp,created_at,race.name,character_class.name' },
+  }),
   getCharacterDetails: (characterId) => api.get(`/characters/${characterId}/`),
   createCharacter: (characterData) => api.post('/characters/', characterData),
   updateCharacter: (characterId, characterData) => api.put(`/characters/${characterId}/`, characterData),
@@ -26,6 +26,45 @@ const spellsService = {
     }
   },
 
+  /**
+   * Sugestões de feitiços por prefixo (search-as-you-type).
+   * Usa o índice em memória do backend em vez da busca completa.
+   * @param {string} query - Prefixo digitado
+   * @param {object} filters - Ex: { class, level, limit }
+   * @returns {Promise}
+   */
+  async autocompleteSpells(query, filters = {}) {
+    const params = new URLSearchParams({ q: query });
+    Object.entries(filters).forEach(([key, value]) => {
+      if (value !== undefined && value !== null && value !== '') {
+        params.append(key, value);
+      }
+    });
+
+    const response = await api.get(`/spells/autocomplete/?${params.toString()}`);
+    return response.data.results;
+  },
+
+  /**
+   * Navegação por facetas: feitiços filtrados + contagens por faceta.
+   * Arrays geram parâmetros repetidos (ex: { level: [1, 2] } -> OU).
+   * @param {object} filters - Ex: { level, school, class, concentration, ritual, limit, offset }
+   * @returns {Promise} - { count, results, facets }
+   */
+  async getSpellFacets(filters = {}) {
+    const params = new URLSearchParams();
+    Object.entries(filters).forEach(([key, value]) => {
+      [].concat(value).forEach((item) => {
+        if (item !== undefined && item !== null && item !== '') {
+          params.append(key, item);
+        }
+      });
+    });
+
+    const response = await api.get(`/spells/facets/?${params.toString()}`);
+    return response.data;
+  },
+
   /**
    * Busca detalhes de um feitiço específico pelo seu slug.
    * @param {string} spellSlug 
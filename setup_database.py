@@ -36,13 +36,21 @@ def setup_database():
         print("\n📈 3. Populando progressões de todas as classes...")
         call_command('populate_all_class_progressions', verbosity=1)
         
-        print("\n🔄 4. Sincronizando com Open5e API (opcional)...")
-        try:
-            call_command('sync_open5e', verbosity=1)
-            print("✅ Sincronização com API concluída")
-        except Exception as e:
-            print(f"⚠️ Aviso: Falha na sincronização com API: {e}")
-            print("   Você pode executar 'python manage.py sync_open5e' depois")
+        snapshot_path = getattr(settings, 'OPEN5E_SNAPSHOT_PATH', '')
+        if snapshot_path and os.path.exists(snapshot_path):
+            print("\n📀 4. Carregando snapshot offline da Open5e...")
+            call_command('load_open5e_snapshot', snapshot_path, verbosity=1)
+            print("   Para atualizar com a API depois: python manage.py sync_open5e")
+        else:
+            print("\n🔄 4. Sincronizando com Open5e API (opcional)...")
+            try:
+                call_command('sync_open5e', verbosity=1)
+                print("✅ Sincronização com API concluída")
+                print("   Para gerar um snapshot offline: python manage.py export_open5e_snapshot")
+            except Exception as e:
+                print(f"⚠️ Aviso: Falha na sincronização com API: {e}")
+                print("   Você pode executar 'python manage.py sync_open5e' depois")
+                print("   ou carregar um snapshot: python manage.py load_open5e_snapshot <arquivo>")
         
         print("\n" + "=" * 60)
         print("✅ SETUP CONCLUÍDO COM SUCESSO!")